@@ -110,13 +110,158 @@ REST_FRAMEWORK = {
         'rest_framework.renderers.JSONRenderer',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'recipes.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
 }
 
+# Cache: in-process by default (no external services). Set CACHE_BACKEND=file to share
+# entries between worker processes on one host via CACHE_LOCATION.
+if os.environ.get('CACHE_BACKEND', 'locmem') == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION', str(BASE_DIR / '.cache')),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'forklog',
+        }
+    }
+
+# Server-side cache of rendered recipe read responses (recipes/response_cache.py).
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', '300'))
+RESPONSE_CACHE_ENDPOINTS = {
+    'recipe_list': True,
+    'recipe_detail': True,
+    'recipe_version_detail': True,
+    'discovery_feed': True,
+}
+
+# Webpage fetching for imports (recipes/fetcher.py): timeouts in seconds, sizes in bytes.
+FETCH_CONNECT_TIMEOUT = 5
+FETCH_READ_TIMEOUT = 15
+FETCH_TOTAL_TIMEOUT = 20
+FETCH_MAX_BYTES = 3 * 1024 * 1024
+FETCH_USEFUL_BYTES = 50000  # stop streaming once this much visible text has arrived
+FETCH_POOL_MAXSIZE_PER_HOST = 4
+PAGE_CACHE_DIR = os.environ.get('PAGE_CACHE_DIR', str(BASE_DIR / '.cache' / 'pages'))
+PAGE_CACHE_MAX_BYTES = int(os.environ.get('PAGE_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+PAGE_CACHE_FRESH_SECONDS = 600  # reuse without revalidating for this long
+PAGE_CACHE_SCAN_SECONDS = 300  # rescan the cache directory for eviction at least this often
+
+# Seconds a validated API token stays cached in-process (recipes/authentication.py); 0 disables.
+TOKEN_AUTH_CACHE_TTL = int(os.environ.get('TOKEN_AUTH_CACHE_TTL', '30'))
+
 # Claude API (optional; app works without it for basic CRUD)
 ANTHROPIC_API_KEY = os.environ.get('ANTHROPIC_API_KEY', '')
+# Optional API endpoint override (e.g. a local fake server for load/failure testing).
+ANTHROPIC_BASE_URL = os.environ.get('ANTHROPIC_BASE_URL', '')
+# Shared Anthropic client (recipes/ai_client.py): connection pool, timeouts (seconds), retries on
+# overload with jittered backoff, and a circuit breaker that fails fast (503) after repeated failures.
+AI_MAX_CONNECTIONS = int(os.environ.get('AI_MAX_CONNECTIONS', '20'))
+AI_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get('AI_MAX_KEEPALIVE_CONNECTIONS', '10'))
+AI_CONNECT_TIMEOUT = float(os.environ.get('AI_CONNECT_TIMEOUT', '5'))
+AI_READ_TIMEOUT = float(os.environ.get('AI_READ_TIMEOUT', '120'))
+AI_POOL_TIMEOUT = float(os.environ.get('AI_POOL_TIMEOUT', '10'))
+AI_MAX_RETRIES = int(os.environ.get('AI_MAX_RETRIES', '3'))
+AI_RETRY_BASE_DELAY = float(os.environ.get('AI_RETRY_BASE_DELAY', '0.5'))
+AI_RETRY_MAX_DELAY = float(os.environ.get('AI_RETRY_MAX_DELAY', '8'))
+AI_BREAKER_FAILURES = int(os.environ.get('AI_BREAKER_FAILURES', '5'))
+AI_BREAKER_RESET_SECONDS = float(os.environ.get('AI_BREAKER_RESET_SECONDS', '30'))
+# Rate limits for /api/ai/* (recipes/throttling.py), kept in the cache above: per user (or client IP
+# when anonymous) token buckets as (burst, requests per minute), plus a global cap on AI requests
+# in flight. Over the limit -> 429 with Retry-After. Each in-flight request leases a slot for at most
+# AI_IN_FLIGHT_TTL seconds (longer than any AI call or stream); the cap is exact only on cache
+# backends with an atomic add() (not CACHE_BACKEND=file).
+AI_RATE_LIMIT_ENABLED = os.environ.get('AI_RATE_LIMIT_ENABLED', 'True').lower() in ('true', '1', 'yes')
+AI_RATE_LIMITS = {
+    'ai_guide': (20, 10),
+    'ai_import': (10, 4),
+    'ai_import_batch': (2, 1),
+    'ai_voice_command': (20, 10),
+}
+AI_MAX_IN_FLIGHT = int(os.environ.get('AI_MAX_IN_FLIGHT', '16'))
+AI_IN_FLIGHT_RETRY_AFTER = int(os.environ.get('AI_IN_FLIGHT_RETRY_AFTER', '5'))
+AI_IN_FLIGHT_TTL = int(os.environ.get('AI_IN_FLIGHT_TTL', '300'))
+# Model routing (recipes/model_routing.py): per task, ordered (max prompt chars or None, tier) rules;
+# the first that fits wins. A cheaper tier whose recent JSON success rate for the task drops below
+# AI_ROUTE_MIN_SUCCESS_RATE is skipped, and a reply that fails to parse is retried on AI_FALLBACK_TIER.
+AI_MODEL_TIERS = {
+    'small': os.environ.get('AI_MODEL_SMALL', 'claude-3-5-haiku-20241022'),
+    'large': os.environ.get('AI_MODEL_LARGE', 'claude-sonnet-4-20250514'),
+}
+AI_FALLBACK_TIER = 'large'
+AI_MODEL_ROUTES = {
+    'guide': [(8000, 'small'), (None, 'large')],
+    'import.webpage': [(12000, 'small'), (None, 'large')],
+    'import.source': [(None, 'large')],
+    'voice_command.patch': [(None, 'small')],
+    'voice_command.full': [(None, 'large')],
+}
+AI_ROUTE_WINDOW = int(os.environ.get('AI_ROUTE_WINDOW', '20'))
+AI_ROUTE_MIN_SUCCESS_RATE = float(os.environ.get('AI_ROUTE_MIN_SUCCESS_RATE', '0.8'))
+# Import docling/anthropic at startup (dedicated import workers); otherwise loaded on first use.
+PRELOAD_AI_DEPENDENCIES = os.environ.get('PRELOAD_AI_DEPENDENCIES', 'False').lower() in ('true', '1', 'yes')
+# Apply simple voice commands (scale, one ingredient quantity, one step duration) locally.
+VOICE_LOCAL_COMMANDS = os.environ.get('VOICE_LOCAL_COMMANDS', 'True').lower() in ('true', '1', 'yes')
+# Voice commands answered by Claude: "full" (whole updated_recipe) or "patch" (id-addressed change set).
+VOICE_COMMAND_MODE = os.environ.get('VOICE_COMMAND_MODE', 'full')
+# docling conversion runs in its own process pool (0 = in the web process, no timeout or memory cap).
+# Workers are replaced after DOCLING_MAX_TASKS_PER_WORKER conversions; 0 keeps them forever.
+DOCLING_WORKERS = int(os.environ.get('DOCLING_WORKERS', '2'))
+DOCLING_TASK_TIMEOUT = int(os.environ.get('DOCLING_TASK_TIMEOUT', '60'))
+DOCLING_WORKER_MEMORY_MB = int(os.environ.get('DOCLING_WORKER_MEMORY_MB', '2048'))
+DOCLING_MAX_TASKS_PER_WORKER = int(os.environ.get('DOCLING_MAX_TASKS_PER_WORKER', '50'))
+# Batch import (POST /api/ai/import/batch/): URLs per request, concurrent page fetches
+# (conversion itself is bounded by DOCLING_WORKERS) and concurrent model calls per batch.
+BATCH_IMPORT_MAX_URLS = int(os.environ.get('BATCH_IMPORT_MAX_URLS', '50'))
+BATCH_IMPORT_FETCH_WORKERS = int(os.environ.get('BATCH_IMPORT_FETCH_WORKERS', '8'))
+BATCH_IMPORT_AI_CONCURRENCY = int(os.environ.get('BATCH_IMPORT_AI_CONCURRENCY', '4'))
+# New versions without nutrition get it computed from the bundled food table (recipes/data/foods.json)
+# when metadata.servings is known and at least NUTRITION_MIN_COVERAGE of the quantified ingredient
+# weight is recognised.
+NUTRITION_AUTO_COMPUTE = os.environ.get('NUTRITION_AUTO_COMPUTE', 'True').lower() in ('true', '1', 'yes')
+NUTRITION_MIN_COVERAGE = float(os.environ.get('NUTRITION_MIN_COVERAGE', '0.6'))
+NUTRITION_CACHE_TIMEOUT = int(os.environ.get('NUTRITION_CACHE_TIMEOUT', '86400'))
+# Recipe content vs schemas/recipe.json on writes and AI results: 'enforce' (400 / model fallback),
+# 'warn' (only counted in metrics) or 'off'.
+RECIPE_SCHEMA_VALIDATION = os.environ.get('RECIPE_SCHEMA_VALIDATION', 'enforce')
+# Content-addressed version content (recipes/blobs.py): values whose canonical JSON is shorter than
+# BLOB_INLINE_MAX_BYTES stay inline in the row; blob texts are kept in a per-process LRU of
+# BLOB_LRU_MAX_BYTES and in Django's cache for BLOB_CACHE_TIMEOUT seconds. gc_blobs keeps
+# unreferenced blobs touched within BLOB_GC_GRACE_SECONDS.
+BLOB_INLINE_MAX_BYTES = int(os.environ.get('BLOB_INLINE_MAX_BYTES', '128'))
+BLOB_LRU_MAX_BYTES = int(os.environ.get('BLOB_LRU_MAX_BYTES', str(32 * 1024 * 1024)))
+BLOB_CACHE_TIMEOUT = int(os.environ.get('BLOB_CACHE_TIMEOUT', '86400'))
+BLOB_GC_GRACE_SECONDS = int(os.environ.get('BLOB_GC_GRACE_SECONDS', '3600'))
+# Cold storage (recipes/archive.py, manage.py archive_cold_data): blobs not referenced by a write and
+# meals ended more than COLD_STORAGE_AFTER_DAYS ago are compressed.
+COLD_STORAGE_AFTER_DAYS = int(os.environ.get('COLD_STORAGE_AFTER_DAYS', '180'))
+# Image thumbnails (recipes/images.py, needs Pillow) for main_picture, step media and meal photos.
+# Downloads are capped at IMAGE_MAX_BYTES and decodes at IMAGE_MAX_PIXELS; IMAGE_WORKERS threads
+# with at most IMAGE_QUEUE_MAX queued (the rest wait for manage.py process_images).
+IMAGE_THUMBNAILS_ENABLED = os.environ.get('IMAGE_THUMBNAILS_ENABLED', 'True').lower() in ('true', '1', 'yes')
+IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', '2'))
+IMAGE_QUEUE_MAX = int(os.environ.get('IMAGE_QUEUE_MAX', '200'))
+IMAGE_MAX_BYTES = int(os.environ.get('IMAGE_MAX_BYTES', str(10 * 1024 * 1024)))
+IMAGE_MAX_PIXELS = int(os.environ.get('IMAGE_MAX_PIXELS', '40000000'))
+IMAGE_MAX_ATTEMPTS = int(os.environ.get('IMAGE_MAX_ATTEMPTS', '3'))
+THUMBNAIL_WIDTHS = (160, 480)
+THUMBNAIL_QUALITY = int(os.environ.get('THUMBNAIL_QUALITY', '80'))
+THUMBNAIL_ROOT = os.environ.get('THUMBNAIL_ROOT', str(BASE_DIR / 'media' / 'thumbs'))
+THUMBNAIL_URL = '/api/images/'
+# Public discovery feed (GET /api/discover/): Cache-Control max-age in seconds.
+DISCOVERY_MAX_AGE = int(os.environ.get('DISCOVERY_MAX_AGE', '60'))
+# Delta sync (GET /api/sync/, recipes/sync.py): change log entries are inserted when the write commits
+# and held back for SYNC_SETTLE_SECONDS (longer than one log insert can stay uncommitted, so a
+# concurrent insert can't land behind a served cursor); manage.py compact_change_log prunes tombstones
+# after SYNC_TOMBSTONE_DAYS, and older cursors get 410 and must sync from scratch.
+SYNC_SETTLE_SECONDS = int(os.environ.get('SYNC_SETTLE_SECONDS', '5'))
+SYNC_TOMBSTONE_DAYS = int(os.environ.get('SYNC_TOMBSTONE_DAYS', '30'))
 
 # django-allauth: minimal account settings (we use token auth for API)
 ACCOUNT_EMAIL_VERIFICATION = 'optional'
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Recipe, RecipeVersion, Meal, ParsedRecipeCache
+from .models import ChangeLogEntry, CompressionDictionary, ContentBlob, ImageAsset, Recipe, RecipeVersion, Meal, ParsedRecipeCache, PublicRecipe
 
 
 @admin.register(Recipe)
@@ -9,7 +9,7 @@ class RecipeAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('name',)}
     search_fields = ('name',)
     readonly_fields = ('uuid',)
-    raw_id_fields = ('owner',)
+    raw_id_fields = ('owner', 'forked_from')
 
 
 @admin.register(RecipeVersion)
@@ -31,3 +31,42 @@ class ParsedRecipeCacheAdmin(admin.ModelAdmin):
     list_display = ('normalized_url', 'url', 'created_at')
     search_fields = ('url', 'normalized_url')
     readonly_fields = ('created_at',)
+
+
+@admin.register(PublicRecipe)
+class PublicRecipeAdmin(admin.ModelAdmin):
+    list_display = ('title', 'owner_username', 'cuisine', 'course', 'published_at', 'meal_rating_count')
+    list_filter = ('course',)
+    search_fields = ('title', 'owner_username')
+    raw_id_fields = ('recipe', 'version')
+
+
+@admin.register(ContentBlob)
+class ContentBlobAdmin(admin.ModelAdmin):
+    list_display = ('digest', 'size', 'refcount', 'codec', 'created_at', 'touched_at')
+    list_filter = ('codec',)
+    search_fields = ('digest',)
+    readonly_fields = ('digest', 'data', 'size', 'refcount', 'codec', 'created_at', 'touched_at')
+    exclude = ('packed',)
+
+
+@admin.register(CompressionDictionary)
+class CompressionDictionaryAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'sample_count', 'created_at')
+    list_filter = ('kind',)
+    exclude = ('data',)
+
+
+@admin.register(ImageAsset)
+class ImageAssetAdmin(admin.ModelAdmin):
+    list_display = ('url', 'status', 'width', 'height', 'bytes', 'attempts', 'updated_at')
+    list_filter = ('status', 'thumbnail_format')
+    search_fields = ('url', 'content_hash')
+    readonly_fields = ('url_hash', 'content_hash', 'created_at', 'updated_at')
+
+
+@admin.register(ChangeLogEntry)
+class ChangeLogEntryAdmin(admin.ModelAdmin):
+    list_display = ('id', 'owner', 'kind', 'object_id', 'deleted', 'changed_at')
+    list_filter = ('kind', 'deleted')
+    raw_id_fields = ('owner',)
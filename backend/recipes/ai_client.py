@@ -0,0 +1,225 @@
+"""
+Process-wide Anthropic client with bounded connection pooling, jittered retries and a circuit breaker.
+
+- One client (and one HTTP connection pool) per process instead of one per request.
+- Overload and transient failures (429, 5xx, 529, connection errors) are retried up to
+  AI_MAX_RETRIES times with full-jitter exponential backoff, honouring Retry-After.
+- After AI_BREAKER_FAILURES consecutive retryable failures the breaker opens and calls fail fast
+  with CircuitOpenError for AI_BREAKER_RESET_SECONDS; then one trial call is let through.
+  Services turn the error into their usual (None, error) result, which views answer with 503.
+
+ANTHROPIC_BASE_URL points the client at another endpoint (e.g. a local fake server).
+"""
+
+import random
+import threading
+import time
+
+from django.conf import settings
+
+from . import metrics
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class CircuitOpenError(Exception):
+    """The AI backend failed repeatedly; calls are rejected until the breaker resets."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open -> half-open (one trial) -> closed/open."""
+
+    def __init__(self, failure_threshold, reset_seconds):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now):
+        if self._opened_at is None:
+            return 'closed'
+        if now - self._opened_at >= self.reset_seconds:
+            return 'half-open'
+        return 'open'
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go out now."""
+        with self._lock:
+            now = time.monotonic()
+            state = self._state(now)
+            if state == 'closed':
+                return
+            if state == 'half-open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            retry_in = max(0, self.reset_seconds - (now - self._opened_at))
+        metrics.incr('ai.breaker.rejected')
+        raise CircuitOpenError(f'AI service temporarily unavailable; retry in {retry_in:.0f}s.')
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                metrics.incr('ai.breaker.closed')
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            reopen = self._trial_in_flight
+            self._trial_in_flight = False
+            if reopen or (self._opened_at is None and self._failures >= self.failure_threshold):
+                self._opened_at = time.monotonic()
+                metrics.incr('ai.breaker.opened')
+
+    def reset(self):
+        self.record_success()
+
+
+breaker = CircuitBreaker(
+    failure_threshold=_setting('AI_BREAKER_FAILURES', 5),
+    reset_seconds=_setting('AI_BREAKER_RESET_SECONDS', 30),
+)
+
+
+def get_client():
+    """Shared Anthropic client, or None without an API key (or without the anthropic package)."""
+    global _client
+    if not _setting('ANTHROPIC_API_KEY', None):
+        return None
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                try:
+                    import anthropic
+                except ImportError:
+                    return None
+                # DEFAULT_CONNECTION_LIMITS is an httpx Limits instance; build ours with the same class
+                limits = type(anthropic.DEFAULT_CONNECTION_LIMITS)(
+                    max_connections=_setting('AI_MAX_CONNECTIONS', 20),
+                    max_keepalive_connections=_setting('AI_MAX_KEEPALIVE_CONNECTIONS', 10),
+                    keepalive_expiry=_setting('AI_KEEPALIVE_EXPIRY', 30),
+                )
+                timeout = anthropic.Timeout(
+                    _setting('AI_READ_TIMEOUT', 120),
+                    connect=_setting('AI_CONNECT_TIMEOUT', 5),
+                    pool=_setting('AI_POOL_TIMEOUT', 10),
+                )
+                _client = anthropic.Anthropic(
+                    api_key=settings.ANTHROPIC_API_KEY,
+                    base_url=_setting('ANTHROPIC_BASE_URL', None) or None,
+                    timeout=timeout,
+                    max_retries=0,  # retried below, so the breaker sees every attempt
+                    http_client=anthropic.DefaultHttpxClient(limits=limits, timeout=timeout),
+                )
+    return _client
+
+
+def reset_client():
+    """Drop the shared client (settings changed, or in tests)."""
+    global _client
+    with _client_lock:
+        client, _client = _client, None
+    if client is not None:
+        client.close()
+
+
+def _is_retryable(exc):
+    import anthropic
+
+    if isinstance(exc, anthropic.APIConnectionError):  # includes APITimeoutError
+        return True
+    return isinstance(exc, anthropic.APIStatusError) and exc.status_code in RETRYABLE_STATUS
+
+
+def _retry_after(exc):
+    response = getattr(exc, 'response', None)
+    value = response.headers.get('retry-after') if response is not None else None
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def _backoff(attempt, exc):
+    """Full jitter: uniform(0, min(max_delay, base * 2**attempt)), at least Retry-After (capped)."""
+    max_delay = _setting('AI_RETRY_MAX_DELAY', 8)
+    delay = random.uniform(0, min(max_delay, _setting('AI_RETRY_BASE_DELAY', 0.5) * 2 ** attempt))
+    retry_after = _retry_after(exc)
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, max_delay))
+    return delay
+
+
+def create_message(client, **kwargs):
+    """client.messages.create behind the circuit breaker, with jittered retries on overload."""
+    max_retries = _setting('AI_MAX_RETRIES', 3)
+    attempt = 0
+    while True:
+        breaker.before_call()
+        try:
+            response = client.messages.create(**kwargs)
+        except Exception as e:
+            if not _is_retryable(e):
+                breaker.record_success()  # the backend answered; the request itself was bad
+                raise
+            breaker.record_failure()
+            metrics.incr('ai.retryable_errors')
+            if attempt >= max_retries:
+                raise
+            time.sleep(_backoff(attempt, e))
+            attempt += 1
+            metrics.incr('ai.retries')
+            continue
+        breaker.record_success()
+        return response
+
+
+def stream_text(client, **kwargs):
+    """
+    Generator over the text deltas of client.messages.stream, behind the same breaker and retries
+    as create_message. Retries only happen before the first delta; returns the final message.
+    """
+    max_retries = _setting('AI_MAX_RETRIES', 3)
+    attempt = 0
+    while True:
+        breaker.before_call()
+        started = False
+        try:
+            with client.messages.stream(**kwargs) as stream:
+                for text in stream.text_stream:
+                    started = True
+                    yield text
+                final = stream.get_final_message()
+        except GeneratorExit:
+            breaker.record_success()  # consumer went away; the backend was answering
+            raise
+        except Exception as e:
+            if not _is_retryable(e):
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            metrics.incr('ai.retryable_errors')
+            if started or attempt >= max_retries:
+                raise
+            time.sleep(_backoff(attempt, e))
+            attempt += 1
+            metrics.incr('ai.retries')
+            continue
+        breaker.record_success()
+        return final
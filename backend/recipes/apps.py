@@ -5,3 +5,14 @@ class RecipesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recipes'
     verbose_name = 'ForkLog Recipes'
+
+    def ready(self):
+        from django.conf import settings
+
+        from . import schema_validation, signals  # noqa: F401
+
+        schema_validation.load_validators()
+
+        if getattr(settings, 'PRELOAD_AI_DEPENDENCIES', False):
+            from .services import preload_heavy_dependencies
+            preload_heavy_dependencies()
@@ -0,0 +1,257 @@
+"""
+Cold storage: compress rarely read JSON once it is older than COLD_STORAGE_AFTER_DAYS.
+
+- Version content: large recipe JSON already lives in ContentBlob rows (blobs.py), so the cold
+  tier compresses blobs that no write has referenced within the threshold. Old versions shrink
+  with them and deduplication is kept; blobs.load_text() decompresses on a cache miss.
+- Meal logs: log_entries of meals that ended before the threshold (full AI chat transcripts)
+  move into Meal.log_archive. MealSerializer reads them back through meal_log_entries().
+
+Payloads are zlib-compressed with a preset dictionary per kind ('recipe', 'meal_log'), trained
+from a sample of existing payloads: JSON keys and values repeat across rows but not within one
+small row, which is where plain zlib gains least. The codec string names the dictionary
+('zlib:<id>'), so retraining never breaks older rows. zstd would compress a little better but
+is not a dependency here; zlib ships with Python.
+"""
+
+import json
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import metrics
+
+KINDS = ('recipe', 'meal_log')
+# zlib uses at most a 32 KiB window, so a longer dictionary would not help
+DICTIONARY_MAX_BYTES = 32 * 1024
+LEVEL = 9
+
+# a JSON string with the bracket or comma before it and the colon after a key, or a number with
+# what follows it; strings are matched whole so the scan never starts inside one
+_TOKEN = re.compile(r'[\[{,]?"(?:[^"\\]|\\.)*":?|-?\d+(?:\.\d+)?[,}\]]')
+TOKEN_MAX_CHARS = 64
+_lock = threading.Lock()
+_dictionaries = {}  # pk -> bytes
+_latest = {}  # kind -> (pk, bytes) or None
+
+
+def _model(name):
+    return apps.get_model('recipes', name)
+
+
+def cutoff(days=None):
+    if days is None:
+        days = getattr(settings, 'COLD_STORAGE_AFTER_DAYS', 180)
+    return timezone.now() - timedelta(days=days)
+
+
+def compact(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+# ---------- dictionaries ----------
+
+
+def train_dictionary(texts, max_bytes=DICTIONARY_MAX_BYTES):
+    """
+    Preset dictionary from sample texts: JSON strings, keys and numbers that occur in more than
+    one sample, the most valuable (count x length) last, since zlib favours nearby matches.
+    """
+    counts = Counter()
+    for text in texts:
+        counts.update({token for token in _TOKEN.findall(text) if len(token) <= TOKEN_MAX_CHARS})
+    scored = sorted(((n * len(token), token) for token, n in counts.items() if n > 1), reverse=True)
+    picked, size = [], 0
+    for _, token in scored:
+        data = token.encode()
+        if size + len(data) > max_bytes:
+            continue
+        picked.append(data)
+        size += len(data)
+    return b''.join(reversed(picked))
+
+
+def _samples(kind, limit):
+    if kind == 'recipe':
+        return list(
+            _model('ContentBlob').objects.filter(codec='').order_by('-touched_at')
+            .values_list('data', flat=True)[:limit]
+        )
+    logs = (
+        _model('Meal').objects.filter(log_archive__isnull=True).exclude(log_entries=[])
+        .order_by('-started_at').values_list('log_entries', flat=True)[:limit]
+    )
+    return [compact(entries) for entries in logs]
+
+
+def train(kind, sample_size=500):
+    """Train and save a new dictionary for kind from recent payloads; None without samples."""
+    texts = _samples(kind, sample_size)
+    data = train_dictionary(texts)
+    if not data:
+        return None
+    entry = _model('CompressionDictionary').objects.create(kind=kind, data=data, sample_count=len(texts))
+    with _lock:
+        _dictionaries[entry.pk] = data
+        _latest[kind] = (entry.pk, data)
+    return entry
+
+
+def latest_dictionary(kind):
+    if kind not in _latest:
+        entry = _model('CompressionDictionary').objects.filter(kind=kind).order_by('-pk').first()
+        with _lock:
+            _latest[kind] = (entry.pk, bytes(entry.data)) if entry else None
+    return _latest[kind]
+
+
+def _dictionary(pk):
+    data = _dictionaries.get(pk)
+    if data is None:
+        data = bytes(_model('CompressionDictionary').objects.values_list('data', flat=True).get(pk=pk))
+        with _lock:
+            _dictionaries[pk] = data
+    return data
+
+
+def reset():
+    """Forget cached dictionaries (tests, after retraining elsewhere)."""
+    with _lock:
+        _dictionaries.clear()
+        _latest.clear()
+
+
+# ---------- codec ----------
+
+
+def compress(text, kind):
+    """(codec, compressed bytes) for text, using the latest dictionary of kind if there is one."""
+    latest = latest_dictionary(kind)
+    if latest:
+        pk, zdict = latest
+        compressor = zlib.compressobj(LEVEL, zlib.DEFLATED, zlib.MAX_WBITS, 9, zlib.Z_DEFAULT_STRATEGY, zdict)
+        return f'zlib:{pk}', compressor.compress(text.encode()) + compressor.flush()
+    return 'zlib', zlib.compress(text.encode(), LEVEL)
+
+
+def decompress(codec, data):
+    """Text for (codec, bytes) written by compress()."""
+    started = time.perf_counter()
+    if codec == 'zlib':
+        raw = zlib.decompress(bytes(data))
+    elif codec.startswith('zlib:'):
+        decompressor = zlib.decompressobj(zlib.MAX_WBITS, _dictionary(int(codec[5:])))
+        raw = decompressor.decompress(bytes(data)) + decompressor.flush()
+    else:
+        raise ValueError(f'unknown codec {codec!r}')
+    metrics.observe_ms('archive.decompress', (time.perf_counter() - started) * 1000)
+    return raw.decode()
+
+
+# ---------- reads ----------
+
+
+def meal_log_entries(meal):
+    """A meal's log entries, from the cold archive when its log was compressed."""
+    if meal.log_archive is None:
+        return meal.log_entries
+    metrics.incr('archive.meal_log.read')
+    return json.loads(decompress(meal.log_codec, meal.log_archive))
+
+
+# ---------- archiving (archive_cold_data) ----------
+
+
+def _stats():
+    return {'items': 0, 'skipped': 0, 'bytes_in': 0, 'bytes_out': 0}
+
+
+def archive_blobs(before, batch_size=200):
+    """Compress plain blobs last touched before `before`, one batch per transaction."""
+    ContentBlob = _model('ContentBlob')
+    stats = _stats()
+    last = ''
+    while True:
+        rows = list(
+            ContentBlob.objects.filter(codec='', touched_at__lt=before, digest__gt=last)
+            .order_by('digest').values_list('digest', 'data')[:batch_size]
+        )
+        if not rows:
+            break
+        with transaction.atomic():
+            for digest, text in rows:
+                codec, packed = compress(text, 'recipe')
+                size = len(text.encode())
+                if len(packed) >= size:
+                    stats['skipped'] += 1
+                    continue
+                # touched_at guard: a write that just referenced the blob keeps it hot
+                if ContentBlob.objects.filter(digest=digest, codec='', touched_at__lt=before).update(
+                    data='', codec=codec, packed=packed,
+                ):
+                    stats['items'] += 1
+                    stats['bytes_in'] += size
+                    stats['bytes_out'] += len(packed)
+        last = rows[-1][0]
+    metrics.incr('archive.recipe.items', stats['items'])
+    return stats
+
+
+def archive_meal_logs(before, batch_size=200):
+    """Move log_entries of meals that ended before `before` into log_archive."""
+    Meal = _model('Meal')
+    stats = _stats()
+    last = 0
+    while True:
+        with transaction.atomic():
+            # read under the lock so a log written meanwhile is never replaced by an older copy
+            rows = list(
+                Meal.objects.select_for_update().filter(ended_at__lt=before, log_archive__isnull=True, pk__gt=last)
+                .exclude(log_entries=[]).order_by('pk').values_list('pk', 'log_entries')[:batch_size]
+            )
+            for pk, entries in rows:
+                text = compact(entries)
+                codec, packed = compress(text, 'meal_log')
+                Meal.objects.filter(pk=pk, log_archive__isnull=True).update(
+                    log_entries=[], log_archive=packed, log_codec=codec,
+                )
+                stats['items'] += 1
+                stats['bytes_in'] += len(text.encode())
+                stats['bytes_out'] += len(packed)
+        if not rows:
+            break
+        last = rows[-1][0]
+    metrics.incr('archive.meal_log.items', stats['items'])
+    return stats
+
+
+def read_latency(sample=200):
+    """Decompression timings over up to `sample` archived payloads of each kind: {kind: {...}}."""
+    sources = {
+        'recipe': _model('ContentBlob').objects.exclude(codec='').values_list('codec', 'packed'),
+        'meal_log': _model('Meal').objects.filter(log_archive__isnull=False).values_list('log_codec', 'log_archive'),
+    }
+    report = {}
+    for kind, qs in sources.items():
+        samples = []
+        for codec, data in qs[:sample]:
+            started = time.perf_counter()
+            decompress(codec, data)
+            samples.append((time.perf_counter() - started) * 1000)
+        if not samples:
+            continue
+        samples.sort()
+        report[kind] = {
+            'count': len(samples),
+            'p50_ms': round(samples[len(samples) // 2], 4),
+            'p99_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 4),
+        }
+    return report
@@ -0,0 +1,81 @@
+"""
+Token authentication with a short-TTL in-process cache of token key -> (user, token).
+
+Deleting a token or saving a user (deactivation, is_staff/is_superuser/username changes) drops
+its entries in the process that made the change (signals.py); other worker processes pick it up
+once TOKEN_AUTH_CACHE_TTL expires. Each request gets its own copy of the cached user, so
+attributes set on request.user never leak into other requests or threads.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from . import metrics
+
+_lock = threading.Lock()
+_entries = OrderedDict()  # key -> (user, token, expires_at)
+
+
+def _ttl():
+    return getattr(settings, 'TOKEN_AUTH_CACHE_TTL', 30)
+
+
+def _max_entries():
+    return getattr(settings, 'TOKEN_AUTH_CACHE_MAX_ENTRIES', 1024)
+
+
+def invalidate_token(key):
+    with _lock:
+        if _entries.pop(key, None) is not None:
+            metrics.incr('token_auth.invalidations')
+
+
+def invalidate_user(user_id):
+    with _lock:
+        stale = [k for k, (user, _token, _exp) in _entries.items() if user.pk == user_id]
+        for k in stale:
+            del _entries[k]
+    if stale:
+        metrics.incr('token_auth.invalidations', len(stale))
+
+
+def clear():
+    with _lock:
+        _entries.clear()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that skips the authtoken_token query for recently seen keys."""
+
+    def authenticate_credentials(self, key):
+        now = time.monotonic()
+        with _lock:
+            entry = _entries.get(key)
+            if entry is not None and entry[2] > now:
+                _entries.move_to_end(key)
+            else:
+                entry = None
+        if entry is not None:
+            user, token, _expires = entry
+            if not user.is_active:
+                raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+            metrics.incr('token_auth.hit')
+            return (copy.copy(user), token)
+
+        metrics.incr('token_auth.miss')
+        user, token = super().authenticate_credentials(key)
+        ttl = _ttl()
+        if ttl > 0:
+            with _lock:
+                _entries[key] = (copy.copy(user), token, now + ttl)
+                _entries.move_to_end(key)
+                while len(_entries) > _max_entries():
+                    _entries.popitem(last=False)
+        return (user, token)
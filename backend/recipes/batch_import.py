@@ -0,0 +1,188 @@
+"""
+Batch webpage import: many URLs per request with bounded parallelism.
+
+- URLs are deduplicated by their cache-normalized form; already parsed URLs are answered from
+  ParsedRecipeCache in one query.
+- Fetch + structured-data extraction run on BATCH_IMPORT_FETCH_WORKERS threads; the CPU heavy
+  docling conversion inside them is handed to docling_pool's worker processes.
+- Model calls run on a thread pool capped at BATCH_IMPORT_AI_CONCURRENCY.
+- Results are yielded per URL as soon as each finishes; the caller decides how to stream them.
+"""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.text import slugify
+
+from . import metrics, services, signals
+from .models import ParsedRecipeCache, Recipe, RecipeVersion
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def dedupe_urls(urls):
+    """[(normalized_url, url)] in first-seen order; blank and duplicate URLs are dropped."""
+    seen = set()
+    unique = []
+    for url in urls:
+        if not isinstance(url, str) or not url.strip():
+            continue
+        url = url.strip()
+        normalized = services._normalize_url_for_cache(url)
+        if normalized in seen:
+            continue
+        seen.add(normalized)
+        unique.append((normalized, url))
+    return unique
+
+
+def _item(url, started, result=None, error=None, source=None):
+    item = {'url': url, 'status': 'error' if error else 'ok'}
+    if error:
+        item['error'] = error
+    else:
+        item['source'] = source
+        item['result'] = result
+    item['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return item
+
+
+def iter_batch_import(urls, language='en', prepare=None, extract=None):
+    """
+    Import urls and yield one dict per unique URL as it completes:
+    {url, status: 'ok'|'error', source: 'cache'|'structured'|'ai', result | error, elapsed_ms}.
+    prepare/extract default to services.prepare_webpage_import / services.extract_recipe_with_ai.
+    """
+    prepare = prepare or services.prepare_webpage_import
+    extract = extract or services.extract_recipe_with_ai
+    started = time.perf_counter()
+    unique = dedupe_urls(urls)
+
+    cached = dict(
+        ParsedRecipeCache.objects.filter(normalized_url__in=[n for n, _ in unique])
+        .values_list('normalized_url', 'result')
+    )
+    pending = []
+    for normalized, url in unique:
+        if normalized in cached:
+            metrics.incr('import.batch.cache_hits')
+            yield _item(url, started, result=dict(cached[normalized]), source='cache')
+        else:
+            pending.append((normalized, url))
+    if not pending:
+        return
+
+    prepare_pool = ThreadPoolExecutor(
+        max_workers=_setting('BATCH_IMPORT_FETCH_WORKERS', 8), thread_name_prefix='batch-import-fetch'
+    )
+    ai_pool = ThreadPoolExecutor(
+        max_workers=_setting('BATCH_IMPORT_AI_CONCURRENCY', 4), thread_name_prefix='batch-import-ai'
+    )
+    futures = {}
+    try:
+        for normalized, url in pending:
+            futures[prepare_pool.submit(prepare, url, language)] = ('prepare', normalized, url)
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, normalized, url = futures.pop(future)
+                try:
+                    value = future.result()
+                except Exception as e:
+                    metrics.incr('import.batch.errors')
+                    yield _item(url, started, error=str(e) or type(e).__name__)
+                    continue
+                if stage == 'prepare':
+                    kind, payload = value
+                    if kind == 'content':
+                        futures[ai_pool.submit(extract, url, payload, language)] = ('ai', normalized, url)
+                        continue
+                    if kind == 'error':
+                        metrics.incr('import.batch.errors')
+                        yield _item(url, started, error=payload)
+                        continue
+                    result, source = payload, 'structured'
+                else:
+                    result, err = value
+                    if err:
+                        metrics.incr('import.batch.errors')
+                        yield _item(url, started, error=err)
+                        continue
+                    source = 'ai'
+                services._store_parsed_recipe(normalized, url, result)
+                metrics.incr(f'import.batch.{source}')
+                yield _item(url, started, result=result, source=source)
+    finally:
+        for future in futures:  # client went away mid-batch
+            future.cancel()
+        prepare_pool.shutdown(wait=False, cancel_futures=True)
+        ai_pool.shutdown(wait=False, cancel_futures=True)
+        metrics.observe_ms('import.batch.latency', (time.perf_counter() - started) * 1000)
+
+
+def _unique_slugs(owner, names):
+    """Slugs for names that avoid the owner's existing slugs and each other (same scheme as Recipe.save)."""
+    taken = set(Recipe.objects.filter(owner=owner).values_list('slug', flat=True))
+    slugs = []
+    for name in names:
+        base = slugify(name) or 'recipe'
+        slug, n = base, 1
+        while slug in taken:
+            slug = f'{base}-{n}'
+            n += 1
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+def create_recipes(owner, items):
+    """
+    Bulk-create one Recipe and an initial RecipeVersion per successful item
+    ({url, result}); returns [{url, slug, recipe_id, version_id}] in item order.
+    bulk_create skips save() and signals, so slugs are picked here and the rest of the signal work
+    (nutrition, discovery, thumbnails, change log) runs through signals' shared batch functions.
+    """
+    if not items:
+        return []
+    names = [(it['result'].get('name') or 'Imported Recipe')[:255] for it in items]
+    with transaction.atomic():
+        recipes = Recipe.objects.bulk_create([
+            Recipe(owner=owner, name=name, slug=slug)
+            for name, slug in zip(names, _unique_slugs(owner, names))
+        ])
+        versions = []
+        for recipe, it in zip(recipes, items):
+            data = it['result']
+            metadata = data.get('metadata') or {}
+            title = metadata.get('title') or data.get('title') or recipe.name
+            picture = data.get('main_picture') or ''
+            versions.append(RecipeVersion(
+                recipe=recipe,
+                owner=owner,
+                version_number=1,
+                version_semver='1.0.0',
+                title=title[:255],
+                main_picture=picture if len(picture) <= 2048 else '',
+                metadata={**metadata, 'title': title},
+                ingredients=data.get('ingredients') or [],
+                steps=data.get('steps') or [],
+                equipment=data.get('equipment') or [],
+                notes_array=data.get('notes') if isinstance(data.get('notes'), list) else [],
+                nutrition=data.get('nutrition'),
+                tags=data.get('tags') or [],
+                commit_message='Initial version',
+                message='Initial version',
+            ))
+        signals.before_versions_created(versions)
+        versions = RecipeVersion.objects.bulk_create(versions)
+        signals.after_recipes_created(recipes)
+        signals.after_versions_written(versions)
+    metrics.incr('import.batch.created', len(recipes))
+    return [
+        {'url': it['url'], 'slug': r.slug, 'recipe_id': r.pk, 'version_id': v.pk}
+        for it, r, v in zip(items, recipes, versions)
+    ]
@@ -0,0 +1,325 @@
+"""
+Content-addressed storage for large recipe version JSON (ingredients, steps, equipment,
+notes_array, nutrition).
+
+A BlobJSONField column holds either inline JSON (small values, and rows written before the
+field existed) or '@' + the sha256 of the value's canonical JSON, pointing at a ContentBlob row.
+Identical content is stored once however many versions or forked recipes use it; a version
+that diverges only adds blobs for the fields that changed. Columns and blobs hold the JSON in
+the key order it was written in (the API returns objects as clients sent them); only the hash
+is taken over the sorted form, so the same content written with another key order still
+shares the blob (and reads back in the order of whoever stored it first).
+
+- Reads go through an in-process LRU of blob texts, then Django's cache, then the database.
+  Blob texts never change, so none of these layers needs invalidation.
+- Writes upsert the blob and bump its touched_at. Refcounts are recounted by scan() (used by
+  the backfill_blobs and gc_blobs commands) rather than per write: queryset.update() and
+  bulk_create() don't run model hooks, so a per-write counter would drift.
+- collect_garbage() deletes blobs nothing references and nobody touched within the grace period.
+- Blobs untouched for COLD_STORAGE_AFTER_DAYS may be compressed in place (archive.py).
+"""
+
+import hashlib
+import json
+import threading
+from collections import Counter, OrderedDict
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count, Sum, TextField, Value
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from . import archive, metrics
+
+REF_PREFIX = '@'
+CACHE_PREFIX = 'forklog:blob'
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _cache():
+    return caches['default']
+
+
+def _model():
+    return apps.get_model('recipes', 'ContentBlob')
+
+
+class LRU:
+    """Thread-safe LRU of blob texts bounded by total UTF-8 bytes."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            text = self._items.get(key)
+            if text is not None:
+                self._items.move_to_end(key)
+            return text
+
+    def put(self, key, text):
+        size = len(text.encode())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return
+            self._items[key] = text
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, old = self._items.popitem(last=False)
+                self.bytes -= len(old.encode())
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.bytes = 0
+
+    def __len__(self):
+        return len(self._items)
+
+
+_lru = None
+_lru_lock = threading.Lock()
+
+
+def lru():
+    """The process-wide blob LRU (BLOB_LRU_MAX_BYTES)."""
+    global _lru
+    if _lru is None:
+        with _lru_lock:
+            if _lru is None:
+                _lru = LRU(_setting('BLOB_LRU_MAX_BYTES', 32 * 1024 * 1024))
+    return _lru
+
+
+def compact(value):
+    """Stored JSON text: keys in their original order, no whitespace, non-ASCII kept."""
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+def canonical(value):
+    """Canonical JSON text (compact() with sorted keys): what blob digests are taken over."""
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+
+
+def digest(text):
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def is_ref(text):
+    return isinstance(text, str) and text.startswith(REF_PREFIX)
+
+
+def _inline(text):
+    return len(text.encode()) < _setting('BLOB_INLINE_MAX_BYTES', 128)
+
+
+def column_value(value):
+    """
+    Column text for value without storing anything: inline JSON, or a ref for large values.
+    Used for lookups; store() is the write path.
+    """
+    text = compact(value)
+    return text if _inline(text) else REF_PREFIX + digest(canonical(value))
+
+
+def _remember(key, text):
+    lru().put(key, text)
+    _cache().set(f'{CACHE_PREFIX}:{key}', text, _setting('BLOB_CACHE_TIMEOUT', 86400))
+
+
+def store(value):
+    """Column text for value, upserting its blob first when it is stored by reference."""
+    text = compact(value)
+    if _inline(text):
+        return text
+    key = digest(canonical(value))
+    ContentBlob = _model()
+    ContentBlob.objects.bulk_create(
+        [ContentBlob(digest=key, data=text, size=len(text.encode()), touched_at=timezone.now())],
+        update_conflicts=True, unique_fields=['digest'], update_fields=['touched_at'],
+    )
+    _remember(key, text)
+    return REF_PREFIX + key
+
+
+def load_text(key):
+    """JSON text of blob `key` (LRU, cache, then database)."""
+    text = lru().get(key)
+    if text is not None:
+        metrics.incr('blobs.lru.hit')
+        return text
+    text = _cache().get(f'{CACHE_PREFIX}:{key}')
+    if text is not None:
+        metrics.incr('blobs.cache.hit')
+        lru().put(key, text)
+        return text
+    metrics.incr('blobs.cache.miss')
+    row = _model().objects.filter(digest=key).values_list('data', 'codec', 'packed').first()
+    if row is None:
+        raise LookupError(f'missing content blob {key}')
+    text, codec, packed = row
+    if codec:
+        text = archive.decompress(codec, packed)
+    _remember(key, text)
+    return text
+
+
+def from_column(text):
+    """Python value for column text (a ref or inline JSON); a fresh object on every call."""
+    if text is None:
+        return None
+    if is_ref(text):
+        text = load_text(text[len(REF_PREFIX):])
+    return json.loads(text)
+
+
+def touch(texts):
+    """Bump touched_at of the blobs these column texts reference (copying a ref is a new use)."""
+    keys = {text[len(REF_PREFIX):] for text in texts if is_ref(text)}
+    if keys:
+        _model().objects.filter(digest__in=keys).update(touched_at=timezone.now())
+
+
+def raw_columns(model, pk):
+    """{attname: column text} of one row's blob fields, refs left unresolved; None if no such row."""
+    fields = dict(blob_fields())[model]
+    raw = {f'_raw_{f.attname}': Cast(f.attname, output_field=TextField()) for f in fields}
+    row = model.objects.filter(pk=pk).annotate(**raw).values_list(*raw).first()
+    return dict(zip((f.attname for f in fields), row)) if row else None
+
+
+# ---------- maintenance (backfill_blobs, gc_blobs) ----------
+
+
+def blob_fields():
+    """[(model, [BlobJSONField, ...])] for every model with blob-backed columns."""
+    from .models import BlobJSONField
+
+    result = []
+    for model in apps.get_app_config('recipes').get_models():
+        fields = [f for f in model._meta.concrete_fields if isinstance(f, BlobJSONField)]
+        if fields:
+            result.append((model, fields))
+    return result
+
+
+def _raw_batches(model, fields, batch_size):
+    """(pk, raw column texts...) rows in pk order, without resolving refs."""
+    raw = {f'_raw_{f.attname}': Cast(f.attname, output_field=TextField()) for f in fields}
+    last_pk = None
+    while True:
+        qs = model.objects.order_by('pk')
+        if last_pk is not None:
+            qs = qs.filter(pk__gt=last_pk)
+        rows = list(qs.annotate(**raw).values_list('pk', *raw)[:batch_size])
+        if not rows:
+            return
+        yield rows
+        last_pk = rows[-1][0]
+
+
+def backfill(batch_size=500):
+    """
+    Move large inline values into blobs, one batch of rows per transaction. Rows are updated with
+    queryset.update(), so updated_at (and HTTP validators built on it) are left alone.
+    Returns {'rows', 'converted'}.
+    """
+    rows_seen = converted = 0
+    for model, fields in blob_fields():
+        for rows in _raw_batches(model, fields, batch_size):
+            with transaction.atomic():
+                for pk, *raws in rows:
+                    changes = {}
+                    for field, raw in zip(fields, raws):
+                        if raw is None or is_ref(raw):
+                            continue
+                        column = store(json.loads(raw))
+                        if is_ref(column):
+                            changes[field.attname] = Value(column)
+                    if changes:
+                        model.objects.filter(pk=pk).update(**changes)
+                        converted += len(changes)
+            rows_seen += len(rows)
+    metrics.incr('blobs.backfill.converted', converted)
+    return {'rows': rows_seen, 'converted': converted}
+
+
+def scan(batch_size=1000):
+    """
+    Count references per blob over every blob column, store them in ContentBlob.refcount, and
+    return a space report: logical bytes (every value at full size) vs stored bytes (column
+    texts plus each blob once).
+    """
+    ContentBlob = _model()
+    refs = Counter()
+    rows = values = inline_bytes = ref_bytes = 0
+    for model, fields in blob_fields():
+        for batch in _raw_batches(model, fields, batch_size):
+            rows += len(batch)
+            for _, *raws in batch:
+                for raw in raws:
+                    if raw is None:
+                        continue
+                    values += 1
+                    if is_ref(raw):
+                        refs[raw[len(REF_PREFIX):]] += 1
+                        ref_bytes += len(raw)
+                    else:
+                        inline_bytes += len(raw.encode())
+
+    sizes = dict(ContentBlob.objects.values_list('digest', 'size'))
+    with transaction.atomic():
+        ContentBlob.objects.exclude(refcount=0).update(refcount=0)
+        by_count = {}
+        for key, count in refs.items():
+            if key in sizes:
+                by_count.setdefault(count, []).append(key)
+        for count, keys in by_count.items():
+            for i in range(0, len(keys), 500):
+                ContentBlob.objects.filter(digest__in=keys[i:i + 500]).update(refcount=count)
+
+    blob_bytes = sum(sizes.values())
+    logical = inline_bytes + sum(sizes.get(key, 0) * count for key, count in refs.items())
+    stored = inline_bytes + ref_bytes + blob_bytes
+    return {
+        'rows': rows,
+        'values': values,
+        'refs': sum(refs.values()),
+        'blobs': len(sizes),
+        'unreferenced_blobs': sum(1 for key in sizes if key not in refs),
+        'missing_blobs': sum(1 for key in refs if key not in sizes),
+        'logical_bytes': logical,
+        'stored_bytes': stored,
+        'saved_bytes': logical - stored,
+        'dedup_ratio': round(logical / stored, 2) if stored else 1.0,
+    }
+
+
+def collect_garbage(grace_seconds=None, dry_run=False):
+    """
+    Delete blobs with refcount 0 (as of the last scan) not touched for grace_seconds
+    (BLOB_GC_GRACE_SECONDS). Run scan() first. Returns {'deleted', 'bytes'}.
+    """
+    if grace_seconds is None:
+        grace_seconds = _setting('BLOB_GC_GRACE_SECONDS', 3600)
+    cutoff = timezone.now() - timedelta(seconds=grace_seconds)
+    qs = _model().objects.filter(refcount=0, touched_at__lt=cutoff)
+    found = qs.aggregate(n=Count('digest'), size=Sum('size'))
+    deleted, freed = found['n'], found['size'] or 0
+    if not dry_run and deleted:
+        qs.delete()
+        metrics.incr('blobs.gc.deleted', deleted)
+    return {'deleted': deleted, 'bytes': freed}
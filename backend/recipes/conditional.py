@@ -0,0 +1,122 @@
+"""
+HTTP conditional GET (ETag / Last-Modified) for recipe read endpoints.
+Validators come from one narrow query each, so a 304 never loads JSON fields or runs a serializer.
+"""
+
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from .models import Recipe, RecipeVersion
+
+
+def make_etag(*parts):
+    """Strong ETag (quoted) from validator parts."""
+    raw = '|'.join('' if p is None else str(p) for p in parts)
+    return '"%s"' % hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def _latest(*values):
+    values = [v for v in values if v is not None]
+    return max(values) if values else None
+
+
+def recipe_detail_validators(user, slug):
+    """(etag, last_modified) for one recipe with its versions; None if it does not exist."""
+    row = (
+        Recipe.objects.filter(owner=user, slug=slug)
+        .annotate(
+            versions_updated=Max('versions__updated_at'),
+            versions_count=Count('versions'),
+            versions_max_id=Max('versions__id'),
+        )
+        .values('pk', 'updated_at', 'versions_updated', 'versions_count', 'versions_max_id')
+        .first()
+    )
+    if not row:
+        return None
+    last_modified = _latest(row['updated_at'], row['versions_updated'])
+    etag = make_etag(
+        'recipe', row['pk'], row['updated_at'].isoformat(),
+        row['versions_count'], row['versions_max_id'],
+        row['versions_updated'].isoformat() if row['versions_updated'] else None,
+    )
+    return etag, last_modified
+
+
+def recipe_version_validators(user, slug, pk):
+    """(etag, last_modified) for a single version; None if it does not exist."""
+    row = (
+        RecipeVersion.objects.filter(recipe__slug=slug, recipe__owner=user, pk=pk)
+        .values('pk', 'created_at', 'updated_at')
+        .first()
+    )
+    if not row:
+        return None
+    etag = make_etag('version', row['pk'], row['created_at'].isoformat(), row['updated_at'].isoformat())
+    return etag, row['updated_at']
+
+
+def recipe_list_validators(user):
+    """Aggregate (etag, last_modified) over all of a user's recipes and their versions."""
+    agg = Recipe.objects.filter(owner=user).aggregate(
+        updated=Max('updated_at'),
+        count=Count('id', distinct=True),
+        versions_updated=Max('versions__updated_at'),
+        versions_count=Count('versions'),
+    )
+    last_modified = _latest(agg['updated'], agg['versions_updated'])
+    etag = make_etag(
+        'recipes', user.pk, agg['count'], agg['versions_count'],
+        agg['updated'].isoformat() if agg['updated'] else None,
+        agg['versions_updated'].isoformat() if agg['versions_updated'] else None,
+    )
+    return etag, last_modified
+
+
+def recipe_version_list_validators(user, slug):
+    """Aggregate (etag, last_modified) over the versions of one recipe."""
+    agg = RecipeVersion.objects.filter(recipe__slug=slug, recipe__owner=user).aggregate(
+        updated=Max('updated_at'),
+        count=Count('id'),
+        max_id=Max('id'),
+    )
+    etag = make_etag(
+        'versions', user.pk, slug, agg['count'], agg['max_id'],
+        agg['updated'].isoformat() if agg['updated'] else None,
+    )
+    return etag, agg['updated']
+
+
+class ConditionalGetMixin:
+    """
+    Answer GET/HEAD with 304 when If-None-Match / If-Modified-Since match, without
+    calling the serializer. Views implement get_validators() -> (etag, last_modified) or None.
+    """
+
+    def get_validators(self):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        validators = self.get_validators() if request.user.is_authenticated else None
+        if validators is None:
+            return super().get(request, *args, **kwargs)
+        etag, last_modified = validators
+        self.validator_etag = etag  # response_cache.CachedResponseMixin keys entries by it
+        last_modified_ts = int(last_modified.timestamp()) if last_modified else None
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified_ts)
+        if not_modified is not None:
+            response = not_modified
+        else:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        if last_modified_ts is not None:
+            response['Last-Modified'] = http_date(last_modified_ts)
+        # Per-user content: browsers may keep it but must revalidate; shared caches must not.
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ['Authorization', 'Cookie'])
+        return response
@@ -0,0 +1,246 @@
+"""
+Public recipe discovery backed by the denormalized PublicRecipe / PublicRecipeTag tables.
+
+- sync_recipes(ids) re-derives each recipe's entry from its latest public version (or drops the
+  entry when there is none), including the meal rating summary. signals.py calls it on Recipe and
+  RecipeVersion writes (bulk writers go through signals.after_versions_written).
+- feed() filters on indexed columns (tag rows, cuisine_key, course, total_time_minutes) and pages
+  with a keyset cursor over (published_at, id), so deep pages cost the same as the first.
+- Rendered pages are the same for every user and are cached under a generation read from the
+  table itself (latest synced_at and the entry count), so a change made by any process shows up
+  on the next request without a shared cache. Writes that skip save() (rating and thumbnail
+  refreshes) bump synced_at through touch().
+"""
+
+import base64
+import hashlib
+from datetime import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, Max, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from . import images, metrics
+from .models import Meal, PublicRecipe, PublicRecipeTag, RecipeVersion
+
+KEY_PREFIX = 'forklog:discovery'
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 50
+MAX_TAG_LENGTH = 64
+
+
+class FeedQueryError(ValueError):
+    """Bad feed parameters (cursor, limit, max_time)."""
+
+
+def _int_or_none(value):
+    if isinstance(value, bool):
+        return None
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        return None
+    return number if number >= 0 else None
+
+
+def _tag_key(tag):
+    return tag.strip().lower()[:MAX_TAG_LENGTH] if isinstance(tag, str) else ''
+
+
+# ---------- sync ----------
+
+
+def _entry_fields(version, ratings):
+    meta = version.metadata if isinstance(version.metadata, dict) else {}
+    cuisine = meta.get('cuisine') if isinstance(meta.get('cuisine'), str) else ''
+    course = meta.get('course') if isinstance(meta.get('course'), str) else ''
+    rating = meta.get('rating')
+    avg, count = ratings.get(version.recipe_id, (None, 0))
+    tags = [t for t in (version.tags or []) if isinstance(t, str) and t.strip()]
+    return {
+        'version': version,
+        'owner_username': version.recipe.owner.username if version.recipe.owner_id else '',
+        'slug': version.recipe.slug,
+        'title': (meta.get('title') or version.title or version.recipe.name or '')[:255],
+        'description': (meta.get('description') if isinstance(meta.get('description'), str) else '')[:500],
+        'main_picture': version.main_picture or '',
+        'language': (meta.get('language') if isinstance(meta.get('language'), str) else '')[:8],
+        'cuisine': cuisine[:64],
+        'cuisine_key': cuisine.strip().lower()[:64],
+        'course': course.strip().lower()[:16],
+        'tags': tags,
+        'prep_time_minutes': _int_or_none(meta.get('prep_time_minutes')),
+        'cook_time_minutes': _int_or_none(meta.get('cook_time_minutes')),
+        'total_time_minutes': _int_or_none(meta.get('total_time_minutes')),
+        'servings': _int_or_none(meta.get('servings')),
+        'difficulty': (meta.get('difficulty') if isinstance(meta.get('difficulty'), str) else '')[:16],
+        'rating': float(rating) if isinstance(rating, (int, float)) and not isinstance(rating, bool) else None,
+        'meal_rating_avg': round(avg, 2) if avg is not None else None,
+        'meal_rating_count': count,
+        'published_at': version.created_at,
+    }
+
+
+def _meal_ratings(recipe_ids):
+    rows = (
+        Meal.objects.filter(recipe_version__recipe_id__in=recipe_ids, rating__isnull=False)
+        .values('recipe_version__recipe_id')
+        .annotate(avg=Avg('rating'), n=Count('id'))
+    )
+    return {row['recipe_version__recipe_id']: (row['avg'], row['n']) for row in rows}
+
+
+def sync_recipes(recipe_ids):
+    """Bring the discovery entries of these recipes in line with their latest public versions."""
+    ids = {pk for pk in recipe_ids if pk is not None}
+    if not ids:
+        return
+    latest_public = (
+        RecipeVersion.objects.filter(recipe_id=OuterRef('recipe_id'), is_public=True)
+        .order_by('-version_number')
+        .values('pk')[:1]
+    )
+    versions = list(
+        RecipeVersion.objects.filter(recipe_id__in=ids, is_public=True, pk=Subquery(latest_public))
+        .select_related('recipe__owner')
+        .only(
+            'recipe_id', 'title', 'main_picture', 'metadata', 'tags', 'created_at',
+            'recipe__slug', 'recipe__name', 'recipe__owner_id', 'recipe__owner__username',
+        )
+    )
+    ratings = _meal_ratings([v.recipe_id for v in versions]) if versions else {}
+    with transaction.atomic():
+        PublicRecipe.objects.filter(recipe_id__in=ids - {v.recipe_id for v in versions}).delete()
+        for version in versions:
+            fields = _entry_fields(version, ratings)
+            entry, _ = PublicRecipe.objects.update_or_create(recipe_id=version.recipe_id, defaults=fields)
+            PublicRecipeTag.objects.filter(entry=entry).delete()
+            PublicRecipeTag.objects.bulk_create(
+                [PublicRecipeTag(entry=entry, tag=tag) for tag in sorted({_tag_key(t) for t in fields['tags']} - {''})]
+            )
+    metrics.incr('discovery.synced', len(ids))
+
+
+def touch(**lookup):
+    """Bump synced_at of the matching entries, so cached feed pages showing them go stale."""
+    return PublicRecipe.objects.filter(**lookup).update(synced_at=timezone.now())
+
+
+def sync_recipe(recipe_id):
+    sync_recipes([recipe_id])
+
+
+def refresh_ratings(recipe_version_id):
+    """Update the meal rating summary of the entry owning this version, if the recipe is listed."""
+    entry = PublicRecipe.objects.filter(recipe__versions=recipe_version_id).only('pk', 'recipe_id').first()
+    if entry is None:
+        return
+    avg, count = _meal_ratings([entry.recipe_id]).get(entry.recipe_id, (None, 0))
+    PublicRecipe.objects.filter(pk=entry.pk).exclude(
+        meal_rating_avg=round(avg, 2) if avg is not None else None, meal_rating_count=count,
+    ).update(
+        meal_rating_avg=round(avg, 2) if avg is not None else None, meal_rating_count=count,
+        synced_at=timezone.now(),
+    )
+
+
+# ---------- feed ----------
+
+
+def encode_cursor(entry):
+    raw = f'{entry.published_at.isoformat()}|{entry.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        stamp, pk = raw.rsplit('|', 1)
+        return datetime.fromisoformat(stamp), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise FeedQueryError('invalid cursor')
+
+
+def entry_to_dict(entry, thumbnails=None):
+    if thumbnails is None:
+        thumbnails = images.thumbnail_map([entry.main_picture])
+    return {
+        'id': entry.pk,
+        'recipe_uuid': str(entry.recipe.uuid),
+        'version_id': entry.version_id,
+        'owner_username': entry.owner_username,
+        'slug': entry.slug,
+        'title': entry.title,
+        'description': entry.description,
+        'main_picture': entry.main_picture,
+        'main_picture_thumbnails': thumbnails.get(entry.main_picture),
+        'language': entry.language,
+        'cuisine': entry.cuisine,
+        'course': entry.course,
+        'tags': entry.tags,
+        'prep_time_minutes': entry.prep_time_minutes,
+        'cook_time_minutes': entry.cook_time_minutes,
+        'total_time_minutes': entry.total_time_minutes,
+        'servings': entry.servings,
+        'difficulty': entry.difficulty,
+        'rating': entry.rating,
+        'meal_rating': {'average': entry.meal_rating_avg, 'count': entry.meal_rating_count},
+        'published_at': entry.published_at.isoformat(),
+    }
+
+
+def feed(tags=(), cuisine=None, course=None, max_time=None, q=None, cursor=None, limit=None):
+    """
+    One feed page, newest first: {'results': [...], 'next_cursor': str | None}.
+    Multiple tags must all match. Raises FeedQueryError on bad cursor/limit/max_time.
+    """
+    try:
+        limit = min(MAX_PAGE_SIZE, max(1, int(limit))) if limit not in (None, '') else DEFAULT_PAGE_SIZE
+        max_time = int(max_time) if max_time not in (None, '') else None
+    except (TypeError, ValueError):
+        raise FeedQueryError('limit and max_time must be integers')
+    qs = PublicRecipe.objects.select_related('recipe').only(
+        *[f.name for f in PublicRecipe._meta.concrete_fields if f.name not in ('recipe', 'synced_at')],
+        'recipe__uuid',
+    )
+    for tag in {_tag_key(t) for t in tags} - {''}:
+        qs = qs.filter(pk__in=PublicRecipeTag.objects.filter(tag=tag).values('entry_id'))
+    if cuisine:
+        qs = qs.filter(cuisine_key=cuisine.strip().lower())
+    if course:
+        qs = qs.filter(course=course.strip().lower())
+    if max_time is not None:
+        qs = qs.filter(total_time_minutes__lte=max_time)
+    if q:
+        qs = qs.filter(title__icontains=q.strip())
+    if cursor:
+        published_at, pk = decode_cursor(cursor)
+        qs = qs.filter(Q(published_at__lt=published_at) | Q(published_at=published_at, pk__lt=pk))
+    rows = list(qs.order_by('-published_at', '-id')[:limit + 1])
+    page, more = rows[:limit], len(rows) > limit
+    thumbnails = images.thumbnail_map([e.main_picture for e in page])
+    return {
+        'results': [entry_to_dict(e, thumbnails) for e in page],
+        'next_cursor': encode_cursor(page[-1]) if more and page else None,
+    }
+
+
+def generation():
+    """
+    Feed cache generation: changes whenever an entry is written (synced_at) or deleted (count),
+    whichever process did it. One indexed aggregate query.
+    """
+    row = PublicRecipe.objects.aggregate(last=Max('synced_at'), n=Count('id'))
+    return f"{row['last'].timestamp() if row['last'] else 0}-{row['n']}"
+
+
+def page_cache_key(params):
+    """Response cache key for a feed page: current generation plus the sorted query parameters."""
+    raw = '&'.join(f'{k}={v}' for k, v in sorted(params))
+    return f'{KEY_PREFIX}:page:{generation()}:{hashlib.sha1(raw.encode()).hexdigest()}'
+
+
+def max_age():
+    """Cache-Control max-age for feed responses (browsers and shared caches)."""
+    return getattr(settings, 'DISCOVERY_MAX_AGE', 60)
@@ -0,0 +1,280 @@
+"""
+Dedicated process pool for docling HTML -> Markdown conversion.
+
+docling is CPU heavy, holds large models in memory and can hang or balloon on pathological pages,
+so conversions run in DOCLING_WORKERS spawned processes instead of the web worker:
+- each worker builds one DocumentConverter and reuses it for every task
+- DOCLING_TASK_TIMEOUT: the worker aborts its own task via SIGALRM. The caller's clock starts
+  when a worker reports the task started (time waiting in the queue behind other conversions
+  does not count); only if that running task is not back within a grace period is the pool
+  torn down and replaced. Tasks that had not started yet are resubmitted to the new pool once.
+- DOCLING_WORKER_MEMORY_MB: address-space cap per worker (RLIMIT_AS), so a runaway page raises
+  MemoryError in the worker instead of pushing the host into swap
+- DOCLING_MAX_TASKS_PER_WORKER: workers are replaced after that many tasks to return leaked memory
+
+DOCLING_WORKERS = 0 converts in the calling process (no isolation, no timeout).
+Nothing here touches Django models; worker processes never configure Django.
+"""
+
+import itertools
+import multiprocessing
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from . import metrics
+
+MAX_MARKDOWN_CHARS = 50000
+TIMEOUT_GRACE_SECONDS = 5
+
+_pool = None
+_pool_tasks = 0
+_pool_lock = threading.Lock()
+
+# task id -> Event set when a worker starts it (read from _started_queue by a listener thread)
+_started = {}
+_started_lock = threading.Lock()
+_started_queue = None
+_task_ids = itertools.count(1)
+
+# per worker process
+_converter = None
+_task_timeout = 0
+_worker_started_queue = None
+
+
+class ConversionError(Exception):
+    """docling could not convert the page (error, timeout, memory cap or crashed worker)."""
+
+
+def _settings():
+    from django.conf import settings
+
+    return (
+        getattr(settings, 'DOCLING_WORKERS', 2),
+        getattr(settings, 'DOCLING_TASK_TIMEOUT', 60),
+        getattr(settings, 'DOCLING_WORKER_MEMORY_MB', 2048),
+        getattr(settings, 'DOCLING_MAX_TASKS_PER_WORKER', 50),
+    )
+
+
+# ---------- worker side ----------
+
+
+def _get_converter():
+    global _converter
+    if _converter is None:
+        from docling.document_converter import DocumentConverter
+
+        _converter = DocumentConverter()
+    return _converter
+
+
+def _on_alarm(signum, frame):
+    raise TimeoutError(f'docling conversion exceeded {_task_timeout}s')
+
+
+def _init_worker(memory_mb, task_timeout, started_queue=None):
+    global _task_timeout, _worker_started_queue
+    _task_timeout = task_timeout
+    _worker_started_queue = started_queue
+    if memory_mb:
+        try:
+            import resource
+
+            limit = memory_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ImportError, ValueError, OSError):
+            pass  # not available on this platform; the timeout still applies
+    if task_timeout:
+        import signal
+
+        signal.signal(signal.SIGALRM, _on_alarm)
+    try:
+        _get_converter()
+    except Exception:
+        pass  # surfaces on the first task instead of breaking the pool
+
+
+def html_to_markdown(raw):
+    """Convert HTML bytes to Markdown (truncated to MAX_MARKDOWN_CHARS). Runs in a worker or inline."""
+    from io import BytesIO
+
+    from docling.datamodel.base_models import DocumentStream
+
+    alarm = bool(_task_timeout)  # only set in pool workers
+    if alarm:
+        import signal
+
+        signal.setitimer(signal.ITIMER_REAL, _task_timeout)
+    try:
+        result = _get_converter().convert(source=DocumentStream(name='page.html', stream=BytesIO(raw)))
+        return result.document.export_to_markdown()[:MAX_MARKDOWN_CHARS].strip()
+    finally:
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def _run_task(task_id, raw):
+    """Worker entry point: report the start (so the caller's clock starts now), then convert."""
+    if _worker_started_queue is not None:
+        _worker_started_queue.put(task_id)
+    return html_to_markdown(raw)
+
+
+# ---------- caller side ----------
+
+
+def _listen(queue):
+    while True:
+        task_id = queue.get()
+        with _started_lock:
+            event = _started.get(task_id)
+        if event is not None:
+            event.set()
+
+
+def _get_started_queue():
+    """Queue workers report task starts on; one listener thread per process drains it."""
+    global _started_queue
+    if _started_queue is None:
+        queue = multiprocessing.get_context('spawn').SimpleQueue()
+        threading.Thread(target=_listen, args=(queue,), name='docling-started', daemon=True).start()
+        _started_queue = queue
+    return _started_queue
+
+
+def _new_pool(workers, task_timeout, memory_mb, max_tasks):
+    kwargs = {}
+    if max_tasks and sys.version_info >= (3, 11):
+        kwargs['max_tasks_per_child'] = max_tasks
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        # spawn: forking a threaded web server process is unsafe (and required for max_tasks_per_child)
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker,
+        initargs=(memory_mb, task_timeout, _get_started_queue()),
+        **kwargs,
+    )
+
+
+def _get_pool():
+    """Shared pool; before Python 3.11 the whole pool is replaced every workers * max_tasks tasks."""
+    global _pool, _pool_tasks
+    workers, task_timeout, memory_mb, max_tasks = _settings()
+    with _pool_lock:
+        if _pool is not None and max_tasks and sys.version_info < (3, 11) and _pool_tasks >= workers * max_tasks:
+            _pool.shutdown(wait=False)
+            _pool = None
+            metrics.incr('docling.pool.recycled')
+        if _pool is None:
+            _pool = _new_pool(workers, task_timeout, memory_mb, max_tasks)
+            _pool_tasks = 0
+        _pool_tasks += 1
+        return _pool
+
+
+def _discard_pool(pool, kill=False):
+    """Replace pool (if still current); kill=True terminates workers stuck past the timeout."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    if kill:
+        for process in list((getattr(pool, '_processes', None) or {}).values()):
+            process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _noop():
+    return None
+
+
+def warm():
+    """Start the workers now (each loads docling in its initializer) instead of on the first import."""
+    workers = _settings()[0]
+    if workers > 0:
+        pool = _get_pool()
+        for _ in range(workers):
+            pool.submit(_noop)
+
+
+def shutdown():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _await(pool, task_id, started, raw, task_timeout):
+    """
+    Result of one submitted task. Waits without a limit while the task is queued, then
+    task_timeout + TIMEOUT_GRACE_SECONDS from the moment a worker starts it.
+    """
+    future = pool.submit(_run_task, task_id, raw)
+    deadline = None
+    while True:
+        if deadline is None and started.is_set() and task_timeout:
+            deadline = time.monotonic() + task_timeout + TIMEOUT_GRACE_SECONDS
+        wait = 0.25 if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            return future.result(timeout=wait if task_timeout else None)
+        except TimeoutError:
+            if future.done():
+                raise  # the worker's own alarm
+            if deadline is not None and time.monotonic() >= deadline:
+                # this task's worker ignored its alarm (stuck in native code): kill and replace the pool
+                metrics.incr('docling.pool.timeouts')
+                _discard_pool(pool, kill=True)
+                raise ConversionError(f'docling conversion exceeded {task_timeout}s')
+
+
+def convert_html(raw):
+    """
+    Markdown for HTML bytes via the worker pool (or inline when DOCLING_WORKERS is 0).
+    Raises ConversionError on any failure.
+    """
+    workers, task_timeout, _memory_mb, _max_tasks = _settings()
+    start = time.perf_counter()
+    try:
+        if workers <= 0:
+            try:
+                return html_to_markdown(raw)
+            except Exception as e:
+                raise ConversionError(str(e) or type(e).__name__) from e
+
+        task_id = next(_task_ids)
+        started = threading.Event()
+        with _started_lock:
+            _started[task_id] = started
+        try:
+            for attempt in range(2):
+                pool = _get_pool()
+                try:
+                    return _await(pool, task_id, started, raw, task_timeout)
+                except BrokenProcessPool as e:
+                    _discard_pool(pool)
+                    if not started.is_set() and attempt == 0:
+                        # another task took the pool down before ours ran: try once on a fresh pool
+                        metrics.incr('docling.pool.resubmitted')
+                        continue
+                    metrics.incr('docling.pool.crashes')
+                    raise ConversionError('docling worker died (memory cap or crash)') from e
+        except ConversionError:
+            raise
+        except TimeoutError as e:
+            metrics.incr('docling.pool.timeouts')
+            raise ConversionError(str(e) or f'docling conversion exceeded {task_timeout}s') from e
+        except MemoryError as e:
+            metrics.incr('docling.pool.memory_errors')
+            raise ConversionError('docling conversion exceeded the worker memory cap') from e
+        except Exception as e:
+            raise ConversionError(str(e) or type(e).__name__) from e
+        finally:
+            with _started_lock:
+                _started.pop(task_id, None)
+    finally:
+        metrics.observe_ms('docling.convert', (time.perf_counter() - start) * 1000)
@@ -0,0 +1,354 @@
+"""
+Webpage fetch layer for recipe import.
+
+- One pooled requests.Session per process with bounded per-host connection pools.
+- Strict connect/read timeouts, a total deadline, a raw byte cap, and streaming reads that stop
+  once ~FETCH_USEFUL_BYTES of visible text has arrived.
+- URLs come from users: redirects are followed by hand and every hop must pass
+  images.check_public_url (http(s), public addresses only). Page charsets that Python doesn't
+  know fall back to utf-8.
+- Bounded on-disk cache of raw pages and their preprocessed markdown, revalidated with
+  ETag / Last-Modified so a re-import usually costs a 304. Cache writes are best-effort (a full
+  or read-only disk never fails a fetch). Each process keeps a running byte count and only
+  scans the directory to evict when that count passes PAGE_CACHE_MAX_BYTES or every
+  PAGE_CACHE_SCAN_SECONDS (other processes write to the same directory).
+"""
+
+import codecs
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import urljoin
+
+from django.conf import settings
+
+from . import metrics
+
+USER_AGENT = 'ForkLog recipe importer (+https://github.com/yoonkiwhan/ForkLog)'
+
+_META_CHARSET_RE = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.I)
+
+_session = None
+_session_lock = threading.Lock()
+_cache_lock = threading.Lock()
+_cache_bytes = None  # this process's estimate of the cache size; None until the first scan
+_cache_scanned_at = 0.0
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class FetchError(Exception):
+    """Page could not be fetched (network, HTTP status, size or time limit, non-public host)."""
+
+
+def _known_encoding(name):
+    """name if Python has a codec for it, else None (pages declare all sorts of charsets)."""
+    if not name:
+        return None
+    try:
+        codecs.lookup(name)
+    except (LookupError, ValueError):
+        return None
+    return name
+
+
+@dataclass
+class Page:
+    url: str
+    raw: bytes
+    encoding: str
+    markdown: str = None
+    from_cache: bool = False
+    truncated: bool = False
+
+    @property
+    def text(self):
+        return self.raw.decode(_known_encoding(self.encoding) or 'utf-8', errors='replace')
+
+
+def get_session():
+    """Process-wide requests.Session; connections to the same host are reused."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=_setting('FETCH_POOL_HOSTS', 16),
+                    pool_maxsize=_setting('FETCH_POOL_MAXSIZE_PER_HOST', 4),
+                    pool_block=True,
+                    max_retries=0,
+                )
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                session.headers.update({
+                    'User-Agent': USER_AGENT,
+                    'Accept': 'text/html,application/xhtml+xml;q=0.9,*/*;q=0.5',
+                })
+                _session = session
+    return _session
+
+
+class _UsefulTextCounter(HTMLParser):
+    """Counts visible text bytes (outside script/style) as HTML streams in."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.useful = 0
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ('script', 'style', 'noscript', 'svg'):
+            self._skip += 1
+
+    def handle_endtag(self, tag):
+        if tag in ('script', 'style', 'noscript', 'svg') and self._skip:
+            self._skip -= 1
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.useful += len(data.strip())
+
+
+# ---------- on-disk cache ----------
+
+
+def _cache_dir():
+    path = Path(_setting('PAGE_CACHE_DIR', Path(settings.BASE_DIR) / '.cache' / 'pages'))
+    try:
+        path.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        pass  # reads miss and writes are skipped
+    return path
+
+
+def _cache_paths(url):
+    key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+    base = _cache_dir() / key
+    return base.with_suffix('.json'), base.with_suffix('.html'), base.with_suffix('.md')
+
+
+def _read_cached(url):
+    meta_path, raw_path, md_path = _cache_paths(url)
+    try:
+        meta = json.loads(meta_path.read_text(encoding='utf-8'))
+        raw = raw_path.read_bytes()
+    except (OSError, ValueError):
+        return None, None, None
+    markdown = md_path.read_text(encoding='utf-8') if md_path.exists() else None
+    return meta, raw, markdown
+
+
+def _touch(*paths):
+    now = time.time()
+    for p in paths:
+        try:
+            os.utime(p, (now, now))
+        except OSError:
+            pass
+
+
+def _write_atomic(path, data):
+    """Write via a uniquely named temp file, so concurrent writers of one path never collide."""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return len(data)
+
+
+def _write_cache(*items):
+    """Best-effort _write_atomic for (path, data) pairs; a failed write only costs a cache miss."""
+    written = 0
+    try:
+        for path, data in items:
+            written += _write_atomic(path, data)
+    except OSError:
+        metrics.incr('fetch.cache.write_errors')
+    if written:
+        _evict_if_needed(written)
+
+
+def _evict_if_needed(written=0):
+    """
+    Count written bytes; once the estimate passes PAGE_CACHE_MAX_BYTES (or it is stale), rescan
+    and drop least recently used pages until the cache fits.
+    """
+    global _cache_bytes, _cache_scanned_at
+    limit = _setting('PAGE_CACHE_MAX_BYTES', 256 * 1024 * 1024)
+    with _cache_lock:
+        if _cache_bytes is not None:
+            _cache_bytes += written
+            fresh = time.monotonic() - _cache_scanned_at < _setting('PAGE_CACHE_SCAN_SECONDS', 300)
+            if _cache_bytes <= limit and fresh:
+                return
+        files = []
+        total = 0
+        try:
+            entries = list(_cache_dir().iterdir())
+        except OSError:
+            return
+        for p in entries:
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, p))
+            total += st.st_size
+        metrics.incr('fetch.cache.scans')
+        _cache_scanned_at = time.monotonic()
+        if total > limit:
+            files.sort()
+            for _mtime, size, p in files:
+                if total <= limit:
+                    break
+                try:
+                    p.unlink()
+                    total -= size
+                    metrics.incr('fetch.cache.evictions')
+                except OSError:
+                    pass
+        _cache_bytes = total
+
+
+def store_markdown(url, markdown):
+    """Remember the preprocessed markdown for the cached page at url."""
+    _meta_path, raw_path, md_path = _cache_paths(url)
+    if raw_path.exists():
+        _write_cache((md_path, markdown))
+
+
+# ---------- fetching ----------
+
+
+def _read_limited(response):
+    """Stream the body; stop at the raw byte cap, the total deadline, or enough useful text."""
+    max_bytes = _setting('FETCH_MAX_BYTES', 3 * 1024 * 1024)
+    useful_target = _setting('FETCH_USEFUL_BYTES', 50000)
+    deadline = time.monotonic() + _setting('FETCH_TOTAL_TIMEOUT', 20)
+    # requests falls back to ISO-8859-1 for text/* without a charset, which mangles Korean pages.
+    encoding = response.encoding if 'charset=' in (response.headers.get('Content-Type') or '').lower() else None
+    encoding = _known_encoding(encoding)
+    counter = _UsefulTextCounter()
+    chunks = []
+    size = 0
+    truncated = False
+    for chunk in response.iter_content(chunk_size=16384):
+        if not chunk:
+            continue
+        if encoding is None:
+            m = _META_CHARSET_RE.search(chunk[:4096])
+            encoding = _known_encoding(m.group(1).decode('ascii', errors='ignore') if m else None) or 'utf-8'
+        chunks.append(chunk)
+        size += len(chunk)
+        try:
+            counter.feed(chunk.decode(encoding, errors='replace'))
+        except Exception:
+            pass
+        if size >= max_bytes or counter.useful >= useful_target:
+            truncated = True
+            break
+        if time.monotonic() > deadline:
+            raise FetchError('timed out reading page')
+    return b''.join(chunks)[:max_bytes], encoding or 'utf-8', truncated
+
+
+def _get_public(url, headers, timeout):
+    """GET url as a stream, following redirects by hand so every hop is checked as public."""
+    from .images import MAX_REDIRECTS, ImageError, check_public_url
+
+    session = get_session()
+    for _ in range(MAX_REDIRECTS + 1):
+        try:
+            check_public_url(url)
+        except ImageError as e:
+            metrics.incr('fetch.refused')
+            raise FetchError(str(e)) from e
+        response = session.get(url, headers=headers, timeout=timeout, stream=True, allow_redirects=False)
+        if not response.is_redirect:
+            return response
+        location = response.headers.get('Location')
+        response.close()
+        url = urljoin(url, location)
+    raise FetchError('too many redirects')
+
+
+def fetch_page(url):
+    """
+    Fetch url through the pooled session and the on-disk cache.
+    Returns a Page; raises FetchError on failure. Page.markdown is set when a cached
+    conversion is still valid for the page bytes.
+    """
+    import requests
+
+    meta, cached_raw, cached_md = _read_cached(url)
+    meta_path, raw_path, md_path = _cache_paths(url)
+    if meta and time.time() - meta.get('fetched_at', 0) < _setting('PAGE_CACHE_FRESH_SECONDS', 600):
+        metrics.incr('fetch.cache.fresh')
+        _touch(meta_path, raw_path, md_path)
+        return Page(url, cached_raw, meta.get('encoding') or 'utf-8', cached_md, from_cache=True)
+
+    headers = {}
+    if meta:
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+
+    timeout = (_setting('FETCH_CONNECT_TIMEOUT', 5), _setting('FETCH_READ_TIMEOUT', 15))
+    start = time.perf_counter()
+    try:
+        with _get_public(url, headers, timeout) as response:
+            if response.status_code == 304 and meta:
+                metrics.incr('fetch.cache.revalidated')
+                meta['fetched_at'] = time.time()
+                _write_cache((meta_path, json.dumps(meta)))
+                _touch(raw_path, md_path)
+                return Page(url, cached_raw, meta.get('encoding') or 'utf-8', cached_md, from_cache=True)
+            response.raise_for_status()
+            raw, encoding, truncated = _read_limited(response)
+            new_meta = {
+                'url': url,
+                'final_url': response.url,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'content_type': response.headers.get('Content-Type'),
+                'encoding': encoding,
+                'fetched_at': time.time(),
+                'truncated': truncated,
+            }
+    except requests.RequestException as e:
+        metrics.incr('fetch.errors')
+        raise FetchError(str(e)) from e
+    finally:
+        metrics.observe_ms('fetch.latency', (time.perf_counter() - start) * 1000)
+
+    metrics.incr('fetch.downloads')
+    metrics.incr('fetch.bytes', len(raw))
+    try:
+        md_path.unlink()  # stale conversion of the previous body
+    except OSError:
+        pass
+    _write_cache((raw_path, raw), (meta_path, json.dumps(new_meta)))
+    return Page(url, raw, encoding, None, truncated=truncated)
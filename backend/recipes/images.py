@@ -0,0 +1,338 @@
+"""
+Image ingestion: local thumbnails for RecipeVersion.main_picture, step media and Meal.photos.
+
+- Saves enqueue new external image URLs (signals.py, also for bulk writers). A bounded
+  thread pool (IMAGE_WORKERS, at most IMAGE_QUEUE_MAX waiting) fetches each URL once through the
+  shared fetcher session, with the FETCH_* timeouts and an IMAGE_MAX_BYTES cap. Hosts (and every
+  redirect target) must resolve to public addresses. URLs that don't fit in the queue stay pending
+  for `manage.py process_images`.
+- Bytes are hashed (sha256); identical images reached through different URLs share one set of
+  thumbnail files, named by content hash.
+- Decoding refuses images over IMAGE_MAX_PIXELS before pixel data is read. Thumbnails are WebP
+  (JPEG when Pillow lacks WebP) at each width in THUMBNAIL_WIDTHS, never upscaled.
+- Files are served by views.image_thumbnail with a year-long immutable Cache-Control (the
+  name changes whenever the content does). List serializers expose the URLs via thumbnail_map();
+  when thumbnails become ready, versions showing the image get a new updated_at so list and
+  detail ETags change.
+
+Pillow is optional: without it nothing is enqueued and serializers return null thumbnails.
+"""
+
+import hashlib
+import io
+import ipaddress
+import re
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from . import metrics
+from .models import ImageAsset
+
+MAX_REDIRECTS = 5
+THUMBNAIL_NAME_RE = re.compile(r'^(?P<hash>[0-9a-f]{64})-(?P<width>\d+)\.(?P<ext>webp|jpg)$')
+
+_pool = None
+_pool_lock = threading.Lock()
+_queued = set()  # asset ids submitted and not finished
+_queued_lock = threading.Lock()
+
+
+class ImageError(Exception):
+    """Image could not be fetched or decoded within the limits."""
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def available():
+    """True when Pillow is installed and IMAGE_THUMBNAILS_ENABLED is on."""
+    if not _setting('IMAGE_THUMBNAILS_ENABLED', True):
+        return False
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def url_hash(url):
+    return hashlib.sha256(url.encode()).hexdigest()
+
+
+def thumbnail_root():
+    return Path(_setting('THUMBNAIL_ROOT', Path(settings.BASE_DIR) / 'media' / 'thumbs'))
+
+
+def thumbnail_path(name):
+    """File for a thumbnail name ('<sha256>-<width>.<ext>'), sharded by hash prefix."""
+    return thumbnail_root() / name[:2] / name
+
+
+def thumbnail_url(name):
+    return f'{_setting("THUMBNAIL_URL", "/api/images/")}{name}'
+
+
+def _is_external(url):
+    return isinstance(url, str) and url.startswith(('http://', 'https://'))
+
+
+def version_image_urls(version):
+    """main_picture and step media URLs of a version."""
+    urls = [version.main_picture]
+    for step in version.steps or []:
+        if isinstance(step, dict):
+            for item in step.get('media') or []:
+                urls.append(item.get('url') if isinstance(item, dict) else item)
+    return [u for u in urls if _is_external(u)]
+
+
+# ---------- lookups (serializers) ----------
+
+
+def thumbnail_map(urls):
+    """{url: {'<width>': thumbnail URL, ...}} for the given URLs that have ready thumbnails (one query)."""
+    by_hash = {url_hash(u): u for u in set(urls) if _is_external(u)}
+    if not by_hash:
+        return {}
+    rows = ImageAsset.objects.filter(
+        url_hash__in=list(by_hash), status=ImageAsset.READY,
+    ).values_list('url_hash', 'content_hash', 'thumbnail_widths', 'thumbnail_format')
+    result = {}
+    for key, content_hash, widths, ext in rows:
+        result[by_hash[key]] = {str(w): thumbnail_url(f'{content_hash}-{w}.{ext}') for w in widths or []}
+    return result
+
+
+# ---------- enqueueing ----------
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(
+                    max_workers=_setting('IMAGE_WORKERS', 2), thread_name_prefix='forklog-images',
+                )
+    return _pool
+
+
+def ingest(urls):
+    """Register new external image URLs and queue them for thumbnailing (after commit)."""
+    if not available():
+        return
+    by_hash = {url_hash(u): u for u in set(urls) if _is_external(u) and len(u) <= 2048}
+    if not by_hash:
+        return
+    existing = set(ImageAsset.objects.filter(url_hash__in=list(by_hash)).values_list('url_hash', flat=True))
+    new = [ImageAsset(url=url, url_hash=key) for key, url in by_hash.items() if key not in existing]
+    if not new:
+        return
+    ImageAsset.objects.bulk_create(new, ignore_conflicts=True)
+    ids = list(ImageAsset.objects.filter(
+        url_hash__in=[a.url_hash for a in new], status=ImageAsset.PENDING,
+    ).values_list('pk', flat=True))
+    transaction.on_commit(lambda: submit(ids))
+
+
+def submit(asset_ids):
+    """Hand assets to the pool; ones over IMAGE_QUEUE_MAX stay pending for process_images."""
+    limit = _setting('IMAGE_QUEUE_MAX', 200)
+    pool = _get_pool()
+    for asset_id in asset_ids:
+        with _queued_lock:
+            if asset_id in _queued:
+                continue
+            if len(_queued) >= limit:
+                metrics.incr('images.queue.full')
+                return
+            _queued.add(asset_id)
+        pool.submit(_run, asset_id)
+
+
+def _run(asset_id):
+    try:
+        process(asset_id)
+    finally:
+        with _queued_lock:
+            _queued.discard(asset_id)
+        close_old_connections()
+
+
+# ---------- processing ----------
+
+
+def check_public_url(url):
+    """
+    Raise ImageError unless url is http(s) and its host resolves only to global addresses.
+    Image URLs come from users and are fetched automatically, so loopback, private, link-local
+    (cloud metadata) and other internal addresses must never be reached.
+    """
+    parts = urlsplit(url)
+    try:
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+    except ValueError:
+        raise ImageError('invalid port')
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        raise ImageError('unsupported URL')
+    try:
+        infos = socket.getaddrinfo(parts.hostname, port, proto=socket.IPPROTO_TCP)
+    except (socket.gaierror, UnicodeError):
+        raise ImageError('host not found')
+    for info in infos:
+        address = ipaddress.ip_address(info[4][0].split('%', 1)[0])
+        if address.version == 6 and address.ipv4_mapped:
+            address = address.ipv4_mapped
+        if not address.is_global or address.is_multicast:
+            raise ImageError('refusing to fetch from a non-public address')
+
+
+def fetch_image(url):
+    """
+    Image bytes for url, within IMAGE_MAX_BYTES and the fetch deadline; raises ImageError.
+    Redirects are followed by hand so every hop passes check_public_url().
+    """
+    import requests
+
+    from .fetcher import get_session
+
+    max_bytes = _setting('IMAGE_MAX_BYTES', 10 * 1024 * 1024)
+    timeout = (_setting('FETCH_CONNECT_TIMEOUT', 5), _setting('FETCH_READ_TIMEOUT', 15))
+    deadline = time.monotonic() + _setting('FETCH_TOTAL_TIMEOUT', 20)
+    try:
+        for _ in range(MAX_REDIRECTS + 1):
+            check_public_url(url)
+            response = get_session().get(
+                url, timeout=timeout, stream=True, allow_redirects=False, headers={'Accept': 'image/*'},
+            )
+            if not response.is_redirect:
+                break
+            url = urljoin(url, response.headers.get('Location', ''))
+            response.close()
+        else:
+            raise ImageError('too many redirects')
+        with response:
+            response.raise_for_status()
+            content_type = (response.headers.get('Content-Type') or '').lower()
+            if content_type and not content_type.startswith('image/'):
+                raise ImageError(f'not an image ({content_type})')
+            declared = response.headers.get('Content-Length')
+            if declared and declared.isdigit() and int(declared) > max_bytes:
+                raise ImageError(f'image larger than {max_bytes} bytes')
+            chunks, size = [], 0
+            for chunk in response.iter_content(chunk_size=65536):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ImageError(f'image larger than {max_bytes} bytes')
+                if time.monotonic() > deadline:
+                    raise ImageError('timed out reading image')
+                chunks.append(chunk)
+    except requests.RequestException as e:
+        raise ImageError(f'fetch failed: {e.__class__.__name__}') from e
+    return b''.join(chunks)
+
+
+def _thumbnail_format():
+    from PIL import features
+
+    return ('WEBP', 'webp') if features.check('webp') else ('JPEG', 'jpg')
+
+
+def make_thumbnails(data, content_hash):
+    """Write thumbnails for image bytes; returns (widths, ext, (width, height)). Raises ImageError."""
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    max_pixels = _setting('IMAGE_MAX_PIXELS', 40_000_000)
+    try:
+        image = Image.open(io.BytesIO(data))  # reads the header only
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        raise ImageError('unreadable image') from e
+    width, height = image.size
+    if width * height > max_pixels:
+        raise ImageError(f'image is {width}x{height}, over {max_pixels} pixels')
+    widths = sorted(set(_setting('THUMBNAIL_WIDTHS', (160, 480))))
+    fmt, ext = _thumbnail_format()
+    # JPEG can decode at a reduced scale directly, which is much cheaper for big photos
+    image.draft('RGB', (widths[-1], widths[-1] * height // max(width, 1)))
+    try:
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGBA' if fmt == 'WEBP' and image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        raise ImageError('image could not be decoded') from e
+
+    directory = thumbnail_root() / content_hash[:2]
+    directory.mkdir(parents=True, exist_ok=True)
+    written = []
+    for target in widths:
+        if written and target > image.width:
+            break  # never upscale; the previous size already covers the original
+        thumb = image.copy()
+        thumb.thumbnail((target, target * 4), Image.LANCZOS)
+        path = directory / f'{content_hash}-{target}.{ext}'
+        if not path.exists():
+            buffer = io.BytesIO()
+            options = {'method': 4} if fmt == 'WEBP' else {'optimize': True, 'progressive': True}
+            thumb.save(buffer, fmt, quality=_setting('THUMBNAIL_QUALITY', 80), **options)
+            tmp = path.with_suffix(f'.{threading.get_ident()}.tmp')
+            tmp.write_bytes(buffer.getvalue())
+            tmp.replace(path)
+        written.append(target)
+    return written, ext, (width, height)
+
+
+def process(asset_id):
+    """Fetch, dedup and thumbnail one asset; records the outcome on the row."""
+    asset = ImageAsset.objects.filter(pk=asset_id).first()
+    if asset is None or asset.status == ImageAsset.READY:
+        return asset
+    started = time.perf_counter()
+    try:
+        data = fetch_image(asset.url)
+        content_hash = hashlib.sha256(data).hexdigest()
+        twin = ImageAsset.objects.filter(content_hash=content_hash, status=ImageAsset.READY).exclude(pk=asset.pk).first()
+        if twin and all(
+            thumbnail_path(f'{content_hash}-{w}.{twin.thumbnail_format}').exists() for w in twin.thumbnail_widths
+        ):
+            metrics.incr('images.dedup')
+            widths, ext, size = twin.thumbnail_widths, twin.thumbnail_format, (twin.width, twin.height)
+        else:
+            widths, ext, size = make_thumbnails(data, content_hash)
+    except Exception as e:
+        # anything else (disk full, storage or database errors) must not leave the asset pending
+        # forever; process_images retries FAILED assets up to IMAGE_MAX_ATTEMPTS
+        metrics.incr('images.failed')
+        error = str(e) if isinstance(e, ImageError) else f'{e.__class__.__name__}: {e}'
+        ImageAsset.objects.filter(pk=asset.pk).update(
+            status=ImageAsset.FAILED, error=error[:255], attempts=asset.attempts + 1, updated_at=timezone.now(),
+        )
+        return None
+    ImageAsset.objects.filter(pk=asset.pk).update(
+        status=ImageAsset.READY, error='', attempts=asset.attempts + 1, content_hash=content_hash,
+        bytes=len(data), width=size[0], height=size[1], thumbnail_widths=widths, thumbnail_format=ext,
+        updated_at=timezone.now(),
+    )
+    metrics.incr('images.ready')
+    metrics.observe_ms('images.process', (time.perf_counter() - started) * 1000)
+    _invalidate_lists(asset.url)
+    return asset
+
+
+def _invalidate_lists(url):
+    """
+    Version lists embed main_picture thumbnails: touch updated_at of the versions showing this
+    image so HTTP validators (and response cache keys) change, and drop feed pages that show it.
+    """
+    from . import discovery
+    from .models import RecipeVersion
+
+    RecipeVersion.objects.filter(main_picture=url).update(updated_at=timezone.now())
+    discovery.touch(main_picture=url)
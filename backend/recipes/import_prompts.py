@@ -29,7 +29,8 @@ For non-English recipes (e.g., Korean, Japanese, Spanish):
 - Set the metadata.language field appropriately (e.g., "ko", "ja", "es")
 
 **Output Format:**
-Return ONLY valid JSON matching the provided schema. Do not include any explanation or markdown formatting."""
+Return ONLY valid JSON matching the provided schema. Do not include any explanation or markdown formatting.
+Write the top-level keys in this order: name, metadata, ingredients, steps, equipment, notes, nutrition, tags."""
 
 
 def user_prompt_webpage(url: str, content: str, language: str = "en") -> str:
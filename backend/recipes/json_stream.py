@@ -0,0 +1,106 @@
+"""
+Incremental parser for a JSON object that arrives in chunks (streamed model output).
+
+feed() returns events as soon as they are complete in the text seen so far:
+- ('member', key, value): a top-level member of the object
+- ('item', key, value): one object/array element of a top-level array listed in item_keys,
+  emitted before the whole array (and its 'member' event) is finished
+
+Text before the first '{' (e.g. a ```json fence) is ignored. The final, authoritative parse is
+still done on the complete text by the caller.
+"""
+
+import json
+
+_WHITESPACE = ' \t\r\n'
+
+
+class IncrementalObjectParser:
+    def __init__(self, item_keys=()):
+        self.item_keys = set(item_keys)
+        self.text = ''
+        self.done = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._expect = 'key'  # at depth 1: 'key' | 'colon' | 'value'
+        self._key = None
+        self._value_start = None
+        self._scalar_start = None
+        self._item_start = None
+
+    def _member(self, events, raw):
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            return
+        events.append(('member', self._key, value))
+
+    def feed(self, chunk):
+        events = []
+        self.text += chunk
+        text = self.text
+        while self._pos < len(text) and not self.done:
+            pos = self._pos
+            ch = text[pos]
+            self._pos += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        raw = text[self._string_start:pos + 1]
+                        if self._expect == 'key':
+                            self._key = json.loads(raw)
+                            self._expect = 'colon'
+                        else:
+                            self._member(events, raw)
+                            self._expect = 'after'
+                continue
+
+            if self._depth == 0:
+                if ch == '{':
+                    self._depth = 1
+                continue
+
+            if self._depth == 1 and self._scalar_start is not None and (ch in ',}' or ch in _WHITESPACE):
+                self._member(events, text[self._scalar_start:pos])
+                self._scalar_start = None
+                self._expect = 'after'
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = pos
+            elif ch in '{[':
+                self._depth += 1
+                if self._depth == 2:
+                    self._value_start = pos
+                    self._expect = 'after'
+                elif self._depth == 3 and self._key in self.item_keys and text[self._value_start] == '[':
+                    self._item_start = pos
+            elif ch in '}]':
+                if self._depth == 3 and self._item_start is not None:
+                    try:
+                        events.append(('item', self._key, json.loads(text[self._item_start:pos + 1])))
+                    except ValueError:
+                        pass
+                    self._item_start = None
+                self._depth -= 1
+                if self._depth == 1:
+                    self._member(events, text[self._value_start:pos + 1])
+                elif self._depth == 0:
+                    self.done = True
+            elif self._depth == 1:
+                if ch == ':':
+                    self._expect = 'value'
+                elif ch == ',':
+                    self._expect = 'key'
+                elif ch not in _WHITESPACE and self._expect == 'value' and self._scalar_start is None:
+                    self._scalar_start = pos
+        return events
@@ -0,0 +1,47 @@
+"""
+Compress cold data in bounded batches: version content blobs not referenced by a write and
+log_entries of meals that ended more than --days ago (default COLD_STORAGE_AFTER_DAYS).
+Prints the compression ratio per kind and decompression latency over archived rows.
+
+    python manage.py archive_cold_data --days 180 --batch-size 200 --train
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes import archive
+
+
+class Command(BaseCommand):
+    help = 'Move old version content and finished meal logs into compressed cold storage.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None)
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--train', action='store_true',
+                            help='Train new dictionaries from recent payloads first (always done when none exist).')
+        parser.add_argument('--sample-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        archive.reset()
+        for kind in archive.KINDS:
+            if options['train'] or archive.latest_dictionary(kind) is None:
+                entry = archive.train(kind, options['sample_size'])
+                if entry:
+                    self.stdout.write(f'{kind}: trained dictionary #{entry.pk} ({len(entry.data)} B, {entry.sample_count} samples)')
+
+        before = archive.cutoff(options['days'])
+        batch_size = max(1, options['batch_size'])
+        for kind, run in (('recipe', archive.archive_blobs), ('meal_log', archive.archive_meal_logs)):
+            start = time.perf_counter()
+            stats = run(before, batch_size=batch_size)
+            ratio = stats['bytes_in'] / stats['bytes_out'] if stats['bytes_out'] else 0
+            self.stdout.write(
+                f'{kind}: {stats["items"]} archived, {stats["skipped"]} skipped, '
+                f'{stats["bytes_in"]} -> {stats["bytes_out"]} B ({ratio:.2f}x) in {time.perf_counter() - start:.2f} s'
+            )
+        for kind, timing in archive.read_latency().items():
+            self.stdout.write(
+                f'{kind} read: {timing["count"]} sampled, p50 {timing["p50_ms"]} ms, p99 {timing["p99_ms"]} ms'
+            )
@@ -0,0 +1,48 @@
+"""
+Move existing inline version content into the content-addressed blob store, in batches, then
+recount references and print how much space deduplication saves.
+
+    python manage.py backfill_blobs --batch-size 500
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes import blobs
+
+
+def _size(n):
+    for unit in ('B', 'KiB', 'MiB'):
+        if abs(n) < 1024:
+            return f'{n:.1f} {unit}' if unit != 'B' else f'{n} B'
+        n /= 1024
+    return f'{n:.1f} GiB'
+
+
+def write_report(stdout, report):
+    stdout.write(
+        f'  {report["rows"]} rows, {report["values"]} values ({report["refs"]} by reference), '
+        f'{report["blobs"]} blobs ({report["unreferenced_blobs"]} unreferenced, {report["missing_blobs"]} missing)'
+    )
+    stdout.write(
+        f'  logical {_size(report["logical_bytes"])}, stored {_size(report["stored_bytes"])}, '
+        f'saved {_size(report["saved_bytes"])} ({report["dedup_ratio"]}x)'
+    )
+
+
+class Command(BaseCommand):
+    help = 'Deduplicate existing version JSON into ContentBlob rows and report the space saved.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        start = time.perf_counter()
+        result = blobs.backfill(batch_size=batch_size)
+        self.stdout.write(
+            f'{result["converted"]} values moved to blobs over {result["rows"]} rows '
+            f'in {time.perf_counter() - start:.2f} s'
+        )
+        write_report(self.stdout, blobs.scan(batch_size=batch_size))
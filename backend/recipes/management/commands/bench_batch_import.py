@@ -0,0 +1,113 @@
+"""
+Measure batch import throughput against stubbed fetch/convert and model backends.
+No network or API key needed; runs inside a rolled-back transaction.
+
+    python manage.py bench_batch_import --urls 24 --fetch-ms 50 --convert-ms 100 --ai-ms 400 --target-rate 10
+
+Conversion is modelled as a wait on a pool of DOCLING_WORKERS slots (it runs in docling_pool's
+worker processes, not in the batch threads).
+"""
+
+import threading
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recipes import batch_import
+
+
+def _stub_result(url):
+    return {
+        'name': f'Stub recipe {url.rsplit("/", 1)[-1]}',
+        'metadata': {'title': 'Stub recipe', 'source': {'type': 'webpage', 'url': url}},
+        'title': 'Stub recipe',
+        'ingredients': [{'id': 'ing_001', 'name': 'flour', 'quantity': 200, 'unit': 'g'}],
+        'steps': [{'id': 'step_001', 'order': 1, 'instruction': 'Mix.'}],
+        'equipment': [],
+        'notes': [],
+        'nutrition': None,
+        'tags': [],
+    }
+
+
+def stub_prepare(fetch_ms, convert_ms, structured_every, convert_slots, url, language):
+    """Network wait; every Nth URL has complete structured data, the rest wait for a docling slot."""
+    time.sleep(fetch_ms / 1000)
+    n = int(url.rsplit('/', 1)[-1])
+    if structured_every and n % structured_every == 0:
+        return 'result', _stub_result(url)
+    with convert_slots:
+        time.sleep(convert_ms / 1000)
+    return 'content', f'# Stub page {n}\n' + 'Mix flour and water. ' * 50
+
+
+def stub_extract(ai_ms, url, content, language):
+    time.sleep(ai_ms / 1000)
+    return _stub_result(url), None
+
+
+class Command(BaseCommand):
+    help = 'Benchmark batch import throughput with stubbed backends (sequential vs batch).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--urls', type=int, default=24)
+        parser.add_argument('--fetch-ms', type=float, default=50)
+        parser.add_argument('--convert-ms', type=float, default=100)
+        parser.add_argument('--ai-ms', type=float, default=400)
+        parser.add_argument('--structured-every', type=int, default=3,
+                            help='Every Nth URL skips the model (complete schema.org data).')
+        parser.add_argument('--target-rate', type=float, default=0,
+                            help='Fail unless batch throughput reaches this many URLs/s.')
+        parser.add_argument('--skip-sequential', action='store_true')
+
+    def handle(self, *args, **options):
+        n = options['urls']
+        slots = threading.BoundedSemaphore(max(1, getattr(settings, 'DOCLING_WORKERS', 2)))
+        prepare = partial(stub_prepare, options['fetch_ms'], options['convert_ms'], options['structured_every'], slots)
+        extract = partial(stub_extract, options['ai_ms'])
+        urls = [f'https://bench.invalid/recipe/{i}' for i in range(1, n + 1)]
+        # duplicates that differ only by fragment / trailing slash are answered once
+        urls += [f'{u}/#comments' for u in urls[: n // 4]]
+
+        with transaction.atomic():
+            sid = transaction.savepoint()
+            try:
+                sequential = None
+                if not options['skip_sequential']:
+                    start = time.perf_counter()
+                    for u in urls[:n]:
+                        kind, payload = prepare(u, 'en')
+                        if kind == 'content':
+                            extract(u, payload, 'en')
+                    sequential = time.perf_counter() - start
+
+                start = time.perf_counter()
+                first = None
+                items = []
+                for item in batch_import.iter_batch_import(urls, 'en', prepare, extract):
+                    if first is None:
+                        first = time.perf_counter() - start
+                    items.append(item)
+                elapsed = time.perf_counter() - start
+            finally:
+                transaction.savepoint_rollback(sid)
+
+        ok = sum(1 for it in items if it['status'] == 'ok')
+        failed = [it for it in items if it['status'] != 'ok']
+        if failed:
+            raise CommandError(f'{len(failed)} URLs failed, e.g. {failed[0]["url"]}: {failed[0]["error"]}')
+        rate = len(items) / elapsed if elapsed else 0
+        self.stdout.write(
+            f'{len(urls)} URLs ({len(items)} unique), fetch workers='
+            f'{getattr(settings, "BATCH_IMPORT_FETCH_WORKERS", 8)}, '
+            f'docling workers={getattr(settings, "DOCLING_WORKERS", 2)}, '
+            f'AI concurrency={getattr(settings, "BATCH_IMPORT_AI_CONCURRENCY", 4)}'
+        )
+        self.stdout.write(f'batch:      {elapsed:.2f}s  {rate:.1f} URLs/s  ok={ok}  first result after {first * 1000:.0f} ms')
+        if sequential is not None:
+            self.stdout.write(f'sequential: {sequential:.2f}s  {n / sequential:.1f} URLs/s  speedup {sequential / elapsed:.1f}x')
+        if options['target_rate'] and rate < options['target_rate']:
+            raise CommandError(f'Throughput {rate:.1f} URLs/s is below target {options["target_rate"]} URLs/s')
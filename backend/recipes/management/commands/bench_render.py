@@ -0,0 +1,95 @@
+"""
+Benchmark RecipeVersionSerializer against the fast_render path on a large synthetic recipe.
+Verifies both produce identical bytes. Runs inside a rolled-back transaction.
+
+    python manage.py bench_render --steps 150 --ingredients 60 --iterations 500 --rounds 5
+"""
+
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from recipes.fast_render import fetch_version_dict, render_json
+from recipes.models import Recipe, RecipeVersion
+from recipes.serializers import RecipeVersionSerializer
+
+
+def _synthetic_version(recipe, user, n_steps, n_ingredients):
+    return RecipeVersion.objects.create(
+        recipe=recipe,
+        owner=user,
+        version_number=1,
+        version_semver='1.0.0',
+        title='Benchmark stew',
+        metadata={'title': 'Benchmark stew', 'language': 'ko', 'servings': 4, 'cuisine': '한식'},
+        ingredients=[
+            {'id': f'ing_{i:03d}', 'name': f'재료 {i}', 'quantity': i * 0.5, 'unit': '큰술',
+             'preparation': 'minced', 'notes': '', 'group': 'main', 'optional': i % 7 == 0}
+            for i in range(1, n_ingredients + 1)
+        ],
+        steps=[
+            {'id': f'step_{i:03d}', 'order': i, 'title': f'Step {i}',
+             'instruction': 'Stir the pot gently and taste for seasoning. ' * 4,
+             'duration_minutes': i % 15, 'temperature': {'value': 180, 'unit': 'C'},
+             'timer': i % 3 == 0, 'notes': '', 'media': [f'https://example.com/{i}.jpg']}
+            for i in range(1, n_steps + 1)
+        ],
+        equipment=['pot', 'knife', 'cutting board'],
+        notes_array=[{'type': 'tip', 'content': 'Rest before serving.'}],
+        nutrition={'calories': 420, 'protein_g': 21.5},
+        tags=['stew', 'benchmark'],
+        commit_message='Initial version',
+    )
+
+
+class Command(BaseCommand):
+    help = 'Compare DRF serializer vs fast_render for one large RecipeVersion (byte equality + timing).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--steps', type=int, default=150)
+        parser.add_argument('--ingredients', type=int, default=60)
+        parser.add_argument('--iterations', type=int, default=300)
+        parser.add_argument('--rounds', type=int, default=5)
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(username='__bench_render__')
+            recipe = Recipe.objects.create(owner=user, name='Benchmark stew')
+            version = _synthetic_version(recipe, user, options['steps'], options['ingredients'])
+            qs = RecipeVersion.objects.filter(pk=version.pk)
+            renderer = JSONRenderer()
+
+            def drf_path():
+                return renderer.render(RecipeVersionSerializer(qs.get()).data)
+
+            def fast_path():
+                return render_json(fetch_version_dict(qs))
+
+            drf_bytes, fast_bytes = drf_path(), fast_path()
+            if drf_bytes != fast_bytes:
+                raise CommandError('fast_render output differs from RecipeVersionSerializer output')
+
+            # alternate the paths over several rounds and keep each one's best round, so a noisy
+            # neighbour or a warm-up during one path's turn doesn't decide the ratio
+            results = {}
+            per_round = max(1, iterations // options['rounds'])
+            for _ in range(options['rounds']):
+                for label, fn in (('serializer', drf_path), ('fast_render', fast_path)):
+                    start = time.perf_counter()
+                    for _ in range(per_round):
+                        fn()
+                    ms = (time.perf_counter() - start) / per_round * 1000
+                    results[label] = min(ms, results.get(label, ms))
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            f'{options["steps"]} steps, {options["ingredients"]} ingredients, '
+            f'{len(drf_bytes)} bytes, identical output'
+        )
+        for label, ms in results.items():
+            self.stdout.write(f'  {label:<12} {ms:8.3f} ms/request (best of {options["rounds"]} rounds)')
+        self.stdout.write(f'  speedup      {results["serializer"] / results["fast_render"]:8.2f}x')
@@ -0,0 +1,78 @@
+"""
+Time schema_validation.validate_recipe on a synthetic recipe and fail when the p99 is over budget.
+
+    python manage.py bench_schema_validation --steps 12 --ingredients 15 --iterations 2000 --budget-ms 1
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes import schema_validation
+
+
+def _synthetic_recipe(n_steps, n_ingredients):
+    return {
+        'metadata': {
+            'title': 'Benchmark stew', 'language': 'ko', 'translated_title': 'Benchmark stew',
+            'description': 'A hearty stew.', 'cuisine': '한식', 'course': 'main',
+            'dietary_tags': ['dairy-free'], 'prep_time_minutes': 15, 'cook_time_minutes': 40,
+            'servings': 4, 'difficulty': 'easy',
+            'source': {'type': 'webpage', 'url': 'https://example.com/stew', 'imported_at': '2025-01-01T00:00:00Z'},
+        },
+        'ingredients': [
+            {'id': f'ing_{i:03d}', 'name': f'재료 {i}', 'quantity': '1 1/2' if i % 4 == 0 else i * 0.5,
+             'unit': '큰술', 'preparation': 'minced', 'notes': '', 'group': 'main', 'optional': i % 7 == 0}
+            for i in range(1, n_ingredients + 1)
+        ],
+        'steps': [
+            {'id': f'step_{i:03d}', 'order': i, 'instruction': 'Stir the pot gently and taste for seasoning.',
+             'duration_minutes': i % 15, 'temperature': {'value': 180, 'unit': 'C'},
+             'timer': i % 3 == 0, 'notes': '', 'media': [f'https://example.com/{i}.jpg']}
+            for i in range(1, n_steps + 1)
+        ],
+        'equipment': ['pot', 'knife', 'cutting board'],
+        'notes': [{'type': 'tip', 'content': 'Rest before serving.'}],
+        'nutrition': {'calories': 420, 'protein_g': 21.5, 'sodium_mg': 900},
+        'tags': ['stew', 'benchmark'],
+    }
+
+
+class Command(BaseCommand):
+    help = 'Benchmark compiled recipe schema validation (per-call latency vs a budget).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--steps', type=int, default=12)
+        parser.add_argument('--ingredients', type=int, default=15)
+        parser.add_argument('--iterations', type=int, default=2000)
+        parser.add_argument('--budget-ms', type=float, default=1.0, help='Fail when p99 exceeds this.')
+
+    def handle(self, *args, **options):
+        schema_validation.reset()
+        start = time.perf_counter()
+        schema_validation.load_validators()
+        compile_ms = (time.perf_counter() - start) * 1000
+
+        recipe = _synthetic_recipe(options['steps'], options['ingredients'])
+        errors = schema_validation.validate_recipe(recipe)
+        if errors:
+            raise CommandError(f'synthetic recipe is invalid: {errors}')
+
+        samples = []
+        for _ in range(options['iterations']):
+            start = time.perf_counter()
+            schema_validation.validate_recipe(recipe)
+            samples.append((time.perf_counter() - start) * 1000)
+        samples.sort()
+        mean = sum(samples) / len(samples)
+        p50 = samples[len(samples) // 2]
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+
+        self.stdout.write(
+            f'{options["steps"]} steps, {options["ingredients"]} ingredients, '
+            f'{options["iterations"]} iterations (compiled once in {compile_ms:.2f} ms)'
+        )
+        self.stdout.write(f'  mean {mean:8.4f} ms  p50 {p50:8.4f} ms  p99 {p99:8.4f} ms')
+        if p99 > options['budget_ms']:
+            raise CommandError(f'p99 {p99:.3f} ms is over the {options["budget_ms"]} ms budget')
+        self.stdout.write(f'  within the {options["budget_ms"]} ms budget')
@@ -0,0 +1,28 @@
+"""
+Compact the sync change log: drop entries superseded by a newer one for the same object, and
+tombstones older than SYNC_TOMBSTONE_DAYS. Run periodically (e.g. daily from cron).
+
+    python manage.py compact_change_log
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes import sync
+from recipes.models import ChangeLogEntry
+
+
+class Command(BaseCommand):
+    help = 'Delete superseded change log entries and expired tombstones.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Entry id range per delete.')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        stats = sync.compact(batch_size=max(1, options['batch_size']))
+        self.stdout.write(
+            f'{stats["superseded"]} superseded entries and {stats["tombstones"]} tombstones deleted, '
+            f'{ChangeLogEntry.objects.count()} left in {time.perf_counter() - start:.2f} s'
+        )
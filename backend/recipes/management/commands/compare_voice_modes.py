@@ -0,0 +1,48 @@
+"""
+Run the same voice commands through full-document and patch modes and compare latency and tokens.
+Calls the real Claude API (needs ANTHROPIC_API_KEY); the local fast path is bypassed.
+
+    python manage.py compare_voice_modes 42 "add a bay leaf after the onion" "remove step 4"
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from recipes import metrics
+from recipes.models import RecipeVersion
+from recipes.services import process_voice_command, recipe_version_to_recipe_json
+
+
+class Command(BaseCommand):
+    help = 'Compare voice command full vs patch mode (latency, input/output tokens) on one RecipeVersion.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('version_id', type=int)
+        parser.add_argument('commands', nargs='+')
+
+    def handle(self, *args, **options):
+        version = RecipeVersion.objects.filter(pk=options['version_id']).select_related('recipe').first()
+        if not version:
+            raise CommandError('RecipeVersion not found.')
+        recipe = recipe_version_to_recipe_json(version)
+        metrics.reset()
+        with override_settings(VOICE_LOCAL_COMMANDS=False):
+            for command in options['commands']:
+                for mode in ('full', 'patch'):
+                    _result, err = process_voice_command(command, recipe, mode=mode)
+                    status = f'error: {err}' if err else 'ok'
+                    self.stdout.write(f'[{mode}] {command!r}: {status}')
+
+        snap = metrics.snapshot('voice_command.')
+        for mode in ('full', 'patch'):
+            timing = snap['timings'].get(f'voice_command.{mode}.latency', {})
+            calls = snap['counters'].get(f'voice_command.{mode}.calls', 0) or 1
+            self.stdout.write(
+                f'{mode:<6} calls={snap["counters"].get(f"voice_command.{mode}.calls", 0)} '
+                f'avg_latency_ms={timing.get("avg_ms", 0)} '
+                f'avg_input_tokens={snap["counters"].get(f"voice_command.{mode}.input_tokens", 0) / calls:.0f} '
+                f'avg_output_tokens={snap["counters"].get(f"voice_command.{mode}.output_tokens", 0) / calls:.0f}'
+            )
+        fallbacks = snap['counters'].get('voice_command.patch.fallback', 0)
+        if fallbacks:
+            self.stdout.write(f'patch fallbacks to full mode: {fallbacks}')
@@ -0,0 +1,27 @@
+"""
+Recount blob references and delete blobs nothing references (e.g. after versions or recipes
+were deleted). Blobs touched within the grace period are kept, so concurrent saves are safe.
+
+    python manage.py gc_blobs --grace-seconds 3600 --dry-run
+"""
+
+from django.core.management.base import BaseCommand
+
+from recipes import blobs
+from recipes.management.commands.backfill_blobs import write_report
+
+
+class Command(BaseCommand):
+    help = 'Recount ContentBlob references and delete unreferenced blobs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--grace-seconds', type=int, default=None,
+                            help='Keep blobs touched this recently (default BLOB_GC_GRACE_SECONDS).')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        write_report(self.stdout, blobs.scan(batch_size=max(1, options['batch_size'])))
+        result = blobs.collect_garbage(options['grace_seconds'], dry_run=options['dry_run'])
+        verb = 'would delete' if options['dry_run'] else 'deleted'
+        self.stdout.write(f'{verb} {result["deleted"]} blobs ({result["bytes"]} bytes)')
@@ -0,0 +1,59 @@
+"""
+Thumbnail image URLs synchronously: pending assets (e.g. ones the pool queue had no room for),
+optionally failed ones again, and with --scan every image URL already stored on versions and meals.
+
+    python manage.py process_images --scan --retry-failed --limit 500
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes import images
+from recipes.models import ImageAsset, Meal, RecipeVersion
+
+
+class Command(BaseCommand):
+    help = 'Fetch and thumbnail pending recipe and meal images.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scan', action='store_true', help='Register image URLs of existing versions and meals first.')
+        parser.add_argument('--retry-failed', action='store_true')
+        parser.add_argument('--limit', type=int, default=None)
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def _scan(self, batch_size):
+        for model, urls_of in (
+            (RecipeVersion, images.version_image_urls),
+            (Meal, lambda meal: [u for u in meal.photos or [] if isinstance(u, str)]),
+        ):
+            fields = ('pk', 'main_picture', 'steps') if model is RecipeVersion else ('pk', 'photos')
+            last = 0
+            while True:
+                rows = list(model.objects.filter(pk__gt=last).order_by('pk').only(*fields)[:batch_size])
+                if not rows:
+                    break
+                images.ingest([url for row in rows for url in urls_of(row)])
+                last = rows[-1].pk
+
+    def handle(self, *args, **options):
+        if not images.available():
+            raise CommandError('thumbnails are disabled (IMAGE_THUMBNAILS_ENABLED) or Pillow is not installed')
+        if options['scan']:
+            self._scan(max(1, options['batch_size']))
+        qs = ImageAsset.objects.filter(status=ImageAsset.PENDING)
+        if options['retry_failed']:
+            qs = ImageAsset.objects.filter(status__in=[ImageAsset.PENDING, ImageAsset.FAILED]).exclude(
+                status=ImageAsset.FAILED, attempts__gte=getattr(settings, 'IMAGE_MAX_ATTEMPTS', 3),
+            )
+        ids = list(qs.order_by('pk').values_list('pk', flat=True)[:options['limit']])
+        start = time.perf_counter()
+        ready = 0
+        for asset_id in ids:
+            if images.process(asset_id) is not None:
+                ready += 1
+        self.stdout.write(
+            f'{ready} of {len(ids)} images thumbnailed in {time.perf_counter() - start:.2f} s '
+            f'({ImageAsset.objects.filter(status=ImageAsset.FAILED).count()} failed in total)'
+        )
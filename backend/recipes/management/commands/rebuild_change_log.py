@@ -0,0 +1,28 @@
+"""
+Log every existing recipe, version and meal that has no sync change log entry yet, in batches.
+Needed once after migrating (rows written earlier have no entries); afterwards signals keep it up to date.
+Safe to re-run: objects that already have an entry are skipped.
+
+    python manage.py rebuild_change_log --batch-size 1000
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes import sync
+
+
+class Command(BaseCommand):
+    help = 'Add a change log entry for every recipe, version and meal that has none.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        counts = sync.rebuild(batch_size=max(1, options['batch_size']))
+        self.stdout.write(
+            ', '.join(f'{n} {kind} entries' for kind, n in counts.items())
+            + f' in {time.perf_counter() - start:.2f} s'
+        )
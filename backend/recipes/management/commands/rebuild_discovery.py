@@ -0,0 +1,37 @@
+"""
+Rebuild the discovery index (PublicRecipe / PublicRecipeTag) for every recipe, in batches.
+Needed once after migrating, or after changing what is denormalized; afterwards signals keep it in sync.
+
+    python manage.py rebuild_discovery --batch-size 500
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes import discovery
+from recipes.models import PublicRecipe, Recipe
+
+
+class Command(BaseCommand):
+    help = 'Re-derive discovery entries from each recipe\'s latest public version.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        start = time.perf_counter()
+        last_id, total = 0, 0
+        while True:
+            ids = list(
+                Recipe.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            discovery.sync_recipes(ids)
+            last_id, total = ids[-1], total + len(ids)
+        self.stdout.write(
+            f'{total} recipes checked, {PublicRecipe.objects.count()} listed '
+            f'in {time.perf_counter() - start:.2f} s'
+        )
@@ -0,0 +1,50 @@
+"""
+In-process counters and timings for ForkLog's caches and AI calls.
+Values are per worker process; GET /api/metrics/ (staff only) returns this process's snapshot.
+"""
+
+import threading
+from collections import defaultdict
+
+_lock = threading.Lock()
+_counters = defaultdict(int)
+_timings = defaultdict(lambda: {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+
+
+def incr(name, amount=1):
+    """Increase counter `name` (dotted, e.g. 'response_cache.recipe_detail.hit')."""
+    with _lock:
+        _counters[name] += amount
+
+
+def observe_ms(name, value_ms):
+    """Record one duration in milliseconds under `name`."""
+    with _lock:
+        t = _timings[name]
+        t['count'] += 1
+        t['total_ms'] += value_ms
+        if value_ms > t['max_ms']:
+            t['max_ms'] = value_ms
+
+
+def snapshot(prefix=''):
+    """Copy of counters and timings (optionally only names starting with prefix)."""
+    with _lock:
+        counters = {k: v for k, v in _counters.items() if k.startswith(prefix)}
+        timings = {
+            k: {
+                'count': t['count'],
+                'avg_ms': round(t['total_ms'] / t['count'], 3) if t['count'] else 0.0,
+                'max_ms': round(t['max_ms'], 3),
+            }
+            for k, t in _timings.items()
+            if k.startswith(prefix)
+        }
+    return {'counters': counters, 'timings': timings}
+
+
+def reset():
+    """Clear all counters and timings (tests, benchmarks)."""
+    with _lock:
+        _counters.clear()
+        _timings.clear()
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_recipeversion_main_picture'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipeversion',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_recipeversion_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PublicRecipe',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('owner_username', models.CharField(blank=True, max_length=150)),
+                ('slug', models.SlugField(blank=True, max_length=255)),
+                ('title', models.CharField(blank=True, max_length=255)),
+                ('description', models.CharField(blank=True, max_length=500)),
+                ('main_picture', models.URLField(blank=True, max_length=2048)),
+                ('language', models.CharField(blank=True, max_length=8)),
+                ('cuisine', models.CharField(blank=True, max_length=64)),
+                ('cuisine_key', models.CharField(blank=True, db_index=True, max_length=64)),
+                ('course', models.CharField(blank=True, db_index=True, max_length=16)),
+                ('tags', models.JSONField(blank=True, default=list)),
+                ('prep_time_minutes', models.PositiveIntegerField(blank=True, null=True)),
+                ('cook_time_minutes', models.PositiveIntegerField(blank=True, null=True)),
+                ('total_time_minutes', models.PositiveIntegerField(blank=True, db_index=True, null=True)),
+                ('servings', models.PositiveIntegerField(blank=True, null=True)),
+                ('difficulty', models.CharField(blank=True, max_length=16)),
+                ('rating', models.FloatField(blank=True, null=True)),
+                ('meal_rating_avg', models.FloatField(blank=True, null=True)),
+                ('meal_rating_count', models.PositiveIntegerField(default=0)),
+                ('published_at', models.DateTimeField()),
+                ('synced_at', models.DateTimeField(auto_now=True)),
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='public_entry', to='recipes.recipe')),
+                ('version', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='recipes.recipeversion')),
+            ],
+            options={
+                'ordering': ['-published_at', '-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PublicRecipeTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tag', models.CharField(max_length=64)),
+                ('entry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_rows', to='recipes.publicrecipe')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='publicrecipe',
+            index=models.Index(fields=['-published_at', '-id'], name='public_recipe_feed_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='publicrecipetag',
+            constraint=models.UniqueConstraint(fields=('tag', 'entry'), name='public_recipe_tag_unique'),
+        ),
+    ]
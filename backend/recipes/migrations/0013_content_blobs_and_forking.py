@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:53
+
+import django.db.models.deletion
+import recipes.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_public_recipe_discovery'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentBlob',
+            fields=[
+                ('digest', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('data', models.TextField()),
+                ('size', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='forked_from',
+            field=models.ForeignKey(blank=True, help_text="Version this recipe was forked from (usually another user's public version).", null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='forks', to='recipes.recipeversion'),
+        ),
+        migrations.AlterField(
+            model_name='recipeversion',
+            name='ingredients',
+            field=recipes.models.BlobJSONField(blank=True, default=list),
+        ),
+        migrations.AlterField(
+            model_name='recipeversion',
+            name='steps',
+            field=recipes.models.BlobJSONField(blank=True, default=list),
+        ),
+    ]
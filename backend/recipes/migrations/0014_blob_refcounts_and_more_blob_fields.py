@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:55
+
+import django.utils.timezone
+import recipes.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0013_content_blobs_and_forking'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contentblob',
+            name='refcount',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='contentblob',
+            name='touched_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name='recipeversion',
+            name='equipment',
+            field=recipes.models.BlobJSONField(blank=True, default=list),
+        ),
+        migrations.AlterField(
+            model_name='recipeversion',
+            name='notes_array',
+            field=recipes.models.BlobJSONField(blank=True, default=list),
+        ),
+        migrations.AlterField(
+            model_name='recipeversion',
+            name='nutrition',
+            field=recipes.models.BlobJSONField(blank=True, default=None, null=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:25
+
+from django.db import migrations, models
+from django.db.models.functions import Lower, Trim
+
+
+def lowercase_courses(apps, schema_editor):
+    PublicRecipe = apps.get_model('recipes', 'PublicRecipe')
+    PublicRecipe.objects.update(course=Lower(Trim('course')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0017_change_log'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='publicrecipe',
+            name='synced_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.RunPython(lowercase_courses, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,82 @@
+"""
+Pick the model tier for each AI call from settings.AI_MODEL_ROUTES.
+
+A route is an ordered list of (max_input_chars, tier) rules per task; the first rule whose limit
+fits the prompt wins (None = no limit). A cheaper tier is skipped while its recent JSON success
+rate for the task is below AI_ROUTE_MIN_SUCCESS_RATE (over the last AI_ROUTE_WINDOW calls, probed
+again every AI_ROUTE_WINDOW-th call), and callers retry a failed parse once on AI_FALLBACK_TIER.
+"""
+
+import threading
+from collections import defaultdict, deque
+
+from django.conf import settings
+
+from . import metrics
+
+DEFAULT_ROUTE = [(None, 'large')]
+
+_lock = threading.Lock()
+_outcomes = defaultdict(deque)  # (task, tier) -> recent True/False parse results
+_skips = defaultdict(int)  # (task, tier) -> calls routed away since it became unhealthy
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def tiers():
+    return _setting('AI_MODEL_TIERS', {'large': 'claude-sonnet-4-20250514'})
+
+
+def fallback_tier():
+    return _setting('AI_FALLBACK_TIER', 'large')
+
+
+def model_for(tier):
+    return tiers().get(tier) or tiers()[fallback_tier()]
+
+
+def _healthy(task, tier):
+    """False while the tier's recent success rate is too low; every window-th call still probes it."""
+    window = _setting('AI_ROUTE_WINDOW', 20)
+    with _lock:
+        results = _outcomes.get((task, tier), ())
+        if len(results) < max(1, window // 2):
+            return True
+        if sum(results) / len(results) >= _setting('AI_ROUTE_MIN_SUCCESS_RATE', 0.8):
+            _skips.pop((task, tier), None)
+            return True
+        _skips[(task, tier)] += 1
+        return _skips[(task, tier)] % window == 0
+
+
+def choose(task, input_chars):
+    """(tier, model) for a call of `task` whose prompt is input_chars long."""
+    for max_chars, tier in _setting('AI_MODEL_ROUTES', {}).get(task, DEFAULT_ROUTE):
+        if max_chars is not None and input_chars > max_chars:
+            continue
+        if tier != fallback_tier() and not _healthy(task, tier):
+            metrics.incr(f'{task}.route.{tier}.skipped')
+            continue
+        return tier, model_for(tier)
+    tier = fallback_tier()
+    return tier, model_for(tier)
+
+
+def record(task, tier, ok):
+    """Remember whether `tier` produced a parseable answer for `task`."""
+    window = _setting('AI_ROUTE_WINDOW', 20)
+    with _lock:
+        results = _outcomes[(task, tier)]
+        results.append(bool(ok))
+        while len(results) > window:
+            results.popleft()
+    if not ok:
+        metrics.incr(f'{task}.route.{tier}.parse_failures')
+
+
+def reset():
+    with _lock:
+        _outcomes.clear()
+        _skips.clear()
@@ -7,6 +7,65 @@ Recipes are owned by users (django.contrib.auth.User); slug is unique per owner.
 import uuid
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
+
+from . import blobs
+
+
+class BlobJSONField(models.JSONField):
+    """
+    JSONField whose large values are stored once in ContentBlob and referenced by content hash
+    (see blobs.py). Reads return plain Python values, so callers don't need to know.
+    """
+
+    def get_internal_type(self):
+        # The column holds inline JSON or an '@<sha256>' ref, so it is plain text (no JSON check).
+        return 'TextField'
+
+    def from_db_value(self, value, expression, connection):
+        return blobs.from_column(value)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if value is None or hasattr(value, 'as_sql'):
+            return value
+        return blobs.column_value(value)
+
+    def get_db_prep_save(self, value, connection):
+        if value is None or hasattr(value, 'as_sql'):
+            return value
+        return blobs.store(value)
+
+
+class ContentBlob(models.Model):
+    """JSON text shared by every BlobJSONField value whose sorted-key form has this sha256."""
+    digest = models.CharField(max_length=64, primary_key=True)
+    data = models.TextField(blank=True)  # '' once moved to cold storage (packed)
+    size = models.PositiveIntegerField()  # bytes of the JSON text (UTF-8), also when packed
+    # Cold storage (archive.py): compressed text and how to decompress it ('' = plain data)
+    codec = models.CharField(max_length=32, blank=True)
+    packed = models.BinaryField(null=True, blank=True)
+    # References from BlobJSONField columns, as of the last gc_blobs / backfill_blobs scan
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Bumped whenever a write references the blob, so gc never drops one a concurrent save just used
+    touched_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f'{self.digest[:12]} ({self.size} B)'
+
+
+class CompressionDictionary(models.Model):
+    """Preset zlib dictionary trained on a sample of one kind of payload (archive.py)."""
+    kind = models.CharField(max_length=32, db_index=True)  # 'recipe' | 'meal_log'
+    data = models.BinaryField()
+    sample_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = 'Compression dictionaries'
+
+    def __str__(self):
+        return f'{self.kind} #{self.pk} ({len(self.data)} B)'
 
 
 class Recipe(models.Model):
@@ -21,6 +80,10 @@ class Recipe(models.Model):
     uuid = models.UUIDField(default=uuid.uuid4, editable=False, unique=True, db_index=True)
     name = models.CharField(max_length=255)
     slug = models.SlugField(max_length=255, blank=True)
+    forked_from = models.ForeignKey(
+        'RecipeVersion', on_delete=models.SET_NULL, null=True, blank=True, related_name='forks',
+        help_text='Version this recipe was forked from (usually another user\'s public version).',
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -83,6 +146,8 @@ class RecipeVersion(models.Model):
     commit_message = models.CharField(max_length=255, blank=True)
     author = models.CharField(max_length=255, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Versions can still be edited in place (PUT/PATCH), so created_at alone is not a safe HTTP validator.
+    updated_at = models.DateTimeField(auto_now=True)
 
     title = models.CharField(max_length=255, blank=True)  # denormalized from metadata.title
     main_picture = models.URLField(max_length=2048, blank=True, help_text='URL of the main recipe image.')
@@ -90,13 +155,13 @@ class RecipeVersion(models.Model):
     # cuisine, course, dietary_tags, prep/cook/total_time_minutes, servings, difficulty, rating
     metadata = models.JSONField(default=dict, blank=True)
     # ingredients: [{ id, name, quantity, unit, preparation, notes, group, optional }]
-    ingredients = models.JSONField(default=list, blank=True)
+    ingredients = BlobJSONField(default=list, blank=True)
     # steps: [{ id, order, title, instruction, duration_minutes, temperature, timer, notes, media (pictures: list of URLs) }]
-    steps = models.JSONField(default=list, blank=True)
-    equipment = models.JSONField(default=list, blank=True)  # list of strings
+    steps = BlobJSONField(default=list, blank=True)
+    equipment = BlobJSONField(default=list, blank=True)  # list of strings
     # notes: [{ type: "tip"|"substitution"|"storage"|"variation"|"warning", content }]
-    notes_array = models.JSONField(default=list, blank=True)
-    nutrition = models.JSONField(default=None, null=True, blank=True)  # per-serving
+    notes_array = BlobJSONField(default=list, blank=True)
+    nutrition = BlobJSONField(default=None, null=True, blank=True)  # per-serving
     tags = models.JSONField(default=list, blank=True)  # list of strings
 
     # Legacy fields (kept for migration/compat; prefer metadata, notes_array, commit_message)
@@ -127,6 +192,10 @@ class Meal(models.Model):
     ended_at = models.DateTimeField(null=True, blank=True)
     current_step_index = models.PositiveIntegerField(default=0)
     log_entries = models.JSONField(default=list)
+    # Cold storage for ended meals (archive.py): compressed log_entries, which are then emptied.
+    # Read log entries through archive.meal_log_entries().
+    log_archive = models.BinaryField(null=True, blank=True)
+    log_codec = models.CharField(max_length=32, blank=True)
     session_notes = models.TextField(blank=True)
     # Actual time spent per step (seconds), by step index. e.g. [120, 90, 300] = 2min, 1.5min, 5min for steps 0,1,2.
     step_durations_seconds = models.JSONField(default=list, blank=True, null=True)
@@ -144,6 +213,30 @@ class Meal(models.Model):
         return f'Meal: {self.recipe_version} at {self.started_at}'
 
 
+class ImageAsset(models.Model):
+    """An external image URL and its local thumbnails (images.py)."""
+    PENDING, READY, FAILED = 'pending', 'ready', 'failed'
+    STATUS_CHOICES = [(PENDING, 'Pending'), (READY, 'Ready'), (FAILED, 'Failed')]
+
+    url = models.URLField(max_length=2048)
+    url_hash = models.CharField(max_length=64, unique=True)  # sha256 of url (long URLs can't be indexed)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=PENDING, db_index=True)
+    error = models.CharField(max_length=255, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    # sha256 of the image bytes; thumbnails are named '<content_hash>-<width>.<format>'
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    bytes = models.PositiveIntegerField(null=True, blank=True)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    thumbnail_widths = models.JSONField(default=list, blank=True)
+    thumbnail_format = models.CharField(max_length=8, blank=True)  # 'webp' | 'jpg'
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.url[:80]} ({self.status})'
+
+
 class ParsedRecipeCache(models.Model):
     """
     Public cache of URL → parsed recipe (from AI import). Any user requesting the same
@@ -161,3 +254,83 @@ class ParsedRecipeCache(models.Model):
 
     def __str__(self):
         return self.normalized_url[:80] + ('…' if len(self.normalized_url) > 80 else '')
+
+
+class PublicRecipe(models.Model):
+    """
+    Discovery index: one row per recipe that has a public version, denormalized from its latest
+    public version so the feed never reads version JSON. Kept in sync by recipes/discovery.py.
+    """
+    recipe = models.OneToOneField(Recipe, on_delete=models.CASCADE, related_name='public_entry')
+    version = models.ForeignKey(RecipeVersion, on_delete=models.CASCADE, related_name='+')
+    owner_username = models.CharField(max_length=150, blank=True)
+    slug = models.SlugField(max_length=255, blank=True)
+    title = models.CharField(max_length=255, blank=True)
+    description = models.CharField(max_length=500, blank=True)
+    main_picture = models.URLField(max_length=2048, blank=True)
+    language = models.CharField(max_length=8, blank=True)
+    cuisine = models.CharField(max_length=64, blank=True)
+    cuisine_key = models.CharField(max_length=64, blank=True, db_index=True)  # lowercased, for filters
+    course = models.CharField(max_length=16, blank=True, db_index=True)  # lowercased
+    tags = models.JSONField(default=list, blank=True)
+    prep_time_minutes = models.PositiveIntegerField(null=True, blank=True)
+    cook_time_minutes = models.PositiveIntegerField(null=True, blank=True)
+    total_time_minutes = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+    servings = models.PositiveIntegerField(null=True, blank=True)
+    difficulty = models.CharField(max_length=16, blank=True)
+    rating = models.FloatField(null=True, blank=True)  # metadata.rating
+    meal_rating_avg = models.FloatField(null=True, blank=True)
+    meal_rating_count = models.PositiveIntegerField(default=0)
+    published_at = models.DateTimeField()  # created_at of the indexed version
+    # max(synced_at) and the row count make up the feed cache generation (discovery.generation)
+    synced_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        ordering = ['-published_at', '-id']
+        indexes = [
+            models.Index(fields=['-published_at', '-id'], name='public_recipe_feed_idx'),
+        ]
+
+    def __str__(self):
+        return self.title or self.slug
+
+
+class PublicRecipeTag(models.Model):
+    """One row per (entry, lowercased tag) so tag filters use an index instead of scanning JSON."""
+    entry = models.ForeignKey(PublicRecipe, on_delete=models.CASCADE, related_name='tag_rows')
+    tag = models.CharField(max_length=64)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['tag', 'entry'], name='public_recipe_tag_unique'),
+        ]
+
+    def __str__(self):
+        return self.tag
+
+
+class ChangeLogEntry(models.Model):
+    """
+    Append-only log of recipe, version and meal writes per user, read by the delta sync endpoint
+    (recipes/sync.py). `deleted` rows are tombstones. The id is the sync cursor position.
+    """
+    RECIPE, VERSION, MEAL = 'recipe', 'version', 'meal'
+    KIND_CHOICES = [(RECIPE, 'Recipe'), (VERSION, 'Version'), (MEAL, 'Meal')]
+
+    id = models.BigAutoField(primary_key=True)
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+', db_index=False)
+    kind = models.CharField(max_length=8, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    deleted = models.BooleanField(default=False)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', 'id'], name='changelog_owner_cursor_idx'),
+            # compaction (superseded rows) and tombstone pruning
+            models.Index(fields=['kind', 'object_id', 'id'], name='changelog_object_idx'),
+            models.Index(fields=['deleted', 'changed_at'], name='changelog_tombstone_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id} {"deleted" if self.deleted else "changed"}'
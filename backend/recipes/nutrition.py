@@ -0,0 +1,286 @@
+"""
+Local per-serving nutrition estimates from the bundled food table (data/foods.json).
+
+- Ingredient names are matched through a character trie over every food alias (English and
+  Korean). The longest alias found in the name wins, so 'sesame oil' beats 'oil' and '양배추'
+  beats '배'; Latin and one-character aliases must match whole words ('egg' not in 'eggplant').
+- Amounts become grams via scaling.UNIT_SIZES plus the food's density (g/ml) or piece weight.
+  Ranges use their midpoint; optional and unquantified ingredients ('to taste') are skipped.
+- Totals are one column-wise pass over the rows (grams, nutrients per gram) of all matched
+  ingredients, divided by metadata.servings. Without servings there is no per-serving figure.
+- Coverage is by weight: unmatched ingredients are weighed from their unit alone (mass, volume at
+  1 g/ml, fixed-weight units), so an unmatched 2 kg brisket outweighs three matched spices. An
+  unmatched ingredient that can't be weighed ('3 dragonfruit') makes coverage 0.
+
+Results are cached by a hash of the (name, quantity, unit) set, servings and the table itself.
+"""
+
+import hashlib
+import json
+import math
+import re
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+
+from . import metrics
+from .scaling import UNIT_SIZES, canonical_unit, parse_quantity
+
+FOODS_PATH = Path(__file__).resolve().parent / 'data' / 'foods.json'
+CACHE_PREFIX = 'forklog:nutrition:v2'
+
+# Units with a fixed weight regardless of the food, in grams
+FIXED_UNIT_GRAMS = {
+    'pinch': 0.4, '꼬집': 0.4, 'dash': 0.6, 'sticks': 113.0, 'cans': 400.0, '줌': 30.0,
+    'bunch': 100.0, 'sprigs': 1.0,
+}
+# Units that count whole items (use the food's piece weight)
+COUNT_UNITS = {'', 'pieces', '개', 'cloves', 'slices', '쪽', '알', '장', '모', '대', '공기'}
+# Output rounding per column: integers for calories and sodium (schema), 1 decimal otherwise
+_INTEGER_COLUMNS = {'calories', 'sodium_mg'}
+
+_WORD_CHAR = re.compile(r'\w')
+_SPACES = re.compile(r'\s+')
+_table = None
+_table_lock = threading.Lock()
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def normalize_name(name):
+    """Lowercase, punctuation to spaces, single-spaced."""
+    if not isinstance(name, str):
+        return ''
+    text = ''.join(ch if ch.isalnum() or ch in " '-" else ' ' for ch in name.lower())
+    return _SPACES.sub(' ', text.replace('-', ' ')).strip()
+
+
+def _is_boundary(text, pos):
+    return pos < 0 or pos >= len(text) or not _WORD_CHAR.match(text[pos])
+
+
+class FoodIndex:
+    """Character trie of normalized aliases -> food row index."""
+
+    def __init__(self, foods):
+        self.root = {}
+        for i, food in enumerate(foods):
+            for alias in food['names']:
+                key = normalize_name(alias)
+                if not key:
+                    continue
+                node = self.root
+                for ch in key:
+                    node = node.setdefault(ch, {})
+                # Latin (and one-character) aliases only count as whole words
+                node[None] = (i, key.isascii() or len(key) == 1)
+
+    def match(self, name):
+        """Food row index for the longest alias occurring in name (rightmost on ties), or None."""
+        text = normalize_name(name)
+        best = None  # (length, start, index)
+        for start in range(len(text)):
+            if not _is_boundary(text, start - 1) and text[start].isascii():
+                continue
+            node = self.root
+            pos = start
+            while pos < len(text) and text[pos] in node:
+                node = node[text[pos]]
+                pos += 1
+                hit = node.get(None)
+                if hit is None:
+                    continue
+                index, whole_word = hit
+                if whole_word and not (_is_boundary(text, start - 1) and _is_boundary(text, pos)):
+                    continue
+                if best is None or (pos - start, start) >= best[:2]:
+                    best = (pos - start, start, index)
+        return best[2] if best else None
+
+
+class FoodTable:
+    def __init__(self, data):
+        self.columns = list(data['columns'])
+        self.foods = data['foods']
+        # nutrients per gram, one row per food
+        self.per_gram = [[value / 100.0 for value in food['per_100g']] for food in self.foods]
+        self.index = FoodIndex(self.foods)
+        self.digest = hashlib.sha1(json.dumps(data, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def get_table():
+    """The bundled food table, loaded and indexed once per process."""
+    global _table
+    if _table is None:
+        with _table_lock:
+            if _table is None:
+                with open(FOODS_PATH, encoding='utf-8') as f:
+                    _table = FoodTable(json.load(f))
+    return _table
+
+
+def _amount(ingredient):
+    parsed = parse_quantity(ingredient.get('quantity'))
+    if parsed is None:
+        return None
+    low, high = parsed
+    amount = float(low if high is None else (low + high) / 2)
+    return amount if amount > 0 else None
+
+
+def ingredient_grams(ingredient, food):
+    """Grams of `food` described by the ingredient's quantity/unit, or None if it can't be told."""
+    amount = _amount(ingredient)
+    if amount is None:
+        return None
+    unit = canonical_unit(ingredient.get('unit'))
+    size = UNIT_SIZES.get(unit)
+    if size:
+        dimension, per_unit = size
+        if dimension == 'mass':
+            return amount * per_unit
+        density = food.get('g_per_ml')
+        return amount * per_unit * density if density else None
+    if unit in FIXED_UNIT_GRAMS:
+        return amount * FIXED_UNIT_GRAMS[unit]
+    if unit.lower() in COUNT_UNITS and food.get('g_per_piece'):
+        return amount * food['g_per_piece']
+    return None
+
+
+def unit_grams(ingredient):
+    """Rough grams from quantity and unit alone (no food known: volumes at 1 g/ml), or None."""
+    amount = _amount(ingredient)
+    if amount is None:
+        return None
+    unit = canonical_unit(ingredient.get('unit'))
+    if unit in UNIT_SIZES:
+        return amount * UNIT_SIZES[unit][1]
+    if unit in FIXED_UNIT_GRAMS:
+        return amount * FIXED_UNIT_GRAMS[unit]
+    return None
+
+
+def _servings(metadata):
+    parsed = parse_quantity((metadata or {}).get('servings'))
+    return float(parsed[0]) if parsed and parsed[0] > 0 else None
+
+
+def compute(ingredients, servings=None):
+    """
+    Per-serving nutrition for schema-shaped ingredients. Returns (nutrition or None, report);
+    report has servings, coverage (share of the quantified weight matched), matched and unmatched.
+    nutrition is None without servings or without any matched ingredient.
+    """
+    table = get_table()
+    rows = []  # (grams, per-gram nutrient row)
+    matched, unmatched = [], []
+    matched_grams = unmatched_grams = 0.0
+    weighable = True
+    for ing in ingredients or []:
+        if not isinstance(ing, dict) or ing.get('optional') or ing.get('quantity') in (None, ''):
+            continue
+        index = table.index.match(ing.get('name'))
+        grams = ingredient_grams(ing, table.foods[index]) if index is not None else None
+        if grams is None:
+            unmatched.append(ing.get('name') or '')
+            weight = unit_grams(ing)
+            if weight is None:
+                weighable = False
+            else:
+                unmatched_grams += weight
+            continue
+        rows.append((grams, table.per_gram[index]))
+        matched_grams += grams
+        matched.append({
+            'id': ing.get('id'),
+            'name': ing.get('name'),
+            'food': table.foods[index]['names'][0],
+            'grams': round(grams, 1),
+        })
+
+    total_grams = matched_grams + unmatched_grams
+    report = {
+        'servings': servings,
+        'coverage': round(matched_grams / total_grams, 2) if weighable and total_grams else 0.0,
+        'matched': matched,
+        'unmatched': unmatched,
+    }
+    if not rows or not servings:
+        return None, report
+    nutrition = {}
+    for col, name in enumerate(table.columns):
+        total = math.fsum(grams * row[col] for grams, row in rows) / servings
+        nutrition[name] = int(round(total)) if name in _INTEGER_COLUMNS else round(total, 1)
+    return nutrition, report
+
+
+def cache_key(ingredients, servings):
+    """Hash of what the result depends on: quantified ingredients, servings and the food table."""
+    items = sorted(
+        (normalize_name(ing.get('name')), str(ing.get('quantity')), canonical_unit(ing.get('unit')),
+         bool(ing.get('optional')))
+        for ing in ingredients or [] if isinstance(ing, dict)
+    )
+    payload = json.dumps([items, servings, get_table().digest], ensure_ascii=False, separators=(',', ':'))
+    return f'{CACHE_PREFIX}:{hashlib.sha1(payload.encode()).hexdigest()}'
+
+
+def estimate(ingredients, metadata=None):
+    """compute() for a recipe's ingredients and metadata, cached in Django's cache."""
+    servings = _servings(metadata)
+    key = cache_key(ingredients, servings)
+    cache = caches['default']
+    cached = cache.get(key)
+    if cached is not None:
+        metrics.incr('nutrition.cache.hit')
+        return cached
+    metrics.incr('nutrition.cache.miss')
+    started = time.perf_counter()
+    result = compute(ingredients, servings)
+    metrics.observe_ms('nutrition.compute', (time.perf_counter() - started) * 1000)
+    cache.set(key, result, _setting('NUTRITION_CACHE_TIMEOUT', 86400))
+    return result
+
+
+def _previous(version):
+    """The version this one was derived from: its parent, else the recipe's latest other version."""
+    from .models import RecipeVersion
+
+    qs = RecipeVersion.objects.only('ingredients', 'metadata', 'nutrition')
+    if version.parent_version_id:
+        return qs.filter(pk=version.parent_version_id).first()
+    return qs.filter(recipe_id=version.recipe_id).exclude(pk=version.pk).order_by('-version_number').first()
+
+
+def apply_to_version(version):
+    """
+    Set version.nutrition to the local estimate when enough of the ingredient weight matched
+    (NUTRITION_MIN_COVERAGE). Does not save. Returns True when nutrition changed.
+    - Nutrition the client sent (missing from, or different to, the previous version's) is kept.
+    - Nutrition carried over unchanged from the previous version (voice and AI edits resend the
+      whole recipe) is recomputed when the ingredients or servings changed, and dropped when no
+      estimate can be made, rather than left describing the old ingredients.
+    """
+    if version.nutrition:
+        previous = _previous(version)
+        if previous is None or previous.nutrition != version.nutrition:
+            return False
+        if cache_key(version.ingredients, _servings(version.metadata)) == cache_key(
+            previous.ingredients, _servings(previous.metadata)
+        ):
+            return False
+        metrics.incr('nutrition.stale_recomputed')
+    nutrition, report = estimate(version.ingredients, version.metadata)
+    if nutrition is None or report['coverage'] < _setting('NUTRITION_MIN_COVERAGE', 0.6):
+        if version.nutrition:
+            version.nutrition = None
+            return True
+        return False
+    version.nutrition = nutrition
+    return True
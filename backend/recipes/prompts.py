@@ -0,0 +1,116 @@
+"""
+Prompt assembly for the model calls, with the static parts built once per process.
+
+- schemas/recipe.json is re-serialized compactly (no indentation) and cached together with the
+  system prompts that embed it; a change of the file's mtime rebuilds them on next use.
+- Recipes sent in user prompts are serialized compactly too (fewer input tokens, less CPU).
+- estimate_tokens() is a cheap offline estimate (about 4 ASCII characters per token, one token
+  per other character, which over-counts Hangul slightly). services records it per call next to
+  the real usage, and segment_report() lists the static segments.
+"""
+
+import json
+import os
+import threading
+
+from . import schema_validation
+from .import_prompts import get_recipe_import_system_prompt
+from .voice_prompts import VOICE_COMMAND_PATCH_SYSTEM_PROMPT, VOICE_COMMAND_SYSTEM_PROMPT
+
+# Cap on the schema text embedded in the voice system prompts
+VOICE_SCHEMA_MAX_CHARS = 12000
+
+_lock = threading.Lock()
+_state = {'mtime': None, 'segments': None}
+
+
+def compact_json(obj):
+    """JSON without indentation or spaces after separators; non-ASCII kept as is."""
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+
+def estimate_tokens(text):
+    """Rough token count for text (see module docstring)."""
+    if not text:
+        return 0
+    ascii_chars = len(text.encode('ascii', 'ignore'))
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+def estimate_request_tokens(system=None, messages=()):
+    """Estimated input tokens for a messages.create call (system plus text message content)."""
+    total = estimate_tokens(system) if isinstance(system, str) else 0
+    for message in messages or ():
+        content = message.get('content')
+        if isinstance(content, str):
+            total += estimate_tokens(content)
+        elif isinstance(content, list):
+            total += sum(estimate_tokens(part.get('text')) for part in content if isinstance(part, dict))
+    return total
+
+
+def _schema_mtime():
+    try:
+        return os.stat(schema_validation.schema_path()).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _build(mtime):
+    schema_text = None
+    if mtime is not None:
+        try:
+            with open(schema_validation.schema_path(), encoding='utf-8') as f:
+                schema_text = compact_json(json.load(f))
+        except (OSError, ValueError):
+            schema_text = None
+    schema_block = (
+        f"\n\nRecipe Schema (output must conform):\n{schema_text[:VOICE_SCHEMA_MAX_CHARS]}" if schema_text else ''
+    )
+    return {
+        'schema': schema_text,
+        'import.system': get_recipe_import_system_prompt(schema_text),
+        'voice_command.system': VOICE_COMMAND_SYSTEM_PROMPT + schema_block,
+        'voice_command.patch_system': VOICE_COMMAND_PATCH_SYSTEM_PROMPT + schema_block,
+    }
+
+
+def _segments():
+    mtime = _schema_mtime()
+    segments = _state['segments']
+    if segments is None or mtime != _state['mtime']:
+        with _lock:
+            if _state['segments'] is None or mtime != _state['mtime']:
+                _state['segments'] = _build(mtime)
+                _state['mtime'] = mtime
+            segments = _state['segments']
+    return segments
+
+
+def schema_text():
+    """schemas/recipe.json as compact JSON, or None when the file is missing or invalid."""
+    return _segments()['schema']
+
+
+def import_system_prompt():
+    """System prompt for recipe import, with the schema embedded."""
+    return _segments()['import.system']
+
+
+def voice_system_prompt(mode='full'):
+    """System prompt for voice commands ('full' or 'patch'), with the schema embedded."""
+    return _segments()['voice_command.patch_system' if mode == 'patch' else 'voice_command.system']
+
+
+def segment_report():
+    """{segment: {'chars', 'estimated_tokens'}} for the cached static prompt segments."""
+    return {
+        name: {'chars': len(text or ''), 'estimated_tokens': estimate_tokens(text)}
+        for name, text in _segments().items()
+    }
+
+
+def reset():
+    with _lock:
+        _state['segments'] = None
+        _state['mtime'] = None
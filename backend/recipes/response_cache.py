@@ -0,0 +1,104 @@
+"""
+Per-user cache of serialized recipe read responses (Django cache framework).
+
+Entries are keyed by user, URL kwargs and the response's ETag (conditional.py validators, computed
+from the database on every request). A write changes the ETag, so later requests miss and never
+see an older body, in any worker process and whatever the cache backend, without invalidation
+messages or per-recipe key indexes. Superseded entries simply expire (RESPONSE_CACHE_TIMEOUT).
+Endpoints are toggled with settings.RESPONSE_CACHE_ENDPOINTS.
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+from . import metrics
+
+KEY_PREFIX = 'forklog:resp'
+
+
+def _cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+
+
+def is_enabled(endpoint):
+    """True if responses for `endpoint` ('recipe_list', 'recipe_detail', 'recipe_version_detail',
+    'discovery_feed') are cached."""
+    return bool(getattr(settings, 'RESPONSE_CACHE_ENDPOINTS', {}).get(endpoint, False))
+
+
+def list_key(user_id):
+    return f'{KEY_PREFIX}:recipe_list:{user_id}'
+
+
+def detail_key(user_id, slug):
+    return f'{KEY_PREFIX}:recipe_detail:{user_id}:{slug}'
+
+
+def version_key(user_id, slug, version_id):
+    return f'{KEY_PREFIX}:recipe_version_detail:{user_id}:{slug}:{version_id}'
+
+
+def versioned_key(key, etag):
+    """key scoped to one validator ETag (quoted, as made by conditional.make_etag)."""
+    return '%s:%s' % (key, etag.strip('"'))
+
+
+def lookup(endpoint, key):
+    """Cached rendered body (bytes) or None; counts a hit or miss for `endpoint`."""
+    body = _cache().get(key)
+    metrics.incr(f'response_cache.{endpoint}.{"miss" if body is None else "hit"}')
+    return body
+
+
+def store(key, body):
+    """Store a rendered body under key."""
+    _cache().set(key, body, _timeout())
+
+
+def stats():
+    """Hit/miss counters per endpoint for this process."""
+    return metrics.snapshot('response_cache.')['counters']
+
+
+class CachedResponseMixin:
+    """
+    Serve list()/retrieve() from the response cache. Views set cache_endpoint and implement
+    get_response_cache_key() -> key, or None to skip caching for this request. Must come after
+    ConditionalGetMixin, which provides the ETag the entry is stored under; without one
+    (validators unavailable) nothing is cached.
+    """
+    cache_endpoint = None
+
+    def get_response_cache_key(self):
+        raise NotImplementedError
+
+    def _cached(self, handler, request, *args, **kwargs):
+        etag = getattr(self, 'validator_etag', None)
+        key = self.get_response_cache_key() if etag and is_enabled(self.cache_endpoint) else None
+        if key is None:
+            return handler(request, *args, **kwargs)
+        key = versioned_key(key, etag)
+        body = lookup(self.cache_endpoint, key)
+        if body is not None:
+            return HttpResponse(body, content_type='application/json')
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            if hasattr(response, 'data'):
+                # Same renderer DRF uses for the live response, so hits are byte-identical.
+                body = JSONRenderer().render(response.data)
+            else:
+                body = response.content
+            store(key, body)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._cached(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached(super().retrieve, request, *args, **kwargs)
@@ -0,0 +1,332 @@
+"""
+Deterministic recipe scaling and unit conversion over schema-shaped ingredients.
+
+- Quantities: numbers, fractions ('1/2', '1 1/2', '½'), decimals and ranges ('1-2', '2~3',
+  '1 to 2'). Parsed text is memoized and the per-ingredient arithmetic is plain floats, so a
+  100-ingredient recipe scales in well under a millisecond.
+- Rounding is relative to magnitude: to a friendly step (5 g, 1/8 tsp, ...) when that is within
+  10 %, else to two significant figures. Small amounts stay small (0.1 g saffron stays 0.1 g).
+- Units are recognised through structured_import.UNIT_ALIASES, including 큰술 (15 ml),
+  작은술 (5 ml) and 컵 / 종이컵 (200 ml).
+- system='metric' converts volumes to ml/l and weights to g/kg; system='imperial' converts to
+  teaspoons/tablespoons/cups and oz/lb. Counts, pinches and unknown units are only scaled.
+
+Numeric quantities stay numbers and string quantities stay strings (a range stays a range).
+Ingredient quantities that cannot be parsed ('약간', 'to taste') are left as they are.
+"""
+
+import copy
+import functools
+import math
+import re
+from fractions import Fraction
+
+from .structured_import import UNICODE_FRACTIONS, UNIT_ALIASES
+
+SYSTEMS = ('metric', 'imperial')
+
+# unit -> (dimension, millilitres or grams per unit)
+UNIT_SIZES = {
+    'ml': ('volume', 1.0), 'cl': ('volume', 10.0), 'dl': ('volume', 100.0), 'l': ('volume', 1000.0),
+    'teaspoons': ('volume', 4.92892), 'tablespoons': ('volume', 14.7868), 'fl oz': ('volume', 29.5735),
+    'cups': ('volume', 236.588), 'pints': ('volume', 473.176), 'quarts': ('volume', 946.353),
+    '작은술': ('volume', 5.0), '큰술': ('volume', 15.0), '컵': ('volume', 200.0), '종이컵': ('volume', 200.0),
+    'mg': ('mass', 0.001), 'g': ('mass', 1.0), 'kg': ('mass', 1000.0),
+    'oz': ('mass', 28.3495), 'lb': ('mass', 453.592),
+}
+
+_FRACTION_CHARS = {ch: Fraction(value).limit_denominator(16) for ch, value in UNICODE_FRACTIONS.items()}
+_NUM = r'(?:\d+\s*[' + ''.join(UNICODE_FRACTIONS) + r']|[' + ''.join(UNICODE_FRACTIONS) + r']|\d+\s+\d+/\d+|\d+/\d+|\d+(?:[.,]\d+)?)'
+_QUANTITY_RE = re.compile(rf'^\s*({_NUM})\s*$')
+_RANGE_RE = re.compile(rf'^\s*({_NUM})\s*(-|–|~|to)\s*({_NUM})\s*$')
+
+
+class ScalingError(ValueError):
+    """Invalid scale request (factor/servings/system)."""
+
+
+# ---------- quantities ----------
+
+
+def _to_fraction(text):
+    text = text.strip().replace(',', '.')
+    total = Fraction(0)
+    for ch, value in _FRACTION_CHARS.items():
+        if ch in text:
+            total += value
+            text = text.replace(ch, '').strip()
+    if not text:
+        return total
+    if ' ' in text:
+        whole, frac = text.split(None, 1)
+        return total + Fraction(whole) + _to_fraction(frac)
+    value = Fraction(text)
+    return total + value
+
+
+def parse_quantity(value):
+    """
+    (low, high) Fractions for a quantity value; high is None unless it is a range.
+    Returns None for missing or unparseable quantities.
+    """
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        approx = Fraction(value).limit_denominator(1000)
+        # tiny amounts (a pinch in oz) would otherwise collapse to 0 or 1/1000
+        if abs(approx - Fraction(value)) > abs(value) / 100:
+            approx = Fraction(str(value))
+        return approx, None
+    if not isinstance(value, str):
+        return None
+    try:
+        m = _RANGE_RE.match(value)
+        if m:
+            return _to_fraction(m.group(1)), _to_fraction(m.group(3))
+        m = _QUANTITY_RE.match(value)
+        if m:
+            return _to_fraction(m.group(1)), None
+    except (ValueError, ZeroDivisionError):
+        return None
+    return None
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_text(text):
+    parsed = parse_quantity(text)
+    if parsed is None:
+        return None
+    low, high = parsed
+    return float(low), (float(high) if high is not None else None)
+
+
+def _parse_float(value):
+    """parse_quantity() as floats, memoized for text; None when unparseable."""
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value), None
+    return _parse_text(value) if isinstance(value, str) else None
+
+
+def _significant(value, figures=2):
+    if value <= 0:
+        return value
+    return round(value, figures - 1 - math.floor(math.log10(value)))
+
+
+def _round_nice(value, step):
+    """value rounded to a multiple of step when that is within 10 %, else to 2 significant figures."""
+    nice = round(value / step) * step
+    if nice and abs(nice - value) <= value * 0.1:
+        return nice
+    return _significant(value)
+
+
+def _number(value):
+    """int when whole, else float rounded to 2 decimals (2 significant figures below 0.1)."""
+    value = float(value)
+    rounded = _significant(value) if 0 < value < 0.1 else round(value, 2)
+    return int(round(rounded)) if abs(rounded - round(rounded)) < 1e-9 else rounded
+
+
+def format_fraction(value):
+    """Fraction -> '1 1/2' style text (denominators up to 8), or a decimal for other values."""
+    value = Fraction(value)
+    approx = value.limit_denominator(8)
+    if not approx or abs(float(approx - value)) > 0.01:
+        return str(_number(value))
+    whole, rest = divmod(approx.numerator, approx.denominator)
+    if rest == 0:
+        return str(whole)
+    frac = f'{rest}/{approx.denominator}'
+    return f'{whole} {frac}' if whole else frac
+
+
+def _uses_fractions(text):
+    return '/' in text or any(ch in text for ch in UNICODE_FRACTIONS)
+
+
+def _format_like(original, low, high, fractions=False):
+    """Render low/high in the same type as the original quantity value."""
+    if not isinstance(original, str):
+        return _number(low)
+    fmt = format_fraction if fractions or _uses_fractions(original) else (lambda v: str(_number(v)))
+    if high is None:
+        return fmt(low)
+    m = _RANGE_RE.match(original)
+    sep = m.group(2) if m else '-'
+    sep = f' {sep} ' if sep == 'to' else sep
+    return f'{fmt(low)}{sep}{fmt(high)}'
+
+
+# ---------- units ----------
+
+
+def canonical_unit(unit):
+    """Canonical unit name ('Tbsp' -> 'tablespoons', '큰술' -> '큰술'); the input when unknown."""
+    if not isinstance(unit, str) or not unit.strip():
+        return ''
+    unit = unit.strip().rstrip('.')
+    return UNIT_ALIASES.get(unit) or UNIT_ALIASES.get(unit.lower()) or unit
+
+
+def _metric_target(dimension, base):
+    if dimension == 'volume':
+        return ('l', 1000.0) if base >= 1000 else ('ml', 1.0)
+    return ('kg', 1000.0) if base >= 1000 else ('g', 1.0)
+
+
+def _imperial_target(dimension, base):
+    if dimension == 'volume':
+        if base >= UNIT_SIZES['cups'][1] / 4:
+            return 'cups', UNIT_SIZES['cups'][1]
+        if base >= UNIT_SIZES['tablespoons'][1]:
+            return 'tablespoons', UNIT_SIZES['tablespoons'][1]
+        return 'teaspoons', UNIT_SIZES['teaspoons'][1]
+    if base >= UNIT_SIZES['lb'][1]:
+        return 'lb', UNIT_SIZES['lb'][1]
+    return 'oz', UNIT_SIZES['oz'][1]
+
+
+def _round_metric(value, unit):
+    if unit in ('l', 'kg'):
+        return round(value, 2)
+    if value >= 100:
+        return _round_nice(value, 5)
+    if value >= 10:
+        return _round_nice(value, 1)
+    return _round_nice(value, 0.5)
+
+
+def _round_imperial(value, unit):
+    return _round_nice(value, 0.25 if unit in ('oz', 'lb') else 0.125)
+
+
+def convert(low, high, unit, system):
+    """
+    Convert a (low, high) float quantity in `unit` to `system`.
+    Returns (low, high, new_unit), or None when the unit has no known size.
+    """
+    size = UNIT_SIZES.get(unit)
+    if not size:
+        return None
+    dimension, per_unit = size
+    base_low = low * per_unit
+    if system == 'metric':
+        new_unit, new_size = _metric_target(dimension, base_low)
+        rounder = _round_metric
+    else:
+        new_unit, new_size = _imperial_target(dimension, base_low)
+        rounder = _round_imperial
+    new_low = rounder(base_low / new_size, new_unit)
+    new_high = rounder(high * per_unit / new_size, new_unit) if high is not None else None
+    return new_low, new_high, new_unit
+
+
+# ---------- recipes ----------
+
+
+@functools.lru_cache(maxsize=8192)
+def _scale_quantity(original, unit, factor, system):
+    """(new quantity, new unit or None) for one quantity; None when it can't be parsed. Memoized."""
+    parsed = _parse_float(original)
+    if parsed is None:
+        return None
+    low, high = parsed
+    low, high = low * factor, (high * factor if high is not None else None)
+    unit = canonical_unit(unit)
+    new_unit = None
+    fractions = False
+    if system and unit in UNIT_SIZES:
+        low, high, new_unit = convert(low, high, unit, system)
+        fractions = system == 'imperial'
+    elif unit not in UNIT_SIZES and low:
+        # counts (eggs, cloves, 개) and pinches: quarter units where close enough
+        low = _round_nice(low, 0.25)
+        high = _round_nice(high, 0.25) if high else high
+    quantity = _format_like(original, low, high, fractions) if isinstance(original, str) else _number(low)
+    return quantity, new_unit
+
+
+def scale_ingredient(ingredient, factor, system=None):
+    """
+    Scaled (and optionally converted) copy of one ingredient dict (nested values are shared).
+    Returns (ingredient, changed: bool); unparseable quantities are returned unchanged.
+    """
+    item = dict(ingredient)
+    original = item.get('quantity')
+    unit = item.get('unit')
+    if isinstance(original, bool) or not isinstance(original, (str, int, float)):
+        return item, False
+    result = _scale_quantity(original, unit if isinstance(unit, str) else None, float(factor), system)
+    if result is None:
+        return item, False
+    item['quantity'], new_unit = result
+    if new_unit is not None:
+        item['unit'] = new_unit
+    return item, True
+
+
+def scale_recipe(recipe, factor=None, servings=None, system=None):
+    """
+    Scale a schema-shaped recipe dict by factor, or to `servings` (needs metadata.servings),
+    and optionally convert units to system ('metric' | 'imperial').
+    Returns (new_recipe, report); recipe is not modified. Raises ScalingError on bad input.
+    """
+    if system is not None and system not in SYSTEMS:
+        raise ScalingError(f'system must be one of: {", ".join(SYSTEMS)}')
+    metadata = (recipe.get('metadata') or {}) if isinstance(recipe, dict) else {}
+    current = parse_quantity(metadata.get('servings'))
+    current_servings = current[0] if current else None
+    if servings is not None:
+        target = parse_quantity(servings)
+        if not target or target[0] <= 0:
+            raise ScalingError('servings must be a positive number')
+        if not current_servings:
+            raise ScalingError('recipe has no servings to scale from; pass factor instead')
+        factor = target[0] / current_servings
+    elif factor is not None:
+        parsed = parse_quantity(factor)
+        if not parsed or parsed[1] is not None or parsed[0] <= 0:
+            raise ScalingError('factor must be a positive number')
+        factor = parsed[0]
+    else:
+        factor = Fraction(1)
+    if factor == 1 and system is None:
+        raise ScalingError('provide factor, servings or system')
+
+    # everything but ingredients is copied whole; each ingredient is copied by scale_ingredient
+    updated = copy.deepcopy({k: v for k, v in recipe.items() if k != 'ingredients'})
+    warnings = []
+    changed = 0
+    ingredients = []
+    float_factor = float(factor)
+    for ing in recipe.get('ingredients') or []:
+        if not isinstance(ing, dict):
+            ingredients.append(copy.deepcopy(ing))
+            continue
+        new, ok = scale_ingredient(ing, float_factor, system)
+        if ok:
+            changed += 1
+        elif ing.get('quantity') not in (None, ''):
+            warnings.append(f'Could not scale "{ing.get("name", "?")}" ({ing.get("quantity")}); adjust it manually.')
+        ingredients.append(new)
+    updated['ingredients'] = ingredients
+
+    new_metadata = updated.setdefault('metadata', {})
+    if current_servings:
+        new_metadata['servings'] = max(1, round(current_servings * factor))  # schema: integer
+    if factor != 1:
+        warnings.append('Step instructions may still mention the original amounts.')
+    report = {
+        'factor': _number(factor),
+        'system': system,
+        'servings': {
+            'from': _number(current_servings) if current_servings else None,
+            'to': new_metadata.get('servings') if current_servings else None,
+        },
+        'scaled_ingredients': changed,
+        'warnings': warnings,
+    }
+    return updated, report
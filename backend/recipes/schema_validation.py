@@ -0,0 +1,273 @@
+"""
+Validate recipe content against schemas/recipe.json on write and on AI results.
+
+The schema is compiled once per process into nested closures (no schema walking per call).
+Supported keywords are the ones the schema uses: type, enum, minimum, maximum, required,
+properties, additionalProperties (false) and items; annotations are ignored.
+
+The app stores a few shapes the published schema is stricter about, so a compiled copy is
+relaxed in COMPAT_OVERRIDES, and optional properties also accept null (AI replies and the
+editor send null for empty fields).
+
+RECIPE_SCHEMA_VALIDATION: 'enforce' rejects invalid content, 'warn' only counts it under
+schema.<source>.invalid, 'off' skips validation.
+"""
+
+import copy
+import json
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+from . import metrics
+
+# Top-level recipe keys stored on RecipeVersion (notes -> notes_array)
+CONTENT_FIELDS = ('metadata', 'ingredients', 'steps', 'equipment', 'notes', 'nutrition', 'tags')
+MAX_ERRORS = 20
+
+# (key path under the schema's top-level properties, keys to replace)
+COMPAT_OVERRIDES = [
+    # '1 1/2' and ranges like '2-3' stay strings (see scaling)
+    (('ingredients', 'items', 'properties', 'quantity'), {'type': ['number', 'string']}),
+    # step pictures are stored as plain URLs
+    (('steps', 'items', 'properties', 'media', 'items'), {'type': ['string', 'object']}),
+    # the title is also kept in RecipeVersion.title
+    (('metadata',), {'required': []}),
+]
+
+_TYPE_CHECKS = {
+    'object': lambda v: isinstance(v, dict),
+    'array': lambda v: isinstance(v, list),
+    'string': lambda v: isinstance(v, str),
+    'integer': lambda v: (isinstance(v, int) and not isinstance(v, bool)) or (isinstance(v, float) and v.is_integer()),
+    'number': lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    'boolean': lambda v: isinstance(v, bool),
+    'null': lambda v: v is None,
+}
+
+# Types that need no bool/float special-casing
+_PLAIN_TYPES = {'object': dict, 'array': list, 'string': str, 'boolean': bool}
+
+_validators = None
+_lock = threading.Lock()
+
+
+class SchemaValidationError(ValueError):
+    """Recipe content does not match schemas/recipe.json; errors is a list of 'path: message'."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__('; '.join(errors[:5]) + (f' (+{len(errors) - 5} more)' if len(errors) > 5 else ''))
+
+
+def schema_path():
+    """schemas/recipe.json at the repo root (BASE_DIR is backend/)."""
+    return Path(settings.BASE_DIR).parent / 'schemas' / 'recipe.json'
+
+
+def _mode():
+    return getattr(settings, 'RECIPE_SCHEMA_VALIDATION', 'enforce')
+
+
+# ---------- compiler ----------
+
+
+def _path(path):
+    """Render a lazy path: paths are built as (parent, key) tuples and only turned into text for errors."""
+    if not isinstance(path, tuple):
+        return path
+    parent, key = path
+    parent = _path(parent)
+    if isinstance(key, int):
+        return f'{parent}[{key}]'
+    return f'{parent}.{key}' if parent else key
+
+
+def _compile_type(types):
+    names = [types] if isinstance(types, str) else list(types)
+    label = ' or '.join(names)
+    if len(names) == 1 and names[0] in _PLAIN_TYPES:
+        cls = _PLAIN_TYPES[names[0]]
+        return (lambda value: isinstance(value, cls)), label
+    tests = tuple(_TYPE_CHECKS[name] for name in names)
+    if len(tests) == 1:
+        return tests[0], label
+    return (lambda value: any(t(value) for t in tests)), label
+
+
+def compile_schema(schema, nullable_optional=True):
+    """
+    Compile a (sub)schema into validate(value, path, errors) -> None, appending 'path: message'
+    strings to errors. With nullable_optional, properties not listed in required may be null.
+    """
+    type_test, type_label = _compile_type(schema['type']) if 'type' in schema else (None, '')
+    checks = []
+
+    if 'enum' in schema:
+        allowed = list(schema['enum'])
+        shown = ', '.join(map(str, allowed))
+
+        def check_enum(value, path, errors):
+            if value not in allowed:
+                errors.append(f'{_path(path)}: must be one of {shown}')
+        checks.append(check_enum)
+
+    if 'minimum' in schema or 'maximum' in schema:
+        low, high = schema.get('minimum'), schema.get('maximum')
+
+        def check_range(value, path, errors):
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                return
+            if low is not None and value < low:
+                errors.append(f'{_path(path)}: must be >= {low}')
+            if high is not None and value > high:
+                errors.append(f'{_path(path)}: must be <= {high}')
+        checks.append(check_range)
+
+    if schema.get('required'):
+        required = tuple(schema['required'])
+
+        def check_required(value, path, errors):
+            if isinstance(value, dict):
+                for key in required:
+                    if key not in value:
+                        errors.append(f'{_path((path, key))}: required')
+        checks.append(check_required)
+
+    if 'properties' in schema:
+        required = set(schema.get('required') or ())
+        props = {}
+        for key, sub in schema['properties'].items():
+            props[key] = (compile_schema(sub, nullable_optional), nullable_optional and key not in required)
+        closed = schema.get('additionalProperties') is False
+
+        def check_properties(value, path, errors):
+            if not isinstance(value, dict):
+                return
+            for key, item in value.items():
+                entry = props.get(key)
+                if entry is None:
+                    if closed:
+                        errors.append(f'{_path((path, key))}: unexpected property')
+                    continue
+                validate, nullable = entry
+                if item is None and nullable:
+                    continue
+                validate(item, (path, key), errors)
+        checks.append(check_properties)
+
+    if isinstance(schema.get('items'), dict):
+        validate_item = compile_schema(schema['items'], nullable_optional)
+
+        def check_items(value, path, errors):
+            if isinstance(value, list):
+                for i, item in enumerate(value):
+                    validate_item(item, (path, i), errors)
+        checks.append(check_items)
+
+    if type_test is None:
+        checks = tuple(checks)
+
+        def validate(value, path, errors):
+            for check in checks:
+                check(value, path, errors)
+    elif not checks:
+        # leaf: most nodes are plain typed scalars
+        def validate(value, path, errors):
+            if not type_test(value):
+                errors.append(f'{_path(path)}: expected {type_label}')
+    else:
+        checks = tuple(checks)
+
+        def validate(value, path, errors):
+            if not type_test(value):
+                errors.append(f'{_path(path)}: expected {type_label}')
+                return
+            for check in checks:
+                check(value, path, errors)
+    return validate
+
+
+# ---------- recipe schema ----------
+
+
+def _apply_compat(schema):
+    schema = copy.deepcopy(schema)
+    for path, replacement in COMPAT_OVERRIDES:
+        node = schema['properties']
+        for key in path:
+            node = node[key]
+        node.update(replacement)
+    return schema
+
+
+def load_validators():
+    """{field: validate} for CONTENT_FIELDS, compiled once per process; {} without the schema file."""
+    global _validators
+    if _validators is None:
+        with _lock:
+            if _validators is None:
+                try:
+                    with open(schema_path(), encoding='utf-8') as f:
+                        schema = _apply_compat(json.load(f))
+                except (OSError, ValueError):
+                    _validators = {}
+                else:
+                    props = schema.get('properties') or {}
+                    _validators = {key: compile_schema(props[key]) for key in CONTENT_FIELDS if key in props}
+    return _validators
+
+
+def reset():
+    """Recompile on next use (tests, schema edits)."""
+    global _validators
+    with _lock:
+        _validators = None
+
+
+def validate_recipe(data):
+    """
+    Errors for the content fields present in a schema-shaped recipe dict (missing keys are not
+    checked; nutrition may be null). Returns a list of 'path: message' strings, empty when valid.
+    """
+    if not isinstance(data, dict):
+        return ['recipe: expected object']
+    validators = load_validators()
+    errors = []
+    for key in CONTENT_FIELDS:
+        if key in data and key in validators:
+            value = data[key]
+            if value is None and key == 'nutrition':
+                continue
+            validators[key](value, key, errors)
+            if len(errors) >= MAX_ERRORS:
+                break
+    return errors[:MAX_ERRORS]
+
+
+def check(data, source):
+    """
+    Validate per RECIPE_SCHEMA_VALIDATION: raise SchemaValidationError ('enforce') or only
+    count the failure ('warn'). source names the caller in metrics, e.g. 'write', 'import'.
+    """
+    if _mode() == 'off':
+        return
+    start = time.perf_counter()
+    errors = validate_recipe(data)
+    metrics.observe_ms('schema.validate', (time.perf_counter() - start) * 1000)
+    if not errors:
+        return
+    metrics.incr(f'schema.{source}.invalid')
+    if _mode() == 'enforce':
+        raise SchemaValidationError(errors)
+
+
+def errors_by_field(errors):
+    """{'ingredients': ['ingredients[0].id: required', ...], ...} for DRF ValidationError."""
+    grouped = {}
+    for error in errors:
+        field = error.split(':', 1)[0].split('.', 1)[0].split('[', 1)[0]
+        grouped.setdefault(field, []).append(error)
+    return grouped
@@ -2,7 +2,10 @@
 DRF serializers for recipes API. Output matches schemas/recipe.json where applicable.
 """
 
+from django.db import models
 from rest_framework import serializers
+from . import archive, images, schema_validation
+from .fast_render import version_instance_to_dict
 from .models import Recipe, RecipeVersion, Meal
 
 
@@ -38,6 +41,42 @@ def _get_notes_display(v):
     return []
 
 
+def validate_recipe_content(data):
+    """
+    Check the schema-shaped content keys present in data against schemas/recipe.json;
+    raises serializers.ValidationError keyed by field. A legacy notes string is not checked.
+    """
+    content = {key: data[key] for key in schema_validation.CONTENT_FIELDS if key in data}
+    if isinstance(content.get('notes'), str):
+        del content['notes']
+    try:
+        schema_validation.check(content, 'write')
+    except schema_validation.SchemaValidationError as e:
+        raise serializers.ValidationError(schema_validation.errors_by_field(e.errors))
+
+
+class ThumbnailListSerializer(serializers.ListSerializer):
+    """Looks up thumbnails for all items in one query; the child's image_urls(obj) lists them."""
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        urls = [url for item in items for url in self.child.image_urls(item)]
+        known = self.context.setdefault('thumbnails', {})
+        found = images.thumbnail_map(urls)
+        known.update({url: found.get(url) for url in urls})
+        return super().to_representation(items)
+
+
+def _thumbnails(serializer, url):
+    """{width: url} for an image URL from the list's prefetched map, else one lookup; None if not ready."""
+    if not url:
+        return None
+    known = serializer.context.get('thumbnails')
+    if known is not None and url in known:
+        return known[url]
+    return images.thumbnail_map([url]).get(url)
+
+
 class NotesArrayField(serializers.Field):
     """Read/write field: schema 'notes' array <-> model notes_array."""
 
@@ -69,6 +108,11 @@ class RecipeVersionSerializer(serializers.ModelSerializer):
     def get_version(self, obj):
         return _version_to_schema_version(obj)
 
+    def validate(self, attrs):
+        # Only fields the client sent (metadata has a default; PATCH sends a subset)
+        validate_recipe_content({key: attrs[key] for key in attrs if key in self.initial_data})
+        return attrs
+
     def to_representation(self, obj):
         data = super().to_representation(obj)
         meta = data.get('metadata') or {}
@@ -93,14 +137,25 @@ class RecipeVersionSerializer(serializers.ModelSerializer):
 class RecipeVersionListSerializer(serializers.ModelSerializer):
     """Light version for listing."""
     version = serializers.SerializerMethodField()
+    main_picture_thumbnails = serializers.SerializerMethodField()
 
     class Meta:
         model = RecipeVersion
-        fields = ['id', 'version_number', 'version', 'title', 'main_picture', 'owner', 'is_public', 'created_at', 'commit_message', 'message']
+        fields = [
+            'id', 'version_number', 'version', 'title', 'main_picture', 'main_picture_thumbnails', 'owner',
+            'is_public', 'created_at', 'commit_message', 'message',
+        ]
+        list_serializer_class = ThumbnailListSerializer
+
+    def image_urls(self, obj):
+        return [obj.main_picture] if obj.main_picture else []
 
     def get_version(self, obj):
         return _version_to_schema_version(obj)
 
+    def get_main_picture_thumbnails(self, obj):
+        return _thumbnails(self, obj.main_picture)
+
 
 class RecipeCreateSerializer(serializers.ModelSerializer):
     """Minimal serializer for POST /recipes/; only name and slug to avoid rejecting extra body fields."""
@@ -121,8 +176,11 @@ class RecipeSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Recipe
-        fields = ['id', 'uuid', 'owner', 'owner_username', 'name', 'slug', 'created_at', 'updated_at', 'versions', 'latest_version']
-        read_only_fields = ['owner']
+        fields = [
+            'id', 'uuid', 'owner', 'owner_username', 'name', 'slug', 'forked_from', 'created_at', 'updated_at',
+            'versions', 'latest_version',
+        ]
+        read_only_fields = ['owner', 'forked_from']
 
     def get_id(self, obj):
         return str(obj.uuid)
@@ -131,7 +189,7 @@ class RecipeSerializer(serializers.ModelSerializer):
         v = obj.versions.first()
         if not v:
             return None
-        return RecipeVersionSerializer(v).data
+        return version_instance_to_dict(v)
 
 
 class RecipeListSerializer(serializers.ModelSerializer):
@@ -144,6 +202,11 @@ class RecipeListSerializer(serializers.ModelSerializer):
         model = Recipe
         fields = ['id', 'uuid', 'owner', 'owner_username', 'name', 'slug', 'updated_at', 'latest_version']
         read_only_fields = ['owner']
+        list_serializer_class = ThumbnailListSerializer
+
+    def image_urls(self, obj):
+        v = obj.versions.first()
+        return [v.main_picture] if v and v.main_picture else []
 
     def get_id(self, obj):
         return str(obj.uuid)
@@ -152,13 +215,22 @@ class RecipeListSerializer(serializers.ModelSerializer):
         v = obj.versions.first()
         if not v:
             return None
-        return RecipeVersionListSerializer(v).data
+        return RecipeVersionListSerializer(v, context=self.context).data
+
+
+class MealLogEntriesField(serializers.JSONField):
+    """log_entries, read back from cold storage when the meal's log was archived."""
+
+    def get_attribute(self, instance):
+        return archive.meal_log_entries(instance)
 
 
 class MealSerializer(serializers.ModelSerializer):
+    log_entries = MealLogEntriesField(required=False)
     recipe_version_detail = RecipeVersionSerializer(source='recipe_version', read_only=True)
     recipe_slug = serializers.SerializerMethodField()
     recipe_name = serializers.SerializerMethodField()
+    photo_thumbnails = serializers.SerializerMethodField()
 
     class Meta:
         model = Meal
@@ -167,9 +239,17 @@ class MealSerializer(serializers.ModelSerializer):
             'recipe_slug', 'recipe_name',
             'started_at', 'ended_at', 'current_step_index',
             'log_entries', 'session_notes', 'step_durations_seconds',
-            'rating', 'modifications', 'photos',
+            'rating', 'modifications', 'photos', 'photo_thumbnails',
         ]
         read_only_fields = ['started_at']
+        list_serializer_class = ThumbnailListSerializer
+
+    def image_urls(self, obj):
+        return [url for url in obj.photos or [] if isinstance(url, str)]
+
+    def get_photo_thumbnails(self, obj):
+        # aligned with photos; null where a photo has no thumbnail yet
+        return [_thumbnails(self, url) if isinstance(url, str) else None for url in obj.photos or []]
 
     def get_recipe_slug(self, obj):
         return obj.recipe_version.recipe.slug if obj.recipe_version_id else None
@@ -177,6 +257,33 @@ class MealSerializer(serializers.ModelSerializer):
     def get_recipe_name(self, obj):
         return obj.recipe_version.recipe.name if obj.recipe_version_id else None
 
+    def update(self, instance, validated_data):
+        if 'log_entries' in validated_data and instance.log_archive is not None:
+            if validated_data['log_entries']:
+                # a new log replaces the archived one
+                validated_data.update(log_archive=None, log_codec='')
+            else:
+                # an archived meal's log_entries column is already []; keep the archive
+                del validated_data['log_entries']
+        return super().update(instance, validated_data)
+
+
+class SyncRecipeSerializer(serializers.ModelSerializer):
+    """Recipe fields for delta sync (recipes/sync.py); versions are synced separately, by id."""
+
+    class Meta:
+        model = Recipe
+        fields = ['id', 'uuid', 'name', 'slug', 'forked_from', 'created_at', 'updated_at']
+        read_only_fields = fields
+
+
+class SyncMealSerializer(MealSerializer):
+    """MealSerializer without the nested version, which delta sync already sends on its own."""
+    recipe_version_detail = None
+
+    class Meta(MealSerializer.Meta):
+        fields = [f for f in MealSerializer.Meta.fields if f != 'recipe_version_detail']
+
 
 class MealCreateSerializer(serializers.ModelSerializer):
     class Meta:
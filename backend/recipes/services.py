@@ -1,48 +1,136 @@
 """
 AI services: Claude for cooking guidance and recipe import.
-Uses schemas/recipe.json and import_prompts for webpage import.
+Uses schemas/recipe.json and import_prompts for webpage import (assembled and cached by prompts.py).
 """
 
 import json
 import re
+import time
 from datetime import datetime
-from pathlib import Path
 from urllib.parse import urlparse, urlunparse
 
 from django.conf import settings
-from docling.document_converter import DocumentConverter
 
 from .models import RecipeVersion, ParsedRecipeCache
 from .import_prompts import (
-    get_recipe_import_system_prompt,
     user_prompt_webpage,
     KOREAN_RECIPE_INSTRUCTIONS,
 )
-from .voice_prompts import VOICE_COMMAND_SYSTEM_PROMPT, get_voice_command_user_prompt
+from .voice_prompts import (
+    get_voice_command_user_prompt,
+    get_voice_command_patch_user_prompt,
+)
+from .voice_local import try_local_voice_command
+from .voice_patch import PatchError, apply_recipe_patch
+from .structured_import import extract_structured_recipe, missing_fields
+from .fetcher import FetchError, fetch_page, store_markdown
+from .json_stream import IncrementalObjectParser
+from . import ai_client, docling_pool, metrics, model_routing, prompts, schema_validation
+from .schema_validation import SchemaValidationError
+
+
+# docling and anthropic are heavy imports (seconds, hundreds of MB with docling's models), so they are
+# only imported on first use. Processes that only serve CRUD never load them.
+
+
+def preload_heavy_dependencies():
+    """
+    Import anthropic and docling (or start the docling worker pool) now instead of on the first
+    import/AI request.
+    Called from RecipesConfig.ready() when settings.PRELOAD_AI_DEPENDENCIES is set (dedicated import workers).
+    """
+    start = time.perf_counter()
+    if getattr(settings, 'DOCLING_WORKERS', 2) > 0:
+        docling_pool.warm()
+    else:
+        try:
+            import docling.document_converter  # noqa: F401
+        except ImportError:
+            pass
+    try:
+        import anthropic  # noqa: F401
+    except ImportError:
+        pass
+    metrics.observe_ms('startup.preload_ai_dependencies', (time.perf_counter() - start) * 1000)
 
 
 def _get_client():
-    """Lazy Anthropic client; returns None if no API key."""
-    if not getattr(settings, 'ANTHROPIC_API_KEY', None):
-        return None
+    """Shared Anthropic client (see ai_client.py); returns None if no API key."""
     try:
-        from anthropic import Anthropic
-        return Anthropic()
+        return ai_client.get_client()
     except Exception:
         return None
 
 
-def _load_recipe_schema():
-    """Load schemas/recipe.json from repo root if present."""
+def _create_message(client, metric, route=None, **kwargs):
+    """
+    ai_client.create_message (circuit breaker, jittered retries on overload) with latency and
+    token usage recorded under `metric` (see metrics.py), and also under `metric.route.<route>`
+    when the model was picked by model_routing.
+    """
+    start = time.perf_counter()
+    response = ai_client.create_message(client, **kwargs)
+    _record_call(metric, route, kwargs, response, start)
+    return response
+
+
+def _record_call(metric, route, kwargs, response, start):
+    """Latency since `start`, estimated and actual token usage of one model call (see _create_message)."""
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    estimated = prompts.estimate_request_tokens(kwargs.get('system'), kwargs.get('messages'))
+    usage = getattr(response, 'usage', None)
+    for name in (metric, f'{metric}.route.{route}') if route else (metric,):
+        metrics.observe_ms(f'{name}.latency', elapsed_ms)
+        metrics.incr(f'{name}.calls')
+        metrics.incr(f'{name}.estimated_input_tokens', estimated)
+        if usage is not None:
+            metrics.incr(f'{name}.input_tokens', getattr(usage, 'input_tokens', 0) or 0)
+            metrics.incr(f'{name}.output_tokens', getattr(usage, 'output_tokens', 0) or 0)
+
+
+def _response_text(response):
+    return response.content[0].text if response.content else ''
+
+
+def _parse_checked(text, validate=None):
+    """Parse a JSON reply; validate(data) may raise SchemaValidationError."""
+    data = _parse_recipe_response_text(text)
+    if validate is not None:
+        validate(data)
+    return data
+
+
+def _check_import(data):
+    schema_validation.check(data, 'import')
+
+
+def _check_updated_recipe(data):
+    if isinstance(data, dict) and data.get('updated_recipe'):
+        schema_validation.check(data['updated_recipe'], 'voice_command')
+
+
+def _routed_json_message(client, task, input_chars, validate=None, **kwargs):
+    """
+    Call the model model_routing picks for task and parse its JSON reply. A parse failure (or a
+    SchemaValidationError from validate(data)) on a smaller tier is retried once on
+    AI_FALLBACK_TIER; a failure there is raised.
+    """
+    tier, model = model_routing.choose(task, input_chars)
+    response = _create_message(client, task, route=tier, model=model, **kwargs)
     try:
-        base = Path(settings.BASE_DIR)
-        # ForkLog/schemas/recipe.json when BASE_DIR is backend
-        schema_path = base.parent / 'schemas' / 'recipe.json'
-        if schema_path.exists():
-            return schema_path.read_text(encoding='utf-8')
-    except Exception:
-        pass
-    return None
+        data = _parse_checked(_response_text(response), validate)
+    except (json.JSONDecodeError, SchemaValidationError):
+        model_routing.record(task, tier, False)
+        fallback = model_routing.fallback_tier()
+        if tier == fallback:
+            raise
+        metrics.incr(f'{task}.route.fallback')
+        response = _create_message(client, task, route=fallback, model=model_routing.model_for(fallback), **kwargs)
+        data = _parse_checked(_response_text(response), validate)
+        model_routing.record(task, fallback, True)
+        return data
+    model_routing.record(task, tier, True)
+    return data
 
 
 def _normalize_import_result(data):
@@ -61,6 +149,7 @@ def _normalize_import_result(data):
         'notes': data.get('notes', []),
         'nutrition': data.get('nutrition'),
         'tags': data.get('tags', []),
+        **({'main_picture': data['main_picture']} if data.get('main_picture') else {}),
     }
 
 
@@ -142,10 +231,12 @@ def ai_guide_message(message, recipe_version=None, current_step_index=0, log_ent
         else:
             parts.append({'type': 'text', 'text': f'Assistant: {content}\n'})
     parts.append({'type': 'text', 'text': f'User: {message}\n\nAssistant:'})
+    tier, model = model_routing.choose('guide', sum(len(p['text']) for p in parts))
 
     try:
-        response = client.messages.create(
-            model='claude-sonnet-4-20250514',
+        response = _create_message(
+            client, 'guide', route=tier,
+            model=model,
             max_tokens=1024,
             system=system,
             messages=[{'role': 'user', 'content': parts}],
@@ -188,27 +279,134 @@ def _parse_recipe_response_text(text: str):
 def _fetch_and_preprocess_url(url: str):
     """
     Fetch URL and preprocess content for AI recipe extraction using docling.
-    - Uses docling DocumentConverter to fetch and parse HTML into structured content
-      (removes ads, nav, boilerplate) and export as Markdown.
-    - Limits input to 50k bytes; output truncated to 50k chars for token limits.
+    - The page comes from fetcher.fetch_page (pooled session, size/time caps, on-disk cache with
+      ETag/Last-Modified revalidation); a cached conversion is reused when the page is unchanged.
+    - docling DocumentConverter parses the fetched HTML bytes into structured content
+      (removes ads, nav, boilerplate) and exports Markdown. Conversion runs in docling_pool's
+      worker processes (timeout, memory cap, worker recycling).
+    - Output truncated to 50k chars for token limits.
     Returns (content_str, error_str). error_str is None on success.
     """
     try:
-        converter = DocumentConverter()
-        result = converter.convert(source=url, )
-        content = result.document.export_to_markdown()
-        if len(content) > 50000:
-            content = content[:50000]
-        return content.strip(), None
+        page = fetch_page(url)
+        if page.markdown is not None:
+            return page.markdown, None
+        content = docling_pool.convert_html(page.raw)
+        store_markdown(url, content)
+        return content, None
     except Exception as e:
         return '', str(e)
 
 
+def _fetch_html(url: str):
+    """Fetch raw HTML (shares fetcher's page cache with _fetch_and_preprocess_url). Returns (html_str, error_str)."""
+    try:
+        return fetch_page(url).text, None
+    except FetchError as e:
+        return '', str(e)
+
+
+def _needs_translation(data, language):
+    """Non-English recipes get translated_title/notes from the model (see KOREAN_RECIPE_INSTRUCTIONS)."""
+    metadata = data.get('metadata') or {}
+    recipe_language = (metadata.get('language') or language or 'en').lower()
+    return recipe_language != 'en' and not metadata.get('translated_title')
+
+
+def _stamp_webpage_source(data, url):
+    """Ensure metadata.source marks this as a webpage import of url, imported now."""
+    metadata = data.get('metadata') or {}
+    if 'source' not in metadata:
+        metadata['source'] = {
+            'type': 'webpage',
+            'url': url,
+            'imported_at': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'),
+        }
+    else:
+        metadata['source']['type'] = 'webpage'
+        metadata['source']['url'] = url
+        metadata['source']['imported_at'] = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')
+    data['metadata'] = metadata
+    return data
+
+
+def _store_parsed_recipe(normalized_url, url, result):
+    """Store in public cache for future requests."""
+    if normalized_url:
+        ParsedRecipeCache.objects.update_or_create(
+            normalized_url=normalized_url,
+            defaults={'url': url[:2048], 'result': result},
+        )
+
+
+def prepare_webpage_import(url: str, language: str = 'en'):
+    """
+    Fetch url and get it ready for the model, without touching the database (safe to run in a
+    worker process). Returns (kind, payload):
+    - ('result', normalized_dict): the page embeds a complete schema.org Recipe, no model needed
+    - ('content', text): compact structured JSON (translation only) or docling markdown for the model
+    - ('error', message)
+    """
+    html, _html_err = _fetch_html(url)
+    structured = extract_structured_recipe(html, url) if html else None
+    if structured and not missing_fields(structured):
+        if not _needs_translation(structured, language):
+            metrics.incr('import.structured.complete')
+            return 'result', _normalize_import_result(_stamp_webpage_source(structured, url))
+        metrics.incr('import.structured.translate')
+        return 'content', json.dumps(structured, ensure_ascii=False, separators=(',', ':'))
+    metrics.incr('import.structured.miss')
+    content, fetch_err = _fetch_and_preprocess_url(url)
+    if fetch_err:
+        return 'error', f'Could not fetch URL: {fetch_err}'
+    if not content.strip():
+        return 'error', 'URL returned no content to parse.'
+    return 'content', content
+
+
+def extract_recipe_with_ai(url: str, content: str, language: str = 'en'):
+    """
+    Ask the model to turn preprocessed page content into a schema-shaped recipe.
+    Returns (normalized_dict, error_string); nothing is cached here.
+    """
+    client = _get_client()
+    if not client:
+        return None, 'ANTHROPIC_API_KEY not set. Add it to .env to enable recipe import.'
+
+    system_prompt = prompts.import_system_prompt()
+    user_prompt = user_prompt_webpage(url, content, language)
+    if language and language.lower() == 'ko':
+        user_prompt += KOREAN_RECIPE_INSTRUCTIONS
+
+    # Truncate content to avoid token limits
+    content = content[:50000] if len(content) > 50000 else content
+
+    try:
+        data = _routed_json_message(
+            client, 'import.webpage', len(user_prompt),
+            validate=_check_import,
+            max_tokens=4096,
+            system=system_prompt,
+            messages=[{'role': 'user', 'content': user_prompt}],
+        )
+        # Ensure source is set for webpage
+        return _normalize_import_result(_stamp_webpage_source(data, url)), None
+    except json.JSONDecodeError as e:
+        return None, f'Failed to parse recipe JSON: {e}'
+    except SchemaValidationError as e:
+        return None, f'Parsed recipe does not match the schema: {e}'
+    except Exception as e:
+        return None, str(e)
+
+
 def ai_import_recipe_from_webpage(url: str, content: str, language: str = 'en'):
     """
     Import recipe from webpage content. If the URL was parsed before (any user), return
     cached result from ParsedRecipeCache. Otherwise call AI, store result in cache, then return.
-    If content is empty, fetches the URL and preprocesses the HTML for AI parsing.
+    If content is empty, fetches the URL. When the page embeds a complete schema.org Recipe
+    (JSON-LD or microdata), it is used directly and docling and the model are skipped; a complete
+    but non-English recipe is sent to the model as compact JSON only for translation. Otherwise the
+    HTML is preprocessed for AI parsing.
     Returns (normalized_dict, error_string). Normalized dict has name, metadata, title, ingredients, steps, equipment, notes, nutrition, tags.
     """
     normalized_url = _normalize_url_for_cache(url)
@@ -221,60 +419,134 @@ def ai_import_recipe_from_webpage(url: str, content: str, language: str = 'en'):
     if content is None or (isinstance(content, str) and not content.strip()):
         if not url or not url.strip():
             return None, 'URL is required when content is empty.'
-        content, fetch_err = _fetch_and_preprocess_url(url)
-        if fetch_err:
-            return None, f'Could not fetch URL: {fetch_err}'
-        if not content.strip():
-            return None, 'URL returned no content to parse.'
+        kind, payload = prepare_webpage_import(url, language)
+        if kind == 'error':
+            return None, payload
+        if kind == 'result':
+            _store_parsed_recipe(normalized_url, url, payload)
+            return payload, None
+        content = payload
+
+    result, err = extract_recipe_with_ai(url, content, language)
+    if err:
+        return None, err
+    _store_parsed_recipe(normalized_url, url, result)
+    return result, None
+
+
+def _stream_message(client, metric, route=None, **kwargs):
+    """
+    Generator over text deltas (ai_client.stream_text) with the same metrics as _create_message,
+    plus time to first delta under `metric.first_delta`. Returns the final message.
+    """
+    start = time.perf_counter()
+    first = True
+    stream = ai_client.stream_text(client, **kwargs)
+    while True:
+        try:
+            text = next(stream)
+        except StopIteration as stop:
+            response = stop.value
+            break
+        if first:
+            metrics.observe_ms(f'{metric}.first_delta', (time.perf_counter() - start) * 1000)
+            first = False
+        yield text
+    _record_call(metric, route, kwargs, response, start)
+    return response
+
+
+_STREAM_ITEM_EVENTS = {'ingredients': 'ingredient', 'steps': 'step'}
+
+
+def stream_import_recipe_from_webpage(url: str, content: str, language: str = 'en'):
+    """
+    Streaming variant of ai_import_recipe_from_webpage. Yields (event, data) pairs:
+    - ('status', {'stage': 'fetch' | 'model'})
+    - ('metadata', {...}), ('ingredient', {...}) per ingredient, ('step', {...}) per step and
+      ('section', {'key', 'value'}) for the other top-level keys, as the model writes them
+    - finally ('result', normalized_dict) or ('error', {'error': message})
+    Cache hits and complete schema.org pages yield only the result. The final result is parsed
+    from the complete reply (with the usual larger-model fallback) and stored in ParsedRecipeCache.
+    """
+    normalized_url = _normalize_url_for_cache(url)
+    if normalized_url:
+        cached = ParsedRecipeCache.objects.filter(normalized_url=normalized_url).first()
+        if cached:
+            yield 'result', dict(cached.result)
+            return
 
+    if content is None or (isinstance(content, str) and not content.strip()):
+        if not url or not url.strip():
+            yield 'error', {'error': 'URL is required when content is empty.'}
+            return
+        yield 'status', {'stage': 'fetch'}
+        kind, payload = prepare_webpage_import(url, language)
+        if kind == 'error':
+            yield 'error', {'error': payload}
+            return
+        if kind == 'result':
+            _store_parsed_recipe(normalized_url, url, payload)
+            yield 'result', payload
+            return
+        content = payload
 
     client = _get_client()
     if not client:
-        return None, 'ANTHROPIC_API_KEY not set. Add it to .env to enable recipe import.'
+        yield 'error', {'error': 'ANTHROPIC_API_KEY not set. Add it to .env to enable recipe import.'}
+        return
 
-    schema_json = _load_recipe_schema()
-    system_prompt = get_recipe_import_system_prompt(schema_json)
+    system_prompt = prompts.import_system_prompt()
     user_prompt = user_prompt_webpage(url, content, language)
     if language and language.lower() == 'ko':
         user_prompt += KOREAN_RECIPE_INSTRUCTIONS
+    kwargs = {
+        'max_tokens': 4096,
+        'system': system_prompt,
+        'messages': [{'role': 'user', 'content': user_prompt}],
+    }
+    tier, model = model_routing.choose('import.webpage', len(user_prompt))
+    yield 'status', {'stage': 'model'}
 
-    # Truncate content to avoid token limits
-    content = content[:50000] if len(content) > 50000 else content
-
+    parser = IncrementalObjectParser(item_keys=_STREAM_ITEM_EVENTS)
+    chunks = []
     try:
-        response = client.messages.create(
-            model='claude-sonnet-4-20250514',
-            max_tokens=4096,
-            system=system_prompt,
-            messages=[{'role': 'user', 'content': user_prompt}],
-        )
-        text = response.content[0].text if response.content else ''
-        data = _parse_recipe_response_text(text)
-        # Ensure source is set for webpage
-        metadata = data.get('metadata') or {}
-        if 'source' not in metadata:
-            metadata['source'] = {
-                'type': 'webpage',
-                'url': url,
-                'imported_at': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'),
-            }
-        else:
-            metadata['source']['type'] = 'webpage'
-            metadata['source']['url'] = url
-            metadata['source']['imported_at'] = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')
-        data['metadata'] = metadata
-        result = _normalize_import_result(data)
-        # Store in public cache for future requests
-        if normalized_url:
-            ParsedRecipeCache.objects.update_or_create(
-                normalized_url=normalized_url,
-                defaults={'url': url[:2048], 'result': result},
+        for text in _stream_message(client, 'import.webpage', route=tier, model=model, **kwargs):
+            chunks.append(text)
+            for kind, key, value in parser.feed(text):
+                if kind == 'item':
+                    yield _STREAM_ITEM_EVENTS[key], value
+                elif key == 'metadata':
+                    yield 'metadata', value
+                elif key not in _STREAM_ITEM_EVENTS:
+                    yield 'section', {'key': key, 'value': value}
+        try:
+            data = _parse_checked(''.join(chunks), _check_import)
+            model_routing.record('import.webpage', tier, True)
+        except (json.JSONDecodeError, SchemaValidationError):
+            model_routing.record('import.webpage', tier, False)
+            if tier == model_routing.fallback_tier():
+                raise
+            metrics.incr('import.webpage.route.fallback')
+            fallback = model_routing.fallback_tier()
+            response = _create_message(
+                client, 'import.webpage', route=fallback, model=model_routing.model_for(fallback), **kwargs
             )
-        return result, None
+            data = _parse_checked(_response_text(response), _check_import)
+            model_routing.record('import.webpage', fallback, True)
     except json.JSONDecodeError as e:
-        return None, f'Failed to parse recipe JSON: {e}'
+        yield 'error', {'error': f'Failed to parse recipe JSON: {e}'}
+        return
+    except SchemaValidationError as e:
+        yield 'error', {'error': f'Parsed recipe does not match the schema: {e}'}
+        return
     except Exception as e:
-        return None, str(e)
+        yield 'error', {'error': str(e)}
+        return
+
+    result = _normalize_import_result(_stamp_webpage_source(data, url))
+    _store_parsed_recipe(normalized_url, url, result)
+    yield 'result', result
 
 
 def ai_import_recipe(source):
@@ -305,16 +577,17 @@ Also include a top-level "name" (short name for the recipe). Use empty string or
 '''
 
     try:
-        response = client.messages.create(
-            model='claude-sonnet-4-20250514',
+        data = _routed_json_message(
+            client, 'import.source', len(prompt),
+            validate=_check_import,
             max_tokens=2048,
             messages=[{'role': 'user', 'content': prompt}],
         )
-        text = response.content[0].text if response.content else ''
-        data = _parse_recipe_response_text(text)
         return _normalize_import_result(data), None
     except json.JSONDecodeError as e:
         return None, f'Failed to parse recipe JSON: {e}'
+    except SchemaValidationError as e:
+        return None, f'Parsed recipe does not match the schema: {e}'
     except Exception as e:
         return None, str(e)
 
@@ -353,35 +626,76 @@ def recipe_version_to_recipe_json(recipe_version):
     }
 
 
-def process_voice_command(voice_transcription, current_recipe, conversation_history=None):
+def process_voice_command(voice_transcription, current_recipe, conversation_history=None, mode=None):
     """
     Process a voice command to modify a recipe. Calls Claude with voice prompt templates.
     Returns (result_dict, error_string). result_dict has action, intent, updated_recipe (when applicable),
     commit_message, confirmation, questions, version_bump, and optional target/changes/warnings.
+    Simple, unambiguous commands (scaling, one ingredient quantity, one step duration) are applied
+    locally by voice_local without calling Claude; those results carry handled_locally=True.
+    mode: "full" (model returns the whole updated_recipe) or "patch" (model returns an id-addressed
+    change set that is applied here; falls back to full if the patch is invalid).
+    Defaults to settings.VOICE_COMMAND_MODE.
     """
+    recipe_dict = current_recipe if isinstance(current_recipe, dict) else recipe_version_to_recipe_json(current_recipe)
+    if getattr(settings, 'VOICE_LOCAL_COMMANDS', True):
+        local = try_local_voice_command(voice_transcription, recipe_dict)
+        if local is not None:
+            try:
+                _check_updated_recipe(local)
+            except SchemaValidationError:
+                # e.g. the stored recipe was already off-schema; let the model produce a valid one
+                metrics.incr('voice_command.local.invalid')
+            else:
+                metrics.incr('voice_command.local')
+                return local, None
+    metrics.incr('voice_command.model')
+
     client = _get_client()
     if not client:
         return None, 'ANTHROPIC_API_KEY not set. Add it to .env to enable voice commands.'
 
-    schema_json = _load_recipe_schema()
-    system_prompt = VOICE_COMMAND_SYSTEM_PROMPT
-    if schema_json:
-        system_prompt += f"\n\nRecipe Schema (output must conform):\n{schema_json[:12000]}"
-    recipe_dict = current_recipe if isinstance(current_recipe, dict) else recipe_version_to_recipe_json(current_recipe)
-    user_prompt = get_voice_command_user_prompt(voice_transcription, recipe_dict, schema_json=None)
+    mode = mode or getattr(settings, 'VOICE_COMMAND_MODE', 'full')
+
+    if mode == 'patch':
+        messages = list(conversation_history or [])
+        messages.append({'role': 'user', 'content': get_voice_command_patch_user_prompt(voice_transcription, recipe_dict)})
+        try:
+            data = _routed_json_message(
+                client, 'voice_command.patch', len(messages[-1]['content']),
+                max_tokens=2048,
+                system=prompts.voice_system_prompt('patch'),
+                messages=messages,
+            )
+            if not isinstance(data, dict):
+                raise PatchError('reply must be an object')
+            patch = data.get('patch')
+            if patch is not None and data.get('action') != 'request_clarification':
+                data['updated_recipe'] = apply_recipe_patch(recipe_dict, patch)
+                _check_updated_recipe(data)
+            if data.get('updated_recipe') and not data.get('version_bump'):
+                data['version_bump'] = determine_version_bump(
+                    data.get('action', ''), data.get('intent', '')
+                )
+            return data, None
+        except (json.JSONDecodeError, PatchError, SchemaValidationError):
+            # Invalid change set: answer with a full-document round-trip instead of failing.
+            metrics.incr('voice_command.patch.fallback')
+        except Exception as e:
+            return None, str(e)
 
+    user_prompt = get_voice_command_user_prompt(voice_transcription, recipe_dict, schema_json=None)
     messages = list(conversation_history or [])
     messages.append({'role': 'user', 'content': user_prompt})
 
     try:
-        response = client.messages.create(
-            model='claude-sonnet-4-20250514',
+        data = _routed_json_message(
+            client, 'voice_command.full', len(user_prompt),
+            validate=_check_updated_recipe,
             max_tokens=4096,
-            system=system_prompt,
+            system=prompts.voice_system_prompt('full'),
             messages=messages,
         )
-        text = response.content[0].text if response.content else ''
-        data = _parse_recipe_response_text(text)
         if data.get('updated_recipe') and not data.get('version_bump'):
             data['version_bump'] = determine_version_bump(
                 data.get('action', ''), data.get('intent', '')
@@ -389,6 +703,8 @@ def process_voice_command(voice_transcription, current_recipe, conversation_hist
         return data, None
     except json.JSONDecodeError as e:
         return None, f'Failed to parse voice command response: {e}'
+    except SchemaValidationError as e:
+        return None, f'Updated recipe does not match the schema: {e}'
     except Exception as e:
         return None, str(e)
 
@@ -0,0 +1,119 @@
+"""
+Model signal handlers: keep derived state (token auth cache, computed nutrition,
+discovery index, image thumbnails, sync change log) in sync with writes.
+Connected in RecipesConfig.ready().
+
+The per-version work lives in before_versions_created / after_versions_written and
+after_recipes_created, which the handlers call with one instance and bulk writers that skip
+signals (batch_import) call with the whole batch, so both paths stay in step.
+"""
+
+from collections import defaultdict
+
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from . import authentication, discovery, images, nutrition, sync
+from .models import ChangeLogEntry, Meal, PublicRecipe, Recipe, RecipeVersion
+
+
+def before_versions_created(versions):
+    """Work due before new versions are inserted: computed nutrition (when none was supplied)."""
+    if getattr(settings, 'NUTRITION_AUTO_COMPUTE', True):
+        for version in versions:
+            nutrition.apply_to_version(version)
+
+
+def after_versions_written(versions):
+    """Work due after versions are inserted or updated: discovery index, image thumbnails, change log."""
+    recipe_ids = {v.recipe_id for v in versions}
+    # private edits only matter when they can change which version (if any) is listed
+    listed = {v.recipe_id for v in versions if v.is_public}
+    listed |= set(PublicRecipe.objects.filter(recipe_id__in=recipe_ids - listed).values_list('recipe_id', flat=True))
+    discovery.sync_recipes(listed)
+    images.ingest([url for v in versions for url in images.version_image_urls(v)])
+    # versions sync to the recipe's owner (the one whose lists show them)
+    owners = dict(Recipe.objects.filter(pk__in=recipe_ids).values_list('pk', 'owner_id'))
+    by_owner = defaultdict(list)
+    for v in versions:
+        by_owner[owners.get(v.recipe_id) or v.owner_id].append(v.pk)
+    for owner_id, ids in by_owner.items():
+        sync.record(ChangeLogEntry.VERSION, owner_id, ids)
+
+
+def after_recipes_created(recipes):
+    """Work due after new recipes are inserted: the change log."""
+    by_owner = defaultdict(list)
+    for recipe in recipes:
+        by_owner[recipe.owner_id].append(recipe.pk)
+    for owner_id, ids in by_owner.items():
+        sync.record(ChangeLogEntry.RECIPE, owner_id, ids)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved_discovery(sender, instance, created=False, **kwargs):
+    # name/slug are denormalized into the discovery entry (a delete cascades to it)
+    if not created and PublicRecipe.objects.filter(recipe_id=instance.pk).exists():
+        discovery.sync_recipe(instance.pk)
+
+
+@receiver(pre_save, sender=RecipeVersion)
+def recipe_version_created(sender, instance, raw=False, **kwargs):
+    if instance._state.adding and not raw:
+        before_versions_created([instance])
+
+
+@receiver(post_save, sender=RecipeVersion)
+def recipe_version_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        after_versions_written([instance])
+
+
+@receiver(post_delete, sender=RecipeVersion)
+def recipe_version_discovery(sender, instance, **kwargs):
+    if instance.is_public or PublicRecipe.objects.filter(recipe_id=instance.recipe_id).exists():
+        discovery.sync_recipe(instance.recipe_id)
+
+
+@receiver([post_save, post_delete], sender=Meal)
+def meal_changed(sender, instance, **kwargs):
+    discovery.refresh_ratings(instance.recipe_version_id)
+
+
+@receiver(post_save, sender=Meal)
+def meal_images(sender, instance, **kwargs):
+    if instance.photos:
+        images.ingest(instance.photos)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Meal)
+def record_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        sync.record_instance(instance)
+
+
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=RecipeVersion)
+@receiver(post_delete, sender=Meal)
+def record_deletion(sender, instance, **kwargs):
+    sync.record_instance(instance, deleted=True)
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    authentication.invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def user_saved(sender, instance, **kwargs):
+    # any change (is_active, is_staff, is_superuser, username, ...) must not be served stale
+    authentication.invalidate_user(instance.pk)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def user_deleted(sender, instance, **kwargs):
+    authentication.invalidate_user(instance.pk)
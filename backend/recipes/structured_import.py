@@ -0,0 +1,444 @@
+"""
+Deterministic recipe extraction from schema.org structured data (JSON-LD, microdata).
+
+Most recipe sites embed a schema.org Recipe. When it is complete we can build the ForkLog
+import shape directly (the dict _normalize_import_result expects) without docling or Claude.
+"""
+
+import json
+import re
+from html import unescape
+from html.parser import HTMLParser
+
+UNICODE_FRACTIONS = {
+    '½': 0.5, '⅓': 1 / 3, '⅔': 2 / 3, '¼': 0.25, '¾': 0.75, '⅕': 0.2, '⅖': 0.4, '⅗': 0.6,
+    '⅘': 0.8, '⅙': 1 / 6, '⅚': 5 / 6, '⅛': 0.125, '⅜': 0.375, '⅝': 0.625, '⅞': 0.875,
+}
+
+# Written form -> normalized unit (import prompt: "tbsp" -> "tablespoons", "tsp" -> "teaspoons").
+UNIT_ALIASES = {
+    'cup': 'cups', 'cups': 'cups', 'c': 'cups',
+    'tablespoon': 'tablespoons', 'tablespoons': 'tablespoons', 'tbsp': 'tablespoons', 'tbs': 'tablespoons',
+    'tbl': 'tablespoons', 'T': 'tablespoons',
+    'teaspoon': 'teaspoons', 'teaspoons': 'teaspoons', 'tsp': 'teaspoons', 't': 'teaspoons',
+    'g': 'g', 'gram': 'g', 'grams': 'g', 'kg': 'kg', 'kilogram': 'kg', 'kilograms': 'kg',
+    'mg': 'mg', 'ml': 'ml', 'milliliter': 'ml', 'milliliters': 'ml', 'millilitre': 'ml', 'millilitres': 'ml',
+    'l': 'l', 'liter': 'l', 'liters': 'l', 'litre': 'l', 'litres': 'l', 'dl': 'dl', 'cl': 'cl',
+    'oz': 'oz', 'ounce': 'oz', 'ounces': 'oz', 'fl oz': 'fl oz', 'lb': 'lb', 'lbs': 'lb', 'pound': 'lb',
+    'pounds': 'lb', 'pinch': 'pinch', 'pinches': 'pinch', 'dash': 'dash', 'dashes': 'dash',
+    'clove': 'cloves', 'cloves': 'cloves', 'can': 'cans', 'cans': 'cans', 'slice': 'slices',
+    'slices': 'slices', 'piece': 'pieces', 'pieces': 'pieces', 'stick': 'sticks', 'sticks': 'sticks',
+    'bunch': 'bunch', 'bunches': 'bunch', 'sprig': 'sprigs', 'sprigs': 'sprigs', 'quart': 'quarts',
+    'quarts': 'quarts', 'qt': 'quarts', 'pint': 'pints', 'pints': 'pints', 'pt': 'pints',
+    '큰술': '큰술', '작은술': '작은술', '컵': '컵', '종이컵': '종이컵', '개': '개', '줌': '줌', '꼬집': '꼬집',
+}
+
+COURSES = {
+    'appetizer': 'appetizer', 'starter': 'appetizer', 'main': 'main', 'main course': 'main',
+    'main dish': 'main', 'dinner': 'main', 'lunch': 'main', 'entree': 'main', 'side': 'side',
+    'side dish': 'side', 'dessert': 'dessert', 'beverage': 'beverage', 'drink': 'beverage',
+    'drinks': 'beverage', 'snack': 'snack',
+}
+
+DIETS = {
+    'VeganDiet': 'vegan', 'VegetarianDiet': 'vegetarian', 'GlutenFreeDiet': 'gluten-free',
+    'LowLactoseDiet': 'dairy-free',
+}
+
+LANGUAGES = ('en', 'ko', 'ja', 'es', 'fr', 'de', 'it', 'zh', 'pt')
+
+_NUMBER = r'(?:\d*\s*[' + ''.join(UNICODE_FRACTIONS) + r']|\d+\s+\d+/\d+|\d+/\d+|\d+(?:[.,]\d+)?)'
+_QUANTITY_RE = re.compile(rf'^\s*({_NUMBER})(?:\s*(?:-|–|to)\s*({_NUMBER}))?\s*')
+_UNIT_RE = re.compile(
+    r'^(' + '|'.join(re.escape(u) for u in sorted(UNIT_ALIASES, key=len, reverse=True)) + r')\.?(?=\s|$|[^\w])',
+    re.I,
+)
+_DURATION_RE = re.compile(
+    r'^P(?:(\d+(?:\.\d+)?)D)?(?:T(?:(\d+(?:\.\d+)?)H)?(?:(\d+(?:\.\d+)?)M)?(?:(\d+(?:\.\d+)?)S)?)?$', re.I
+)
+_TAG_RE = re.compile(r'<[^>]+>')
+
+
+def _parse_number(text):
+    text = text.strip().replace(',', '.')
+    total = 0.0
+    for ch, value in UNICODE_FRACTIONS.items():
+        if ch in text:
+            total += value
+            text = text.replace(ch, '').strip()
+    if not text:
+        return total
+    if ' ' in text:
+        whole, frac = text.split(None, 1)
+        return total + float(whole) + _parse_number(frac)
+    if '/' in text:
+        num, den = text.split('/', 1)
+        return total + (float(num) / float(den) if float(den) else 0.0)
+    return total + float(text)
+
+
+def _clean(value):
+    if value is None:
+        return ''
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, list):
+        value = ' '.join(_clean(v) for v in value)
+    if isinstance(value, dict):
+        value = value.get('text') or value.get('name') or ''
+    text = unescape(_TAG_RE.sub(' ', str(value)))
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def _number_out(value):
+    return int(value) if abs(value - round(value)) < 1e-9 else round(value, 3)
+
+
+def parse_ingredient_line(line, index):
+    """'2 1/2 cups flour, sifted' -> {id, name, quantity, unit, preparation}."""
+    text = _clean(line)
+    item = {'id': f'ing_{index:03d}', 'name': text}
+    m = _QUANTITY_RE.match(text)
+    rest = text
+    if m:
+        try:
+            low = _parse_number(m.group(1))
+            high = _parse_number(m.group(2)) if m.group(2) else None
+        except ValueError:
+            low, high = None, None
+        if low is not None:
+            item['quantity'] = _number_out(low)
+            if high is not None:
+                item['notes'] = f'{_number_out(low)}-{_number_out(high)}'
+            rest = text[m.end():]
+    u = _UNIT_RE.match(rest)
+    unit = (UNIT_ALIASES.get(u.group(1)) or UNIT_ALIASES.get(u.group(1).lower())) if u else None
+    if unit and 'quantity' in item:
+        item['unit'] = unit
+        rest = rest[u.end():].strip()
+        rest = re.sub(r'^of\s+', '', rest)
+        if 'notes' in item:
+            item['notes'] += f' {item["unit"]}'
+    name, sep, preparation = rest.partition(',')
+    item['name'] = name.strip() or text
+    if sep and preparation.strip():
+        item['preparation'] = preparation.strip()
+    return item
+
+
+def parse_duration_minutes(value):
+    """ISO 8601 duration ('PT1H30M') -> minutes (int); None if missing/unparseable."""
+    if not isinstance(value, str):
+        return None
+    m = _DURATION_RE.match(value.strip())
+    if not m or not any(m.groups()):
+        return None
+    days, hours, minutes, seconds = (float(g) if g else 0.0 for g in m.groups())
+    total = days * 1440 + hours * 60 + minutes + seconds / 60
+    return int(round(total))
+
+
+def _parse_servings(value):
+    if isinstance(value, list):
+        for v in value:
+            parsed = _parse_servings(v)
+            if parsed:
+                return parsed
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    m = re.search(r'\d+', str(value or ''))
+    return int(m.group()) if m else None
+
+
+def _image_url(value):
+    if isinstance(value, list):
+        return _image_url(value[0]) if value else ''
+    if isinstance(value, dict):
+        return value.get('url') or value.get('contentUrl') or ''
+    return value if isinstance(value, str) else ''
+
+
+def _first_text(value):
+    if isinstance(value, list):
+        return _clean(value[0]) if value else ''
+    return _clean(value)
+
+
+def _is_recipe(node):
+    types = node.get('@type') if isinstance(node, dict) else None
+    if isinstance(types, str):
+        types = [types]
+    return bool(types) and any(str(t).split('/')[-1] == 'Recipe' for t in types)
+
+
+def _find_recipe_node(data):
+    """Depth-first search for a schema.org Recipe object in decoded JSON-LD."""
+    if isinstance(data, list):
+        for item in data:
+            found = _find_recipe_node(item)
+            if found:
+                return found
+    elif isinstance(data, dict):
+        if _is_recipe(data):
+            return data
+        for key in ('@graph', 'mainEntity', 'mainEntityOfPage', 'itemListElement'):
+            if key in data:
+                found = _find_recipe_node(data[key])
+                if found:
+                    return found
+    return None
+
+
+def _flatten_instructions(value):
+    """recipeInstructions (string, list, HowToStep, HowToSection) -> [(title, text, image_urls)]."""
+    out = []
+    if isinstance(value, str):
+        lines = [ln for ln in re.split(r'\n+|<br\s*/?>|</p>|</li>', value) if _clean(ln)]
+        return [('', _clean(ln), []) for ln in lines]
+    if isinstance(value, list):
+        for item in value:
+            out.extend(_flatten_instructions(item))
+        return out
+    if isinstance(value, dict):
+        if 'itemListElement' in value:
+            return _flatten_instructions(value['itemListElement'])
+        text = _clean(value.get('text') or value.get('description') or '')
+        name = _clean(value.get('name') or '')
+        if not text and name:
+            text, name = name, ''
+        if name and (text.startswith(name) or name.rstrip('.') in text):
+            name = ''
+        image = _image_url(value.get('image'))
+        if text:
+            out.append((name, text, [image] if image else []))
+    return out
+
+
+def recipe_node_to_import_data(node, url=''):
+    """Map a schema.org Recipe dict to the import shape (see services._normalize_import_result)."""
+    metadata = {'title': _clean(node.get('name'))}
+    description = _clean(node.get('description'))
+    if description:
+        metadata['description'] = description
+    language = str(node.get('inLanguage') or '').split('-')[0].lower()
+    if language in LANGUAGES:
+        metadata['language'] = language
+    author = node.get('author')
+    source = {'type': 'webpage', 'url': url}
+    author_name = _first_text(author) if author else ''
+    if author_name:
+        source['author'] = author_name
+    metadata['source'] = source
+    cuisine = _first_text(node.get('recipeCuisine'))
+    if cuisine:
+        metadata['cuisine'] = cuisine
+    category = node.get('recipeCategory')
+    for cat in (category if isinstance(category, list) else [category]):
+        course = COURSES.get(_clean(cat).lower())
+        if course:
+            metadata['course'] = course
+            break
+    for key, field in (('prepTime', 'prep_time_minutes'), ('cookTime', 'cook_time_minutes'), ('totalTime', 'total_time_minutes')):
+        minutes = parse_duration_minutes(node.get(key))
+        if minutes is not None:
+            metadata[field] = minutes
+    servings = _parse_servings(node.get('recipeYield'))
+    if servings:
+        metadata['servings'] = servings
+    rating = node.get('aggregateRating')
+    if isinstance(rating, dict):
+        try:
+            metadata['rating'] = round(float(rating.get('ratingValue')), 2)
+        except (TypeError, ValueError):
+            pass
+    diets = node.get('suitableForDiet')
+    diet_tags = []
+    for diet in (diets if isinstance(diets, list) else [diets]):
+        tag = DIETS.get(str(diet or '').split('/')[-1])
+        if tag and tag not in diet_tags:
+            diet_tags.append(tag)
+    if diet_tags:
+        metadata['dietary_tags'] = diet_tags
+
+    raw_ingredients = node.get('recipeIngredient') or node.get('ingredients') or []
+    if isinstance(raw_ingredients, str):
+        raw_ingredients = [raw_ingredients]
+    ingredients = [
+        parse_ingredient_line(line, i)
+        for i, line in enumerate((ln for ln in raw_ingredients if _clean(ln)), start=1)
+    ]
+
+    steps = []
+    for i, (title, text, media) in enumerate(_flatten_instructions(node.get('recipeInstructions')), start=1):
+        step = {'id': f'step_{i:03d}', 'order': i, 'instruction': text}
+        if title:
+            step['title'] = title
+        if media:
+            step['media'] = media
+        steps.append(step)
+
+    keywords = node.get('keywords')
+    if isinstance(keywords, str):
+        keywords = [k.strip() for k in keywords.split(',')]
+    tags = [k for k in (_clean(k) for k in (keywords or [])) if k][:20]
+
+    nutrition = None
+    raw_nutrition = node.get('nutrition')
+    if isinstance(raw_nutrition, dict):
+        nutrition = {}
+        for key, field, cast in (
+            ('calories', 'calories', int), ('proteinContent', 'protein_g', float),
+            ('carbohydrateContent', 'carbs_g', float), ('fatContent', 'fat_g', float),
+            ('fiberContent', 'fiber_g', float), ('sodiumContent', 'sodium_mg', int),
+        ):
+            m = re.search(r'\d+(?:\.\d+)?', str(raw_nutrition.get(key) or ''))
+            if m:
+                nutrition[field] = cast(float(m.group()))
+        nutrition = nutrition or None
+
+    return {
+        'name': metadata['title'],
+        'metadata': metadata,
+        'ingredients': ingredients,
+        'steps': steps,
+        'equipment': [_clean(t) for t in (node.get('tool') or []) if _clean(t)] if isinstance(node.get('tool'), list) else [],
+        'notes': [],
+        'nutrition': nutrition,
+        'tags': tags,
+        'main_picture': _image_url(node.get('image')),
+    }
+
+
+class _StructuredDataParser(HTMLParser):
+    """Collects JSON-LD script bodies and schema.org/Recipe microdata properties."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.json_ld = []
+        self._in_json_ld = False
+        self._buf = []
+        # microdata
+        self.microdata = {}
+        self._scope_stack = []  # one entry per open tag: 'recipe', 'other' or None
+        self._prop_stack = []  # (prop, tag depth) of itemprops collecting text
+        self._depth = 0
+
+    def _in_recipe(self):
+        scopes = [s for s in self._scope_stack if s]
+        return bool(scopes) and scopes[-1] == 'recipe'
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'script' and (attrs.get('type') or '').lower() == 'application/ld+json':
+            self._in_json_ld = True
+            self._buf = []
+            return
+        if tag in ('meta', 'link', 'img', 'br', 'hr', 'input', 'source'):
+            if tag == 'br' and self._prop_stack:
+                self._prop_stack[-1][2].append('\n')
+            prop = attrs.get('itemprop')
+            if prop and self._in_recipe():
+                value = attrs.get('content') or attrs.get('href') or attrs.get('src') or ''
+                self.microdata.setdefault(prop, []).append(value)
+            return
+        self._depth += 1
+        prop = attrs.get('itemprop')
+        scope = None
+        if 'itemscope' in attrs:
+            scope = 'recipe' if (attrs.get('itemtype') or '').rstrip('/').endswith('schema.org/Recipe') else 'other'
+        if prop and self._in_recipe() and scope != 'other':
+            if attrs.get('content'):
+                self.microdata.setdefault(prop, []).append(attrs['content'])
+            else:
+                self._prop_stack.append([prop, self._depth, []])
+        elif prop == 'recipeInstructions' and self._in_recipe():
+            self._prop_stack.append([prop, self._depth, []])
+        self._scope_stack.append(scope)
+
+    def handle_endtag(self, tag):
+        if tag == 'script' and self._in_json_ld:
+            self.json_ld.append(''.join(self._buf))
+            self._in_json_ld = False
+            return
+        if tag in ('meta', 'link', 'img', 'br', 'hr', 'input', 'source'):
+            return
+        if tag in ('li', 'p', 'div') and self._prop_stack:
+            self._prop_stack[-1][2].append('\n')
+        while self._prop_stack and self._prop_stack[-1][1] >= self._depth:
+            prop, _depth, parts = self._prop_stack.pop()
+            text = ''.join(parts)
+            # Keep line breaks in instructions so they split into steps; collapse elsewhere.
+            if prop == 'recipeInstructions':
+                text = re.sub(r'[ \t\r\f\v]+', ' ', text).strip()
+            else:
+                text = re.sub(r'\s+', ' ', text).strip()
+            if text:
+                self.microdata.setdefault(prop, []).append(text)
+        if self._scope_stack:
+            self._scope_stack.pop()
+        self._depth = max(0, self._depth - 1)
+
+    def handle_data(self, data):
+        if self._in_json_ld:
+            self._buf.append(data)
+        elif self._prop_stack:
+            self._prop_stack[-1][2].append(data)
+
+
+def _microdata_to_node(props):
+    if not props.get('name'):
+        return None
+    node = {'@type': 'Recipe'}
+    for key, values in props.items():
+        if key in ('recipeIngredient', 'ingredients', 'recipeInstructions', 'image', 'keywords', 'recipeCategory'):
+            node[key] = values
+        else:
+            node[key] = values[0]
+    if 'ratingValue' in props:
+        node['aggregateRating'] = {'ratingValue': props['ratingValue'][0]}
+    return node
+
+
+def extract_recipe_node(html):
+    """The schema.org Recipe in html as a dict (JSON-LD preferred, then microdata); None if absent."""
+    if not html:
+        return None
+    parser = _StructuredDataParser()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception:
+        return None
+    for raw in parser.json_ld:
+        try:
+            data = json.loads(raw.strip().rstrip(';'), strict=False)
+        except ValueError:
+            continue
+        node = _find_recipe_node(data)
+        if node:
+            return node
+    return _microdata_to_node(parser.microdata)
+
+
+def missing_fields(data):
+    """Names of required import fields the structured data did not provide."""
+    missing = []
+    if not (data.get('metadata') or {}).get('title'):
+        missing.append('title')
+    if not data.get('ingredients'):
+        missing.append('ingredients')
+    if not data.get('steps'):
+        missing.append('steps')
+    return missing
+
+
+def extract_structured_recipe(html, url=''):
+    """
+    Import-shaped dict from structured data in html, or None if there is no Recipe.
+    Check missing_fields() on the result before skipping the AI extraction.
+    """
+    node = extract_recipe_node(html)
+    if not node:
+        return None
+    return recipe_node_to_import_data(node, url)
@@ -0,0 +1,233 @@
+"""
+Delta sync for offline-capable clients: recipes, versions and meals changed since a cursor.
+
+- Every create, update and delete of a Recipe, RecipeVersion or Meal appends a ChangeLogEntry for
+  the owning user (signals.py; bulk writers that skip signals, like batch_import, call its
+  after_recipes_created / after_versions_written). Deletes append tombstones. Entries join the writer's transaction, if it has one.
+- page() reads the user's entries after the cursor through the (owner, id) index and loads the
+  current state of the objects they name, so a sync costs O(changes), not O(dataset). An object
+  changed several times is sent once per page, as it is now.
+- The cursor is the last entry id served plus a stamp no later than any entry after it. Entries
+  newer than SYNC_SETTLE_SECONDS are held back until then: two concurrent log inserts can still
+  commit out of id order, so a fresh tail could gain a lower id. Since the insert is its own short
+  autocommit statement, the window only has to outlast that insert, not the writer's transaction.
+- compact() drops entries superseded by a newer one for the same object and tombstones older than
+  SYNC_TOMBSTONE_DAYS (manage.py compact_change_log). Cursors issued before that horizon could have
+  missed a pruned tombstone and are refused (CursorExpired); such a client starts over.
+"""
+
+import base64
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from . import metrics
+from .fast_render import VERSION_VALUES_FIELDS, version_row_to_dict
+from .models import ChangeLogEntry, Meal, Recipe, RecipeVersion
+from .serializers import SyncMealSerializer, SyncRecipeSerializer
+
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 1000
+# payload key per log kind
+SECTIONS = {
+    ChangeLogEntry.RECIPE: 'recipes',
+    ChangeLogEntry.VERSION: 'versions',
+    ChangeLogEntry.MEAL: 'meals',
+}
+
+
+class SyncQueryError(ValueError):
+    """Bad sync parameters (cursor, limit)."""
+
+
+class CursorExpired(Exception):
+    """The cursor is older than the tombstone retention; the client must sync from scratch."""
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+# ---------- recording ----------
+
+
+def record(kind, owner_id, object_ids, deleted=False):
+    """Append change log entries for objects of one kind owned by owner_id, once the write commits."""
+    object_ids = list(object_ids)
+    if owner_id is None or not object_ids:
+        return
+
+    def insert():
+        now = timezone.now()
+        try:
+            ChangeLogEntry.objects.bulk_create([
+                ChangeLogEntry(owner_id=owner_id, kind=kind, object_id=pk, deleted=deleted, changed_at=now)
+                for pk in object_ids
+            ])
+        except IntegrityError:  # the owner was deleted in the same transaction; nobody left to sync
+            pass
+
+    transaction.on_commit(insert)
+
+
+def record_instance(instance, deleted=False):
+    """record() for one saved or deleted Recipe, RecipeVersion or Meal."""
+    if isinstance(instance, Recipe):
+        record(ChangeLogEntry.RECIPE, instance.owner_id, [instance.pk], deleted)
+    elif isinstance(instance, RecipeVersion):
+        # versions sync to the recipe's owner (the one whose lists show them)
+        owner_id = Recipe.objects.filter(pk=instance.recipe_id).values_list('owner_id', flat=True).first()
+        record(ChangeLogEntry.VERSION, owner_id or instance.owner_id, [instance.pk], deleted)
+    elif isinstance(instance, Meal):
+        record(ChangeLogEntry.MEAL, instance.owner_id, [instance.pk], deleted)
+
+
+# ---------- cursor ----------
+
+
+def encode_cursor(last_id, issued_at):
+    raw = f'{last_id}|{int(issued_at.timestamp())}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(last entry id, issued_at) for a cursor from encode_cursor(); raises SyncQueryError."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        last_id, stamp = raw.split('|')
+        return int(last_id), datetime.fromtimestamp(int(stamp), tz=dt_timezone.utc)
+    except (ValueError, UnicodeDecodeError, OverflowError):
+        raise SyncQueryError('invalid cursor')
+
+
+def tombstone_horizon():
+    return timezone.now() - timedelta(days=_setting('SYNC_TOMBSTONE_DAYS', 30))
+
+
+# ---------- reading ----------
+
+
+def _recipes(user, ids):
+    qs = Recipe.objects.filter(owner=user, pk__in=ids).order_by('pk')
+    return SyncRecipeSerializer(qs, many=True).data
+
+
+def _versions(user, ids):
+    rows = RecipeVersion.objects.filter(recipe__owner=user, pk__in=ids).order_by('pk').values(*VERSION_VALUES_FIELDS)
+    return [version_row_to_dict(row) for row in rows]
+
+
+def _meals(user, ids):
+    qs = Meal.objects.filter(owner=user, pk__in=ids).select_related('recipe_version__recipe').order_by('pk')
+    return SyncMealSerializer(qs, many=True).data
+
+
+def page(user, cursor=None, limit=None):
+    """
+    Changes for user after cursor: {'recipes', 'versions', 'meals': [current state, ...],
+    'deleted': {'recipes', 'versions', 'meals': [id, ...]}, 'cursor': str, 'has_more': bool}.
+    Pass the returned cursor back until has_more is false, then keep it for the next sync.
+    Raises SyncQueryError on bad parameters and CursorExpired for cursors past the horizon.
+    """
+    try:
+        limit = min(MAX_PAGE_SIZE, max(1, int(limit))) if limit not in (None, '') else DEFAULT_PAGE_SIZE
+    except (TypeError, ValueError):
+        raise SyncQueryError('limit must be an integer')
+    after = 0
+    if cursor:
+        after, issued_at = decode_cursor(cursor)
+        if issued_at < tombstone_horizon():
+            metrics.incr('sync.cursor_expired')
+            raise CursorExpired('cursor has expired; sync from scratch')
+    started = time.perf_counter()
+    settled = timezone.now() - timedelta(seconds=_setting('SYNC_SETTLE_SECONDS', 5))
+    rows = list(
+        ChangeLogEntry.objects.filter(owner=user, id__gt=after).order_by('id')
+        .values_list('id', 'kind', 'object_id', 'deleted', 'changed_at')[:limit + 1]
+    )
+    entries, more = rows[:limit], len(rows) > limit
+    # the cursor's stamp must not be later than any entry it hasn't covered yet
+    stamp = min(rows[limit][4], settled) if more else settled
+    for i, entry in enumerate(entries):
+        if entry[4] > settled:
+            entries, more = entries[:i], False
+            break
+
+    # latest entry per object wins (an object deleted after an update is only a tombstone)
+    latest = {}
+    for _, kind, object_id, deleted, _ in entries:
+        latest[kind, object_id] = deleted
+    changed = {kind: [] for kind in SECTIONS}
+    deleted = {kind: [] for kind in SECTIONS}
+    for (kind, object_id), is_deleted in latest.items():
+        (deleted if is_deleted else changed)[kind].append(object_id)
+
+    result = {
+        'recipes': _recipes(user, changed[ChangeLogEntry.RECIPE]) if changed[ChangeLogEntry.RECIPE] else [],
+        'versions': _versions(user, changed[ChangeLogEntry.VERSION]) if changed[ChangeLogEntry.VERSION] else [],
+        'meals': _meals(user, changed[ChangeLogEntry.MEAL]) if changed[ChangeLogEntry.MEAL] else [],
+        'deleted': {SECTIONS[kind]: sorted(ids) for kind, ids in deleted.items()},
+        'cursor': encode_cursor(entries[-1][0] if entries else after, stamp),
+        'has_more': more,
+    }
+    metrics.incr('sync.pages')
+    metrics.incr('sync.entries', len(entries))
+    metrics.observe_ms('sync.page', (time.perf_counter() - started) * 1000)
+    return result
+
+
+# ---------- maintenance (compact_change_log, rebuild_change_log) ----------
+
+
+def compact(batch_size=5000):
+    """
+    Delete entries superseded by a newer entry for the same object, then tombstones older than
+    the horizon, in id batches. Returns {'superseded', 'tombstones'}.
+    """
+    newer = ChangeLogEntry.objects.filter(kind=OuterRef('kind'), object_id=OuterRef('object_id'), id__gt=OuterRef('id'))
+    superseded = 0
+    last = 0
+    top = ChangeLogEntry.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    while last < top:
+        window = ChangeLogEntry.objects.filter(id__gt=last, id__lte=last + batch_size)
+        superseded += window.filter(Exists(newer)).delete()[0]
+        last += batch_size
+    tombstones, _ = ChangeLogEntry.objects.filter(deleted=True, changed_at__lt=tombstone_horizon()).delete()
+    metrics.incr('sync.compacted', superseded + tombstones)
+    return {'superseded': superseded, 'tombstones': tombstones}
+
+
+def rebuild(batch_size=1000):
+    """
+    Log every existing recipe, version and meal that has no entry yet as changed (after
+    migrating: rows written before the change log existed are otherwise invisible to sync).
+    Objects that already have an entry are skipped, so running it again is harmless.
+    Returns {kind: count of entries added}.
+    """
+    sources = (
+        (ChangeLogEntry.RECIPE, Recipe.objects.exclude(owner=None).values_list('pk', 'owner_id')),
+        (ChangeLogEntry.VERSION, RecipeVersion.objects.values_list('pk', 'recipe__owner_id')),
+        (ChangeLogEntry.MEAL, Meal.objects.exclude(owner=None).values_list('pk', 'owner_id')),
+    )
+    counts = {}
+    for kind, qs in sources:
+        logged = ChangeLogEntry.objects.filter(kind=kind, object_id=OuterRef('pk'))
+        qs = qs.exclude(Exists(logged))
+        counts[kind] = 0
+        last = 0
+        while True:
+            rows = list(qs.filter(pk__gt=last).order_by('pk')[:batch_size])
+            if not rows:
+                break
+            now = timezone.now()
+            entries = ChangeLogEntry.objects.bulk_create([
+                ChangeLogEntry(owner_id=owner_id, kind=kind, object_id=pk, changed_at=now)
+                for pk, owner_id in rows if owner_id is not None
+            ])
+            counts[kind] += len(entries)
+            last = rows[-1][0]
+    return counts
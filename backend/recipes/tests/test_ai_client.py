@@ -0,0 +1,152 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from recipes import ai_client
+
+MESSAGE = {
+    'id': 'msg_1', 'type': 'message', 'role': 'assistant', 'model': 'fake',
+    'content': [{'type': 'text', 'text': '{"ok": true}'}],
+    'stop_reason': 'end_turn', 'stop_sequence': None, 'usage': {'input_tokens': 3, 'output_tokens': 4},
+}
+
+
+class FakeAnthropic(BaseHTTPRequestHandler):
+    """Answers POST /v1/messages with the next scripted (status, headers) reply; 200 when out."""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            status, headers = server.script.pop(0) if server.script else (200, {})
+        body = json.dumps(MESSAGE if status == 200 else {
+            'type': 'error', 'error': {'type': 'api_error', 'message': f'status {status}'},
+        }).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeServerTestCase(SimpleTestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeAnthropic)
+        self.server.lock = threading.Lock()
+        self.server.script = []
+        self.server.requests = 0
+        thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        override = override_settings(
+            ANTHROPIC_API_KEY='test-key', ANTHROPIC_BASE_URL=f'http://127.0.0.1:{self.server.server_port}',
+            AI_RETRY_BASE_DELAY=0.5, AI_RETRY_MAX_DELAY=8,
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        ai_client.reset_client()
+        self.addCleanup(ai_client.reset_client)
+        breaker = mock.patch.object(ai_client, 'breaker', ai_client.CircuitBreaker(5, 30))
+        breaker.start()
+        self.addCleanup(breaker.stop)
+        sleep = mock.patch.object(ai_client.time, 'sleep')
+        self.sleep = sleep.start()
+        self.addCleanup(sleep.stop)
+
+    def create(self):
+        return ai_client.create_message(
+            ai_client.get_client(), model='fake', max_tokens=16, messages=[{'role': 'user', 'content': 'hi'}],
+        )
+
+
+@override_settings(AI_MAX_RETRIES=3)
+class RetryTests(FakeServerTestCase):
+    def test_overload_and_server_errors_are_retried(self):
+        self.server.script = [(429, {}), (529, {}), (503, {})]
+        response = self.create()
+        self.assertEqual(response.content[0].text, '{"ok": true}')
+        self.assertEqual(self.server.requests, 4)
+        self.assertEqual(self.sleep.call_count, 3)
+        self.assertEqual(ai_client.breaker.state, 'closed')
+
+    def test_retry_after_is_honoured_up_to_the_cap(self):
+        self.server.script = [(429, {'Retry-After': '4'}), (503, {'Retry-After': '60'})]
+        self.create()
+        delays = [c.args[0] for c in self.sleep.call_args_list]
+        self.assertGreaterEqual(delays[0], 4)
+        self.assertEqual(delays[1], 8)
+
+    def test_gives_up_after_max_retries(self):
+        import anthropic
+
+        self.server.script = [(500, {})] * 5
+        with self.assertRaises(anthropic.InternalServerError):
+            self.create()
+        self.assertEqual(self.server.requests, 4)
+
+    def test_client_errors_are_not_retried(self):
+        import anthropic
+
+        for status in (400, 401, 404, 422):
+            with self.subTest(status=status):
+                self.server.requests = 0
+                self.server.script = [(status, {})]
+                with self.assertRaises(anthropic.APIStatusError):
+                    self.create()
+                self.assertEqual(self.server.requests, 1)
+        self.sleep.assert_not_called()
+        self.assertEqual(ai_client.breaker.state, 'closed')
+
+
+@override_settings(AI_MAX_RETRIES=0)
+class BreakerTests(FakeServerTestCase):
+    def test_open_half_open_closed(self):
+        import anthropic
+
+        now = [1000.0]
+        clock = mock.patch.object(ai_client.time, 'monotonic', side_effect=lambda: now[0])
+        clock.start()
+        self.addCleanup(clock.stop)
+
+        self.server.script = [(503, {})] * 5
+        for _ in range(5):
+            with self.assertRaises(anthropic.InternalServerError):
+                self.create()
+        self.assertEqual(ai_client.breaker.state, 'open')
+        with self.assertRaises(ai_client.CircuitOpenError):
+            self.create()
+        self.assertEqual(self.server.requests, 5)  # rejected without a request
+
+        now[0] += 30
+        self.assertEqual(ai_client.breaker.state, 'half-open')
+        self.server.script = [(503, {})]
+        with self.assertRaises(anthropic.InternalServerError):
+            self.create()  # the one trial fails: open again
+        self.assertEqual(ai_client.breaker.state, 'open')
+
+        now[0] += 30
+        self.create()
+        self.assertEqual(ai_client.breaker.state, 'closed')
+        self.assertEqual(self.server.requests, 7)
+
+    def test_half_open_lets_one_trial_through(self):
+        breaker = ai_client.breaker
+        with mock.patch.object(ai_client.time, 'monotonic', return_value=0):
+            for _ in range(5):
+                breaker.record_failure()
+        with mock.patch.object(ai_client.time, 'monotonic', return_value=30):
+            breaker.before_call()
+            with self.assertRaises(ai_client.CircuitOpenError):
+                breaker.before_call()
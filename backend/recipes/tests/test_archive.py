@@ -0,0 +1,167 @@
+import json
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from recipes import archive, blobs
+from recipes.models import CompressionDictionary, ContentBlob, Meal, Recipe, RecipeVersion
+
+INGREDIENTS = [{'id': f'ing_{i:03}', 'name': f'ingredient {i}', 'quantity': i, 'unit': 'g'} for i in range(1, 40)]
+LOG = [{'role': 'user', 'text': f'step {i} done, what next?'} for i in range(20)]
+
+
+class ArchiveTestCase(TestCase):
+    def setUp(self):
+        archive.reset()
+        self.addCleanup(archive.reset)
+        caches['default'].clear()
+        blobs.lru().clear()
+        self.user = User.objects.create_user('cook')
+        self.recipe = Recipe.objects.create(owner=self.user, name='Stew', slug='stew')
+        self.version = RecipeVersion.objects.create(
+            recipe=self.recipe, owner=self.user, version_number=1, title='Stew', ingredients=INGREDIENTS,
+        )
+        self.old = timezone.now() - timedelta(days=365)
+
+    def meal(self, entries=LOG, ended_at=None):
+        return Meal.objects.create(
+            owner=self.user, recipe_version=self.version, ended_at=ended_at or self.old, log_entries=entries,
+        )
+
+
+class CodecTests(ArchiveTestCase):
+    def test_training_keeps_repeated_tokens_only(self):
+        data = archive.train_dictionary([json.dumps(INGREDIENTS[:10]), json.dumps(INGREDIENTS[5:]), '"once":'])
+        self.assertIn(b'"name":', data)
+        self.assertNotIn(b'"once":', data)
+        self.assertNotIn(b'", "', data)  # the scan never starts inside a string
+        long_value = [{'text': 'x' * 100, 'role': 'user'}]
+        data = archive.train_dictionary([blobs.compact(long_value)] * 2)
+        self.assertIn(b',"role":', data)
+        self.assertNotIn(b'xxx', data)
+        self.assertLessEqual(len(archive.train_dictionary([json.dumps(INGREDIENTS)] * 2, max_bytes=64)), 64)
+
+    def test_round_trip_without_a_dictionary(self):
+        text = blobs.compact(INGREDIENTS)
+        codec, packed = archive.compress(text, 'recipe')
+        self.assertEqual(codec, 'zlib')
+        self.assertEqual(archive.decompress(codec, packed), text)
+
+    def test_no_dictionary_from_a_single_sample(self):
+        self.meal()
+        self.assertIsNone(archive.train('meal_log'))  # nothing repeats across samples
+
+    def test_round_trip_with_a_dictionary(self):
+        self.meal()
+        self.meal()
+        entry = archive.train('meal_log')
+        self.assertEqual(entry.sample_count, 2)
+        text = blobs.compact(LOG)
+        codec, packed = archive.compress(text, 'meal_log')
+        self.assertEqual(codec, f'zlib:{entry.pk}')
+        self.assertLess(len(packed), len(archive.compress(text, 'recipe')[1]))
+        archive.reset()  # a fresh process loads the dictionary from the database
+        self.assertEqual(archive.decompress(codec, packed), text)
+
+    def test_retraining_keeps_older_rows_readable(self):
+        self.meal()
+        self.meal()
+        first = archive.train('meal_log')
+        codec, packed = archive.compress('[{"role":"user"}]', 'meal_log')
+        second = archive.train('meal_log')
+        self.assertNotEqual(first.pk, second.pk)
+        self.assertEqual(archive.decompress(codec, packed), '[{"role":"user"}]')
+
+    def test_unknown_codec_is_an_error(self):
+        with self.assertRaises(ValueError):
+            archive.decompress('zstd', b'')
+
+
+class ArchiveBlobsTests(ArchiveTestCase):
+    def test_cold_blob_is_packed_and_still_loads(self):
+        ContentBlob.objects.update(touched_at=self.old)
+        stats = archive.archive_blobs(timezone.now() - timedelta(days=180))
+        self.assertEqual(stats['items'], 1)
+        blob = ContentBlob.objects.get()
+        self.assertEqual((blob.data, blob.codec), ('', 'zlib'))
+        blobs.lru().clear()
+        caches['default'].clear()
+        self.assertEqual(RecipeVersion.objects.get(pk=self.version.pk).ingredients, INGREDIENTS)
+
+    def test_recently_touched_blob_stays_plain(self):
+        stats = archive.archive_blobs(timezone.now() - timedelta(days=180))
+        self.assertEqual(stats['items'], 0)
+        self.assertEqual(ContentBlob.objects.get().codec, '')
+
+    def test_blob_touched_during_the_run_stays_plain(self):
+        ContentBlob.objects.update(touched_at=self.old)
+        original = archive.compress
+
+        def compress_while_a_write_touches(text, kind):
+            ContentBlob.objects.update(touched_at=timezone.now())
+            return original(text, kind)
+
+        archive.compress = compress_while_a_write_touches
+        self.addCleanup(setattr, archive, 'compress', original)
+        stats = archive.archive_blobs(timezone.now() - timedelta(days=180))
+        self.assertEqual(stats['items'], 0)
+        self.assertEqual(ContentBlob.objects.get().codec, '')
+
+
+class ArchiveMealLogTests(ArchiveTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def archived_meal(self):
+        meal = self.meal()
+        self.meal(entries=[{'role': 'user', 'text': 'still cooking'}], ended_at=timezone.now())
+        self.assertEqual(archive.archive_meal_logs(timezone.now() - timedelta(days=180))['items'], 1)
+        meal.refresh_from_db()
+        self.assertEqual(meal.log_entries, [])
+        self.assertIsNotNone(meal.log_archive)
+        return meal
+
+    def test_serializer_reads_archived_entries(self):
+        meal = self.archived_meal()
+        self.assertEqual(archive.meal_log_entries(meal), LOG)
+        response = self.client.get(f'/api/meals/{meal.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['log_entries'], LOG)
+
+    def test_other_writes_keep_the_archive(self):
+        meal = self.archived_meal()
+        response = self.client.patch(f'/api/meals/{meal.pk}/', {'rating': 4}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['log_entries'], LOG)
+        response = self.client.patch(f'/api/meals/{meal.pk}/', {'log_entries': []}, format='json')
+        self.assertEqual(response.json()['log_entries'], LOG)
+        meal.refresh_from_db()
+        self.assertEqual(archive.meal_log_entries(meal), LOG)
+
+    def test_new_log_replaces_the_archive(self):
+        meal = self.archived_meal()
+        entries = LOG + [{'role': 'user', 'text': 'done'}]
+        response = self.client.patch(f'/api/meals/{meal.pk}/', {'log_entries': entries}, format='json')
+        self.assertEqual(response.json()['log_entries'], entries)
+        meal.refresh_from_db()
+        self.assertIsNone(meal.log_archive)
+        self.assertEqual(meal.log_entries, entries)
+
+    def test_command_trains_and_archives(self):
+        self.meal()
+        self.meal()
+        out = StringIO()
+        call_command('archive_cold_data', stdout=out)
+        self.assertEqual(CompressionDictionary.objects.filter(kind='meal_log').count(), 1)
+        self.assertIn('meal_log: 2 archived', out.getvalue())
+        for meal in Meal.objects.all():
+            self.assertTrue(meal.log_codec.startswith('zlib:'))
+            self.assertEqual(archive.meal_log_entries(meal), LOG)
@@ -0,0 +1,38 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from recipes import authentication
+from recipes.authentication import CachedTokenAuthentication
+
+
+@override_settings(TOKEN_AUTH_CACHE_TTL=300)
+class CachedTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        authentication.clear()
+        self.user = User.objects.create_user('cook')
+        self.token = Token.objects.create(user=self.user)
+        self.auth = CachedTokenAuthentication()
+
+    def test_revoked_token_is_rejected_within_ttl(self):
+        self.auth.authenticate_credentials(self.token.key)
+        Token.objects.filter(key=self.token.key).delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_user_changes_are_not_served_stale(self):
+        self.auth.authenticate_credentials(self.token.key)
+        self.user.is_staff = True
+        self.user.username = 'chef'
+        self.user.save()
+        user, _ = self.auth.authenticate_credentials(self.token.key)
+        self.assertTrue(user.is_staff)
+        self.assertEqual(user.username, 'chef')
+
+    def test_each_request_gets_its_own_user(self):
+        first, _ = self.auth.authenticate_credentials(self.token.key)
+        first.scratch = 'request one'
+        second, _ = self.auth.authenticate_credentials(self.token.key)
+        self.assertIsNot(first, second)
+        self.assertFalse(hasattr(second, 'scratch'))
@@ -0,0 +1,93 @@
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from recipes import batch_import
+from recipes.models import ChangeLogEntry, Recipe, RecipeVersion
+
+RESULT = {
+    'name': 'Shortbread',
+    'metadata': {'title': 'Shortbread', 'servings': 8},
+    'ingredients': [
+        {'id': 'ing_001', 'name': 'flour', 'quantity': 300, 'unit': 'g'},
+        {'id': 'ing_002', 'name': 'butter', 'quantity': 200, 'unit': 'g'},
+        {'id': 'ing_003', 'name': 'sugar', 'quantity': 100, 'unit': 'g'},
+    ],
+    'steps': [{'id': 'step_001', 'order': 1, 'instruction': 'Rub, press, bake.'}],
+}
+
+
+def prepare(url, language):
+    if url.endswith('/structured'):
+        return 'result', RESULT
+    if url.endswith('/page'):
+        return 'content', '# Shortbread'
+    raise ValueError('unreachable')
+
+
+def extract(url, content, language):
+    return {**RESULT, 'name': content.lstrip('# ')}, None
+
+
+@override_settings(BATCH_IMPORT_PREPARE_WORKERS=0)
+class BatchImportTests(TestCase):
+    def run_batch(self, urls):
+        items = batch_import.iter_batch_import(urls, prepare=prepare, extract=extract)
+        return {item['url']: item for item in items}
+
+    def test_duplicates_and_blanks_are_dropped(self):
+        urls = ['https://example.com/a', ' https://example.com/a ', '', None, 'https://example.com/b']
+        unique = batch_import.dedupe_urls(urls)
+        self.assertEqual([url for _, url in unique], ['https://example.com/a', 'https://example.com/b'])
+
+    def test_each_url_reports_its_own_outcome(self):
+        items = self.run_batch([
+            'https://example.com/structured', 'https://example.com/page', 'https://example.com/down',
+        ])
+        self.assertEqual(items['https://example.com/structured']['source'], 'structured')
+        self.assertEqual(items['https://example.com/page']['source'], 'ai')
+        down = items['https://example.com/down']
+        self.assertEqual((down['status'], down['error']), ('error', 'unreachable'))
+
+    def test_second_batch_is_served_from_the_parse_cache(self):
+        self.run_batch(['https://example.com/page'])
+        self.assertEqual(self.run_batch(['https://example.com/page'])['https://example.com/page']['source'], 'cache')
+
+
+class CreateRecipesTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.user = User.objects.create_user('cook')
+
+    def log(self):
+        return sorted(ChangeLogEntry.objects.filter(owner=self.user).values_list('kind', flat=True))
+
+    def test_slugs_avoid_existing_recipes_and_each_other(self):
+        Recipe.objects.create(owner=self.user, name='Shortbread')
+        created = batch_import.create_recipes(self.user, [
+            {'url': 'https://example.com/a', 'result': RESULT},
+            {'url': 'https://example.com/b', 'result': RESULT},
+        ])
+        self.assertEqual([c['slug'] for c in created], ['shortbread-1', 'shortbread-2'])
+        version = RecipeVersion.objects.get(pk=created[0]['version_id'])
+        self.assertEqual((version.version_number, version.title), (1, 'Shortbread'))
+        self.assertEqual(version.ingredients, RESULT['ingredients'])
+
+    def test_matches_the_model_save_path(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe = Recipe.objects.create(owner=self.user, name='Shortbread')
+            saved = RecipeVersion.objects.create(
+                recipe=recipe, owner=self.user, version_number=1, metadata=RESULT['metadata'],
+                ingredients=RESULT['ingredients'], steps=RESULT['steps'],
+            )
+        expected_log = self.log()
+        self.assertEqual(expected_log, ['recipe', 'version'])
+        ChangeLogEntry.objects.all().delete()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            created = batch_import.create_recipes(self.user, [{'url': 'https://example.com/a', 'result': RESULT}])
+        version = RecipeVersion.objects.get(pk=created[0]['version_id'])
+        self.assertEqual(created[0]['slug'], 'shortbread-1')
+        self.assertEqual(self.log(), expected_log)
+        self.assertIsNotNone(version.nutrition)
+        self.assertEqual(version.nutrition, RecipeVersion.objects.get(pk=saved.pk).nutrition)
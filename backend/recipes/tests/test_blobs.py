@@ -0,0 +1,87 @@
+import json
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db.models import Value
+from django.test import TestCase
+from django.utils import timezone
+
+from recipes import blobs
+from recipes.models import ContentBlob, Recipe, RecipeVersion
+
+# keys deliberately out of alphabetical order
+INGREDIENTS = [{'name': f'ingredient {i}', 'id': f'ing_{i:03}', 'unit': 'g', 'quantity': i} for i in range(1, 20)]
+STEPS = [{'order': 1, 'instruction': 'Mix', 'id': 'step_001'}]
+
+
+class BlobStoreTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        blobs.lru().clear()
+        self.user = User.objects.create_user('cook')
+        self.recipe = Recipe.objects.create(owner=self.user, name='Stew', slug='stew')
+
+    def version(self, number=1, **fields):
+        return RecipeVersion.objects.create(recipe=self.recipe, owner=self.user, version_number=number, **fields)
+
+    def reload(self, version):
+        blobs.lru().clear()
+        caches['default'].clear()
+        return RecipeVersion.objects.get(pk=version.pk)
+
+    def test_round_trip_keeps_key_order(self):
+        version = self.version(ingredients=INGREDIENTS, steps=STEPS)
+        columns = blobs.raw_columns(RecipeVersion, version.pk)
+        self.assertTrue(blobs.is_ref(columns['ingredients']))
+        self.assertFalse(blobs.is_ref(columns['steps']))
+        loaded = self.reload(version)
+        self.assertEqual([list(i) for i in loaded.ingredients], [list(i) for i in INGREDIENTS])
+        self.assertEqual(list(loaded.steps[0]), ['order', 'instruction', 'id'])
+
+    def test_same_content_in_another_key_order_shares_the_blob(self):
+        first = self.version(1, ingredients=INGREDIENTS)
+        reordered = [dict(sorted(i.items())) for i in INGREDIENTS]
+        second = self.version(2, ingredients=reordered)
+        self.assertEqual(ContentBlob.objects.count(), 1)
+        self.assertEqual(blobs.raw_columns(RecipeVersion, first.pk), blobs.raw_columns(RecipeVersion, second.pk))
+        self.assertEqual(self.reload(second).ingredients, reordered)
+
+    def test_backfill_is_idempotent(self):
+        version = self.version(ingredients=[], steps=[])
+        # a row written before the blob store: large JSON inline in the column
+        RecipeVersion.objects.filter(pk=version.pk).update(ingredients=Value(json.dumps(INGREDIENTS)))
+        self.assertEqual(blobs.backfill()['converted'], 1)
+        self.assertTrue(blobs.is_ref(blobs.raw_columns(RecipeVersion, version.pk)['ingredients']))
+        self.assertEqual(blobs.backfill()['converted'], 0)
+        self.assertEqual(self.reload(version).ingredients, INGREDIENTS)
+        self.assertEqual(ContentBlob.objects.count(), 1)
+
+    def test_scan_counts_references(self):
+        self.version(1, ingredients=INGREDIENTS, steps=STEPS)
+        self.version(2, ingredients=INGREDIENTS, steps=STEPS * 20)
+        report = blobs.scan()
+        refcounts = dict(ContentBlob.objects.values_list('digest', 'refcount'))
+        self.assertEqual(refcounts[blobs.digest(blobs.canonical(INGREDIENTS))], 2)
+        self.assertEqual(refcounts[blobs.digest(blobs.canonical(STEPS * 20))], 1)
+        self.assertEqual((report['blobs'], report['refs'], report['missing_blobs']), (2, 3, 0))
+        self.assertGreater(report['saved_bytes'], 0)
+
+    def test_collect_garbage_honours_touched_at_and_grace(self):
+        version = self.version(ingredients=INGREDIENTS)
+        RecipeVersion.objects.filter(pk=version.pk).update(ingredients=Value('[]'))
+        blobs.scan()
+        key = blobs.digest(blobs.canonical(INGREDIENTS))
+        self.assertEqual(ContentBlob.objects.get(pk=key).refcount, 0)
+        # touched just now: inside the grace period
+        self.assertEqual(blobs.collect_garbage(grace_seconds=3600)['deleted'], 0)
+        ContentBlob.objects.filter(pk=key).update(touched_at=timezone.now() - timedelta(hours=2))
+        self.assertEqual(blobs.collect_garbage(grace_seconds=3600, dry_run=True)['deleted'], 1)
+        self.assertTrue(ContentBlob.objects.filter(pk=key).exists())
+        # a save that reuses the blob touches it again before gc runs
+        self.version(2, ingredients=INGREDIENTS)
+        self.assertEqual(blobs.collect_garbage(grace_seconds=3600)['deleted'], 0)
+        blobs.scan()
+        ContentBlob.objects.filter(pk=key).update(touched_at=timezone.now() - timedelta(hours=2))
+        self.assertEqual(blobs.collect_garbage(grace_seconds=3600)['deleted'], 0)
+        self.assertEqual(self.reload(version).ingredients, [])
@@ -0,0 +1,84 @@
+from contextlib import ExitStack
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase
+from django.utils.http import http_date
+from rest_framework import mixins
+from rest_framework.test import APIClient
+
+from recipes.fast_render import FastVersionRetrieveMixin
+from recipes.models import Recipe, RecipeVersion
+
+ENDPOINTS = ('/api/recipes/', '/api/recipes/soup/', '/api/recipes/soup/versions/')
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.user = User.objects.create_user('cook')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(owner=self.user, name='Soup', slug='soup')
+        self.version = RecipeVersion.objects.create(
+            recipe=self.recipe, owner=self.user, version_number=1, title='Soup', commit_message='first',
+        )
+        self.endpoints = ENDPOINTS + (f'/api/recipes/soup/versions/{self.version.pk}/',)
+
+    def test_if_none_match_gives_304_without_serializing(self):
+        for url in self.endpoints:
+            with self.subTest(url=url):
+                first = self.client.get(url)
+                self.assertEqual(first.status_code, 200)
+                self.assertIn('private', first['Cache-Control'])
+                with ExitStack() as stack:
+                    bodies = [
+                        stack.enter_context(mock.patch.object(cls, name))
+                        for cls, name in (
+                            (mixins.ListModelMixin, 'list'),
+                            (mixins.RetrieveModelMixin, 'retrieve'),
+                            (FastVersionRetrieveMixin, 'retrieve'),
+                        )
+                    ]
+                    second = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+                self.assertEqual(second.status_code, 304)
+                self.assertEqual(second['ETag'], first['ETag'])
+                self.assertEqual(second.content, b'')
+                for body in bodies:
+                    body.assert_not_called()
+
+    def test_if_modified_since(self):
+        for url in self.endpoints:
+            with self.subTest(url=url):
+                first = self.client.get(url)
+                second = self.client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+                self.assertEqual(second.status_code, 304)
+                earlier = http_date(self.version.updated_at.timestamp() - 60)
+                self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=earlier).status_code, 200)
+
+    def test_version_write_changes_the_etag(self):
+        before = {url: self.client.get(url)['ETag'] for url in self.endpoints}
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/recipes/soup/versions/', {
+                'title': 'Soup', 'commit_message': 'more salt', 'ingredients': [], 'steps': [],
+            }, format='json')
+        self.assertEqual(response.status_code, 201)
+        for url in ENDPOINTS:
+            with self.subTest(url=url):
+                after = self.client.get(url, HTTP_IF_NONE_MATCH=before[url])
+                self.assertEqual(after.status_code, 200)
+                self.assertNotEqual(after['ETag'], before[url])
+
+        url = self.endpoints[-1]
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(url, {'commit_message': 'first, edited'}, format='json')
+        after = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(after.status_code, 200)
+        self.assertEqual(after.json()['commit_message'], 'first, edited')
+
+    def test_other_users_recipes_are_not_validated(self):
+        other = APIClient()
+        other.force_authenticate(User.objects.create_user('guest'))
+        self.assertEqual(other.get('/api/recipes/soup/').status_code, 404)
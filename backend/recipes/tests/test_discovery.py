@@ -0,0 +1,79 @@
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes import discovery
+from recipes.models import Meal, PublicRecipe, Recipe, RecipeVersion
+
+
+class DiscoveryTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.user = User.objects.create_user('cook')
+
+    def publish(self, name, tags=(), **metadata):
+        recipe = Recipe.objects.create(owner=self.user, name=name)
+        return RecipeVersion.objects.create(
+            recipe=recipe, owner=self.user, version_number=1, is_public=True, title=name,
+            metadata={'title': name, **metadata}, tags=list(tags),
+        )
+
+    def titles(self, **filters):
+        return [r['title'] for r in discovery.feed(**filters)['results']]
+
+    def test_only_public_recipes_are_listed(self):
+        version = self.publish('Tart')
+        RecipeVersion.objects.create(recipe=version.recipe, owner=self.user, version_number=2, title='Tart v2')
+        private = Recipe.objects.create(owner=self.user, name='Secret')
+        RecipeVersion.objects.create(recipe=private, owner=self.user, version_number=1, title='Secret')
+        self.assertEqual(self.titles(), ['Tart'])
+
+    def test_filters(self):
+        self.publish('Tart', tags=['Sweet', 'baked'], cuisine='French', total_time_minutes=90)
+        self.publish('Soup', tags=['savory'], cuisine='Korean', total_time_minutes=30)
+        self.assertEqual(self.titles(tags=['sweet', 'BAKED']), ['Tart'])
+        self.assertEqual(self.titles(cuisine='korean'), ['Soup'])
+        self.assertEqual(self.titles(max_time=45), ['Soup'])
+        self.assertEqual(self.titles(q='ta'), ['Tart'])
+
+    def test_keyset_pages(self):
+        for name in ('One', 'Two', 'Three'):
+            self.publish(name)
+        first = discovery.feed(limit=2)
+        second = discovery.feed(limit=2, cursor=first['next_cursor'])
+        self.assertEqual([r['title'] for r in first['results']], ['Three', 'Two'])
+        self.assertEqual([r['title'] for r in second['results']], ['One'])
+        self.assertIsNone(second['next_cursor'])
+
+    def test_meal_ratings_are_summarized(self):
+        version = self.publish('Tart')
+        Meal.objects.create(owner=self.user, recipe_version=version, rating=4)
+        Meal.objects.create(owner=self.user, recipe_version=version, rating=5)
+        entry = PublicRecipe.objects.get()
+        self.assertEqual((entry.meal_rating_avg, entry.meal_rating_count), (4.5, 2))
+
+    def test_course_is_stored_lowercased(self):
+        self.publish('Tart', course='Dessert ')
+        self.assertEqual(PublicRecipe.objects.get().course, 'dessert')
+        self.assertEqual(len(discovery.feed(course='DESSERT')['results']), 1)
+
+    def test_generation_lives_in_the_database(self):
+        version = self.publish('Tart')
+        before = discovery.generation()
+        caches['default'].clear()  # another process has its own cache; the generation must not depend on it
+        self.assertEqual(discovery.generation(), before)
+
+        Meal.objects.create(owner=self.user, recipe_version=version, rating=5)
+        after_rating = discovery.generation()
+        self.assertNotEqual(after_rating, before)
+
+        version.delete()
+        self.assertNotEqual(discovery.generation(), after_rating)
+
+    def test_cached_feed_page_follows_changes(self):
+        client = APIClient()
+        self.publish('Tart')
+        self.assertEqual(len(client.get('/api/discover/').json()['results']), 1)
+        self.publish('Pie')
+        self.assertEqual(len(client.get('/api/discover/').json()['results']), 2)
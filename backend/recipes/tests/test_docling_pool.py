@@ -0,0 +1,131 @@
+import shutil
+import sys
+import tempfile
+import textwrap
+import threading
+from pathlib import Path
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from recipes import docling_pool
+
+# Stand-in docling for the spawned workers (they inherit sys.path). The page bytes say what to do:
+# b'sleep:<s>', b'hang' (ignores the alarm), b'crash', b'pid'; anything else converts to '# ok'.
+FAKE_DOCLING = {
+    'docling/__init__.py': '',
+    'docling/datamodel/__init__.py': '',
+    'docling/datamodel/base_models.py': """
+        class DocumentStream:
+            def __init__(self, name, stream):
+                self.stream = stream
+    """,
+    'docling/document_converter.py': """
+        import os
+        import signal
+        import time
+
+
+        class _Document:
+            def __init__(self, text):
+                self.text = text
+
+            def export_to_markdown(self):
+                return self.text
+
+
+        class _Result:
+            def __init__(self, text):
+                self.document = _Document(text)
+
+
+        class DocumentConverter:
+            def convert(self, source):
+                raw = source.stream.read()
+                if raw.startswith(b'sleep:'):
+                    time.sleep(float(raw[6:]))
+                elif raw == b'hang':
+                    signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGALRM})
+                    time.sleep(30)
+                elif raw == b'crash':
+                    os._exit(1)
+                elif raw == b'pid':
+                    return _Result(str(os.getpid()))
+                return _Result('# ok')
+    """,
+}
+
+
+@override_settings(DOCLING_WORKERS=1, DOCLING_TASK_TIMEOUT=1, DOCLING_WORKER_MEMORY_MB=0, DOCLING_MAX_TASKS_PER_WORKER=0)
+class DoclingPoolTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.fake_dir = tempfile.mkdtemp()
+        for name, source in FAKE_DOCLING.items():
+            path = Path(cls.fake_dir) / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(textwrap.dedent(source))
+        sys.path.insert(0, cls.fake_dir)
+
+    @classmethod
+    def tearDownClass(cls):
+        sys.path.remove(cls.fake_dir)
+        shutil.rmtree(cls.fake_dir, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        patcher = mock.patch.object(docling_pool, 'TIMEOUT_GRACE_SECONDS', 1)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(docling_pool.shutdown)
+        docling_pool.shutdown()
+
+    def test_converts(self):
+        self.assertEqual(docling_pool.convert_html(b'<p>hi</p>'), '# ok')
+
+    def test_time_in_the_queue_does_not_count(self):
+        docling_pool.convert_html(b'warm up')
+        results, errors = [], []
+
+        def convert():
+            try:
+                results.append(docling_pool.convert_html(b'sleep:0.8'))
+            except docling_pool.ConversionError as e:
+                errors.append(e)
+
+        # one worker, three 0.8 s tasks: the last finishes ~2.4 s after submit, past timeout + grace
+        threads = [threading.Thread(target=convert) for _ in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(results, ['# ok'] * 3)
+
+    def test_alarm_timeout_keeps_the_pool(self):
+        docling_pool.convert_html(b'warm up')
+        pool = docling_pool._pool
+        with self.assertRaisesRegex(docling_pool.ConversionError, 'exceeded'):
+            docling_pool.convert_html(b'sleep:5')
+        self.assertIs(docling_pool._pool, pool)
+        self.assertEqual(docling_pool.convert_html(b'next'), '# ok')
+
+    def test_stuck_worker_replaces_the_pool(self):
+        docling_pool.convert_html(b'warm up')
+        pool = docling_pool._pool
+        with self.assertRaisesRegex(docling_pool.ConversionError, 'exceeded'):
+            docling_pool.convert_html(b'hang')
+        self.assertIsNot(docling_pool._pool, pool)
+        self.assertEqual(docling_pool.convert_html(b'next'), '# ok')
+
+    def test_crashed_worker(self):
+        with self.assertRaisesRegex(docling_pool.ConversionError, 'died'):
+            docling_pool.convert_html(b'crash')
+        self.assertEqual(docling_pool.convert_html(b'next'), '# ok')
+
+    @override_settings(DOCLING_MAX_TASKS_PER_WORKER=2)
+    def test_workers_are_recycled(self):
+        pids = [docling_pool.convert_html(b'pid') for _ in range(4)]
+        self.assertEqual(pids[0], pids[1])
+        self.assertNotEqual(pids[1], pids[2])
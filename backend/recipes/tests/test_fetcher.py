@@ -0,0 +1,123 @@
+import shutil
+import socket
+import tempfile
+import threading
+from pathlib import Path
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from recipes import fetcher
+
+
+class PageCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+        override = override_settings(PAGE_CACHE_DIR=self.dir, PAGE_CACHE_MAX_BYTES=1000)
+        override.enable()
+        self.addCleanup(override.disable)
+        fetcher._cache_bytes = None
+
+    def test_concurrent_writes_of_one_path_do_not_collide(self):
+        path = Path(self.dir) / 'page.html'
+        errors = []
+
+        def write(i):
+            try:
+                for _ in range(50):
+                    fetcher._write_atomic(path, bytes([i]) * 100)
+            except OSError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=write, args=(i,)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(set(path.read_bytes())), 1)
+        self.assertEqual([p.name for p in Path(self.dir).iterdir()], ['page.html'])
+
+    def test_failed_cache_write_is_not_an_error(self):
+        with mock.patch.object(fetcher, '_write_atomic', side_effect=OSError('disk full')):
+            fetcher._write_cache((Path(self.dir) / 'a.html', b'x'))
+
+    def test_eviction_scans_only_past_the_limit(self):
+        with mock.patch.object(fetcher.metrics, 'incr') as incr:
+            for i in range(4):
+                fetcher._write_cache((Path(self.dir) / f'{i}.html', b'x' * 200))
+            scans = [c for c in incr.call_args_list if c.args[0] == 'fetch.cache.scans']
+            self.assertEqual(len(scans), 1)  # the first write seeds the estimate
+            fetcher._write_cache((Path(self.dir) / '4.html', b'x' * 400))
+        total = sum(p.stat().st_size for p in Path(self.dir).iterdir())
+        self.assertLessEqual(total, 1000)
+        self.assertTrue((Path(self.dir) / '4.html').exists())
+
+
+def _response(body=b'', status=200, headers=None, url='https://recipes.example.com/soup'):
+    response = mock.MagicMock(status_code=status, headers=headers or {}, url=url, encoding=None)
+    response.is_redirect = status in (301, 302, 303, 307, 308)
+    response.__enter__.return_value = response
+    response.iter_content.return_value = [body]
+    return response
+
+
+@override_settings(PAGE_CACHE_FRESH_SECONDS=0)
+class FetchPageTests(SimpleTestCase):
+    addresses = {'recipes.example.com': '93.184.216.34', 'metadata.internal': '169.254.169.254'}
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+        override = override_settings(PAGE_CACHE_DIR=self.dir)
+        override.enable()
+        self.addCleanup(override.disable)
+        fetcher._cache_bytes = None
+
+        def getaddrinfo(host, port, **kwargs):
+            return [(None, None, None, '', (self.addresses[host], port))]
+
+        resolver = mock.patch.object(socket, 'getaddrinfo', side_effect=getaddrinfo)
+        resolver.start()
+        self.addCleanup(resolver.stop)
+        self.session = mock.Mock()
+        session = mock.patch.object(fetcher, 'get_session', return_value=self.session)
+        session.start()
+        self.addCleanup(session.stop)
+
+    def test_unknown_meta_charset_falls_back_to_utf8(self):
+        body = '<meta charset="x-bogus"><p>김치찌개</p>'.encode()
+        self.session.get.return_value = _response(body)
+        page = fetcher.fetch_page('https://recipes.example.com/soup')
+        self.assertEqual(page.encoding, 'utf-8')
+        self.assertIn('김치찌개', page.text)
+
+    def test_unknown_cached_encoding_still_decodes(self):
+        page = fetcher.Page('https://recipes.example.com/soup', b'soup', 'x-bogus', None)
+        self.assertEqual(page.text, 'soup')
+
+    def test_internal_host_is_refused(self):
+        with self.assertRaises(fetcher.FetchError):
+            fetcher.fetch_page('http://metadata.internal/latest')
+        self.session.get.assert_not_called()
+
+    def test_redirect_to_internal_host_is_refused(self):
+        self.session.get.return_value = _response(status=302, headers={'Location': 'http://metadata.internal/latest'})
+        with self.assertRaises(fetcher.FetchError):
+            fetcher.fetch_page('https://recipes.example.com/soup')
+        self.assertEqual(self.session.get.call_count, 1)
+
+    def test_public_redirect_is_followed(self):
+        self.session.get.side_effect = [
+            _response(status=301, headers={'Location': '/soup-v2'}),
+            _response(b'<p>soup</p>', url='https://recipes.example.com/soup-v2'),
+        ]
+        page = fetcher.fetch_page('https://recipes.example.com/soup')
+        self.assertEqual(page.text, '<p>soup</p>')
+        self.assertEqual(self.session.get.call_args.args[0], 'https://recipes.example.com/soup-v2')
+
+    def test_redirect_loop_gives_up(self):
+        self.session.get.return_value = _response(status=302, headers={'Location': '/soup'})
+        with self.assertRaises(fetcher.FetchError):
+            fetcher.fetch_page('https://recipes.example.com/soup')
@@ -0,0 +1,54 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes import blobs
+from recipes.models import ContentBlob, Recipe, RecipeVersion
+
+INGREDIENTS = [{'id': f'ing_{i:03}', 'name': f'ingredient {i}', 'quantity': i, 'unit': 'g'} for i in range(1, 30)]
+
+
+class ForkTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        blobs.lru().clear()
+        author = User.objects.create_user('author')
+        recipe = Recipe.objects.create(owner=author, name='Stew', slug='stew')
+        self.source = RecipeVersion.objects.create(
+            recipe=recipe, owner=author, version_number=1, is_public=True, title='Stew',
+            metadata={'title': 'Stew', 'servings': 4}, ingredients=INGREDIENTS,
+            steps=[{'id': 'step_001', 'order': 1, 'instruction': 'Simmer'}],
+        )
+        RecipeVersion.objects.filter(pk=self.source.pk).update(nutrition=None)
+        self.user = User.objects.create_user('cook')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f'/api/versions/{self.source.pk}/fork/'
+
+    def test_fork_shares_stored_content(self):
+        blob_count = ContentBlob.objects.count()
+        response = self.client.post(self.url, {'name': 'My stew'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        fork = RecipeVersion.objects.get(recipe__owner=self.user)
+        self.assertEqual(blobs.raw_columns(RecipeVersion, fork.pk), blobs.raw_columns(RecipeVersion, self.source.pk))
+        self.assertEqual(ContentBlob.objects.count(), blob_count)
+        self.assertEqual(fork.ingredients, INGREDIENTS)
+        self.assertIsNone(fork.nutrition)  # copied, not recomputed
+
+    def test_private_version_of_another_user_is_not_found(self):
+        RecipeVersion.objects.filter(pk=self.source.pk).update(is_public=False)
+        self.assertEqual(self.client.post(self.url, {}, format='json').status_code, 404)
+
+    def test_fork_is_atomic(self):
+        with mock.patch('recipes.signals.after_versions_written', side_effect=RuntimeError('boom')):
+            with self.assertRaises(RuntimeError):
+                self.client.post(self.url, {}, format='json')
+        self.assertFalse(Recipe.objects.filter(owner=self.user).exists())
+
+    def test_non_object_body_uses_the_default_name(self):
+        response = self.client.post(self.url, ['not', 'an', 'object'], format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['name'], 'Stew')
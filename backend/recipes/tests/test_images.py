@@ -0,0 +1,91 @@
+import io
+import shutil
+import socket
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from recipes import images
+from recipes.models import ImageAsset, Recipe, RecipeVersion
+
+
+def _resolves_to(address):
+    return mock.patch.object(socket, 'getaddrinfo', return_value=[(None, None, None, '', (address, 80))])
+
+
+class PublicUrlTests(SimpleTestCase):
+    def test_internal_addresses_are_refused(self):
+        for address in ('127.0.0.1', '10.1.2.3', '169.254.169.254', '::1', '::ffff:127.0.0.1', 'fd00::1'):
+            with self.subTest(address=address), _resolves_to(address):
+                with self.assertRaises(images.ImageError):
+                    images.check_public_url('http://images.example.com/a.jpg')
+
+    def test_public_address_is_allowed(self):
+        with _resolves_to('93.184.216.34'):
+            images.check_public_url('https://images.example.com/a.jpg')
+
+    def test_other_schemes_are_refused(self):
+        with self.assertRaises(images.ImageError):
+            images.check_public_url('file:///etc/passwd')
+
+    def test_redirect_to_internal_address_is_refused(self):
+        redirect = mock.Mock(is_redirect=True, headers={'Location': 'http://metadata.internal/latest'})
+        session = mock.Mock()
+        session.get.return_value = redirect
+        addresses = {'images.example.com': '93.184.216.34', 'metadata.internal': '169.254.169.254'}
+
+        def getaddrinfo(host, port, **kwargs):
+            return [(None, None, None, '', (addresses[host], port))]
+
+        with mock.patch.object(socket, 'getaddrinfo', side_effect=getaddrinfo), \
+                mock.patch('recipes.fetcher.get_session', return_value=session):
+            with self.assertRaises(images.ImageError):
+                images.fetch_image('http://images.example.com/a.jpg')
+        self.assertEqual(session.get.call_count, 1)
+
+
+class ThumbnailValidatorTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.user = User.objects.create_user('cook')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        recipe = Recipe.objects.create(owner=self.user, name='Soup', slug='soup')
+        with mock.patch.object(images, 'submit'):
+            RecipeVersion.objects.create(
+                recipe=recipe, owner=self.user, version_number=1, title='Soup',
+                main_picture='https://images.example.com/soup.jpg',
+            )
+
+    def test_ready_thumbnails_change_the_etag(self):
+        from PIL import Image
+
+        buffer = io.BytesIO()
+        Image.new('RGB', (640, 480), (120, 60, 30)).save(buffer, 'JPEG')
+        first = self.client.get('/api/recipes/')
+        self.assertIsNone(first.json()[0]['latest_version']['main_picture_thumbnails'])
+        asset = ImageAsset.objects.get()
+        with override_settings(THUMBNAIL_ROOT=self.root), \
+                mock.patch.object(images, 'fetch_image', return_value=buffer.getvalue()):
+            images.process(asset.pk)
+            second = self.client.get('/api/recipes/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertIn('160', second.json()[0]['latest_version']['main_picture_thumbnails'])
+
+    def test_unexpected_errors_mark_the_asset_failed(self):
+        asset = ImageAsset.objects.get()
+        for error, message in (
+            (images.ImageError('not an image (text/html)'), 'not an image (text/html)'),
+            (OSError(28, 'No space left on device'), 'OSError: [Errno 28] No space left on device'),
+        ):
+            with self.subTest(error=error), override_settings(THUMBNAIL_ROOT=self.root), \
+                    mock.patch.object(images, 'fetch_image', return_value=b'image'), \
+                    mock.patch.object(images, 'make_thumbnails', side_effect=error):
+                self.assertIsNone(images.process(asset.pk))
+                asset.refresh_from_db()
+                self.assertEqual((asset.status, asset.error), (ImageAsset.FAILED, message))
+        self.assertEqual(asset.attempts, 2)
@@ -0,0 +1,71 @@
+import json
+
+from django.test import SimpleTestCase
+
+from recipes.json_stream import IncrementalObjectParser
+
+REPLY = {
+    'metadata': {'title': 'Say "cheese" {toast}', 'servings': 2},
+    'ingredients': [
+        {'id': 'ing_001', 'name': 'bread', 'note': 'a } brace and a \\ backslash'},
+        {'id': 'ing_002', 'name': 'cheese', 'tags': ['[aged]', '"sharp"']},
+    ],
+    'steps': [{'id': 'step_001', 'instruction': 'Toast, then {melt}.'}],
+    'rating': 4.5,
+    'vegan': False,
+    'nutrition': None,
+    'tags': ['snack'],
+}
+
+
+def _feed(chunks, item_keys=('ingredients', 'steps')):
+    parser = IncrementalObjectParser(item_keys)
+    events = []
+    for chunk in chunks:
+        events.extend(parser.feed(chunk))
+    return parser, events
+
+
+class IncrementalObjectParserTests(SimpleTestCase):
+    text = '```json\n' + json.dumps(REPLY, indent=2) + '\n```'
+
+    def expected(self):
+        events = []
+        for key, value in REPLY.items():
+            if key in ('ingredients', 'steps'):
+                events.extend(('item', key, item) for item in value)
+            events.append(('member', key, value))
+        return events
+
+    def test_whole_text(self):
+        parser, events = _feed([self.text])
+        self.assertTrue(parser.done)
+        self.assertEqual(events, self.expected())
+
+    def test_any_chunking_gives_the_same_events(self):
+        for size in (1, 2, 3, 7, 64):
+            with self.subTest(size=size):
+                parser, events = _feed(self.text[i:i + size] for i in range(0, len(self.text), size))
+                self.assertTrue(parser.done)
+                self.assertEqual(events, self.expected())
+
+    def test_compact_scalars_before_the_closing_brace(self):
+        _, events = _feed(['{"a":1,"b":tr', 'ue,"c":null,"d":-2.5e', '3}'])
+        self.assertEqual(events, [('member', 'a', 1), ('member', 'b', True), ('member', 'c', None), ('member', 'd', -2500.0)])
+
+    def test_items_arrive_before_their_array_closes(self):
+        parser = IncrementalObjectParser(['steps'])
+        events = parser.feed('{"steps": [{"instruction": "Mix \\"well\\" }"}, {"instr')
+        self.assertEqual(events, [('item', 'steps', {'instruction': 'Mix "well" }'})])
+
+    def test_truncated_stream_emits_only_complete_parts(self):
+        text = json.dumps(REPLY)
+        cut = text.index('"rating"') + len('"rating": 4')
+        parser, events = _feed([text[:cut]])
+        self.assertFalse(parser.done)
+        self.assertEqual(events, [e for e in self.expected() if e[1] not in ('rating', 'vegan', 'nutrition', 'tags')])
+
+    def test_text_after_the_object_is_ignored(self):
+        parser, events = _feed(['{"a": 1}', ' {"b": 2}'])
+        self.assertTrue(parser.done)
+        self.assertEqual(events, [('member', 'a', 1)])
@@ -0,0 +1,28 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+CHECK = """
+import sys
+import django
+django.setup()
+import recipes.urls, recipes.views
+heavy = sorted(m for m in sys.modules if m.split('.')[0] in ('docling', 'anthropic'))
+print(','.join(heavy))
+"""
+
+
+class LazyImportTests(SimpleTestCase):
+    def test_views_import_without_docling_or_anthropic(self):
+        # a fresh interpreter: this test process may already have imported them
+        result = subprocess.run(
+            [sys.executable, '-c', CHECK],
+            cwd=settings.BASE_DIR,
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'forklog.settings', 'PRELOAD_AI_DEPENDENCIES': 'False'},
+            capture_output=True, text=True, timeout=120,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), '')
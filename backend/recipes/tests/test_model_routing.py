@@ -0,0 +1,72 @@
+import json
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase, override_settings
+
+from recipes import model_routing, services
+from recipes.schema_validation import SchemaValidationError
+
+TIERS = {'small': 'model-small', 'large': 'model-large'}
+ROUTES = {'task': [(100, 'small'), (None, 'large')]}
+
+
+class StubClient:
+    """messages.create returns the next scripted reply text and records the model asked for."""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.models = []
+        self.messages = self
+
+    def create(self, **kwargs):
+        self.models.append(kwargs['model'])
+        return SimpleNamespace(content=[SimpleNamespace(text=self.replies.pop(0))], usage=None)
+
+
+@override_settings(
+    AI_MODEL_TIERS=TIERS, AI_MODEL_ROUTES=ROUTES, AI_FALLBACK_TIER='large',
+    AI_ROUTE_WINDOW=4, AI_ROUTE_MIN_SUCCESS_RATE=0.5,
+)
+class RoutingTests(SimpleTestCase):
+    def setUp(self):
+        model_routing.reset()
+        self.addCleanup(model_routing.reset)
+
+    def call(self, client, input_chars=10, validate=None):
+        return services._routed_json_message(
+            client, 'task', input_chars, validate=validate, max_tokens=16, messages=[{'role': 'user', 'content': 'x'}],
+        )
+
+    def test_tier_by_prompt_size(self):
+        self.assertEqual(model_routing.choose('task', 100), ('small', 'model-small'))
+        self.assertEqual(model_routing.choose('task', 101), ('large', 'model-large'))
+        self.assertEqual(model_routing.choose('unrouted', 10), ('large', 'model-large'))
+
+    def test_parse_failure_escalates_to_the_large_tier(self):
+        client = StubClient('not json', '{"ok": true}')
+        self.assertEqual(self.call(client), {'ok': True})
+        self.assertEqual(client.models, ['model-small', 'model-large'])
+
+    def test_validation_failure_escalates_to_the_large_tier(self):
+        def validate(data):
+            if data.get('tier') == 'small':
+                raise SchemaValidationError('ingredients: expected array')
+
+        client = StubClient(json.dumps({'tier': 'small'}), json.dumps({'tier': 'large'}))
+        self.assertEqual(self.call(client, validate=validate), {'tier': 'large'})
+        self.assertEqual(client.models, ['model-small', 'model-large'])
+
+    def test_failure_on_the_large_tier_is_raised(self):
+        client = StubClient('not json')
+        with self.assertRaises(json.JSONDecodeError):
+            self.call(client, input_chars=500)
+        self.assertEqual(client.models, ['model-large'])
+
+    def test_unhealthy_small_tier_is_skipped_and_probed_again(self):
+        for _ in range(2):
+            self.call(StubClient('not json', '{}'))
+        client = StubClient(*['{}'] * 4)
+        for _ in range(4):
+            self.call(client)
+        # skipped while its success rate is 0 of 2; every AI_ROUTE_WINDOW-th call still probes it
+        self.assertEqual(client.models, ['model-large', 'model-large', 'model-large', 'model-small'])
@@ -0,0 +1,89 @@
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase
+
+from recipes import nutrition
+from recipes.models import Recipe, RecipeVersion
+
+BAKE = [
+    {'id': 'ing_001', 'name': 'flour', 'quantity': 500, 'unit': 'g'},
+    {'id': 'ing_002', 'name': 'sugar', 'quantity': 200, 'unit': 'g'},
+    {'id': 'ing_003', 'name': 'butter', 'quantity': 250, 'unit': 'g'},
+]
+
+
+class NutritionTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+
+    def test_no_servings_gives_no_per_serving_value(self):
+        result, report = nutrition.compute(BAKE, servings=None)
+        self.assertIsNone(result)
+        self.assertEqual(report['coverage'], 1.0)
+
+    def test_coverage_is_by_weight(self):
+        ingredients = BAKE + [{'id': 'ing_004', 'name': 'smoked brisket flat', 'quantity': 2, 'unit': 'kg'}]
+        _, report = nutrition.compute(ingredients, servings=8)
+        self.assertIn('smoked brisket flat', report['unmatched'])
+        self.assertLess(report['coverage'], 0.4)
+
+    def test_unweighable_unmatched_ingredient_zeroes_coverage(self):
+        ingredients = BAKE + [{'id': 'ing_004', 'name': 'dragonfruit', 'quantity': 3, 'unit': ''}]
+        _, report = nutrition.compute(ingredients, servings=4)
+        self.assertEqual(report['coverage'], 0.0)
+
+    def test_client_nutrition_is_kept(self):
+        user = User.objects.create_user('cook')
+        recipe = Recipe.objects.create(owner=user, name='Cake', slug='cake')
+        version = RecipeVersion.objects.create(
+            recipe=recipe, owner=user, version_number=1, metadata={'servings': 8},
+            ingredients=BAKE, nutrition={'calories': 300},
+        )
+        version.refresh_from_db()
+        self.assertEqual(version.nutrition, {'calories': 300})
+
+    def test_computed_when_missing(self):
+        user = User.objects.create_user('cook')
+        recipe = Recipe.objects.create(owner=user, name='Cake', slug='cake')
+        version = RecipeVersion.objects.create(
+            recipe=recipe, owner=user, version_number=1, metadata={'servings': 8}, ingredients=BAKE,
+        )
+        whole, _ = nutrition.compute(BAKE, servings=1)
+        self.assertAlmostEqual(version.nutrition['calories'], whole['calories'] / 8, delta=1)
+
+
+class CarriedOverNutritionTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.user = User.objects.create_user('cook')
+        self.recipe = Recipe.objects.create(owner=self.user, name='Cake', slug='cake')
+        self.first = RecipeVersion.objects.create(
+            recipe=self.recipe, owner=self.user, version_number=1, metadata={'servings': 8}, ingredients=BAKE,
+        )
+
+    def next_version(self, ingredients, servings=8, nutrition=None):
+        return RecipeVersion.objects.create(
+            recipe=self.recipe, owner=self.user, version_number=2, metadata={'servings': servings},
+            ingredients=ingredients, nutrition=nutrition if nutrition is not None else self.first.nutrition,
+        )
+
+    def test_copied_nutrition_is_recomputed_for_new_ingredients(self):
+        more_butter = [dict(BAKE[0]), dict(BAKE[1]), {**BAKE[2], 'quantity': 500}]
+        version = self.next_version(more_butter)
+        self.assertGreater(version.nutrition['calories'], self.first.nutrition['calories'])
+
+    def test_copied_nutrition_is_recomputed_for_new_servings(self):
+        version = self.next_version(BAKE, servings=4)
+        self.assertAlmostEqual(version.nutrition['calories'], self.first.nutrition['calories'] * 2, delta=2)
+
+    def test_copied_nutrition_is_dropped_when_no_estimate(self):
+        version = self.next_version([{'id': 'ing_001', 'name': 'dragonfruit', 'quantity': 3}])
+        self.assertIsNone(version.nutrition)
+
+    def test_unchanged_recipe_keeps_its_nutrition(self):
+        version = self.next_version(BAKE)
+        self.assertEqual(version.nutrition, self.first.nutrition)
+
+    def test_client_nutrition_on_an_edit_is_kept(self):
+        version = self.next_version([{'id': 'ing_001', 'name': 'dragonfruit', 'quantity': 3}], nutrition={'calories': 90})
+        self.assertEqual(version.nutrition, {'calories': 90})
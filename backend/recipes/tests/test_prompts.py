@@ -0,0 +1,49 @@
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from recipes import prompts, schema_validation
+
+
+class PromptCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.path = Path(directory) / 'recipe.json'
+        patcher = mock.patch.object(schema_validation, 'schema_path', return_value=self.path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        prompts.reset()
+        self.addCleanup(prompts.reset)
+
+    def write_schema(self, title, mtime_ns):
+        self.path.write_text(json.dumps({'title': title}), encoding='utf-8')
+        os.utime(self.path, ns=(mtime_ns, mtime_ns))
+
+    def test_same_mtime_reuses_the_built_prompts(self):
+        self.write_schema('first', 1_000_000_000_000)
+        with mock.patch.object(prompts, '_build', wraps=prompts._build) as build:
+            first = prompts.import_system_prompt()
+            self.assertIs(prompts.import_system_prompt(), first)
+            self.assertIn('first', prompts.voice_system_prompt('patch'))
+        self.assertEqual(build.call_count, 1)
+
+    def test_mtime_change_rebuilds(self):
+        self.write_schema('first', 1_000_000_000_000)
+        self.assertEqual(prompts.schema_text(), '{"title":"first"}')
+        self.assertIn('first', prompts.voice_system_prompt())
+        self.write_schema('second', 2_000_000_000_000)
+        self.assertEqual(prompts.schema_text(), '{"title":"second"}')
+        self.assertIn('second', prompts.voice_system_prompt())
+        self.assertIn('second', prompts.import_system_prompt())
+
+    def test_missing_schema_file(self):
+        self.assertIsNone(prompts.schema_text())
+        self.assertNotIn('Recipe Schema', prompts.voice_system_prompt())
+        self.write_schema('late', 1_000_000_000_000)
+        self.assertEqual(prompts.schema_text(), '{"title":"late"}')
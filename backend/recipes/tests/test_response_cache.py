@@ -0,0 +1,34 @@
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe, RecipeVersion
+
+
+@override_settings(RESPONSE_CACHE_ENDPOINTS={'recipe_detail': True, 'recipe_list': True})
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.user = User.objects.create_user('cook')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(owner=self.user, name='Soup', slug='soup')
+        self.version = RecipeVersion.objects.create(
+            recipe=self.recipe, owner=self.user, version_number=1, title='Soup', commit_message='first',
+        )
+
+    def test_write_without_signals_is_not_served_stale(self):
+        # a write seen only by the database (e.g. made by another worker process) must change the body
+        first = self.client.get('/api/recipes/soup/')
+        RecipeVersion.objects.filter(pk=self.version.pk).update(commit_message='second', updated_at=timezone.now())
+        second = self.client.get('/api/recipes/soup/')
+        self.assertNotEqual(first['ETag'], second['ETag'])
+        self.assertEqual(second.json()['latest_version']['commit_message'], 'second')
+
+    def test_hit_is_byte_identical(self):
+        first = self.client.get('/api/recipes/')
+        second = self.client.get('/api/recipes/')
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(first['ETag'], second['ETag'])
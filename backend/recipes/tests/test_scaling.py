@@ -0,0 +1,98 @@
+import copy
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe, RecipeVersion
+from recipes.scaling import UNIT_SIZES, parse_quantity, scale_ingredient, scale_recipe
+
+UNITS = sorted(UNIT_SIZES) + ['', 'cloves', 'pinch']
+
+
+def _amount(item):
+    low, high = parse_quantity(item['quantity'])
+    return float(low), item['unit']
+
+
+class ScalingPropertyTests(TestCase):
+    """Randomized (seeded) properties over quantities, factors, units and systems."""
+
+    def cases(self, n=2000):
+        rng = random.Random(41)
+        for _ in range(n):
+            quantity = round(rng.choice([rng.uniform(0.05, 1), rng.uniform(1, 20), rng.uniform(20, 2000)]), 2) or 0.05
+            factor = rng.choice([0.25, 0.5, 1, 1.5, 2, 3, 4, 10, rng.uniform(0.1, 8)])
+            system = rng.choice([None, 'metric', 'imperial'])
+            yield {'name': 'x', 'quantity': quantity, 'unit': rng.choice(UNITS)}, factor, system
+
+    def test_nonzero_quantities_never_round_to_zero(self):
+        for item, factor, system in self.cases():
+            scaled, _ = scale_ingredient(item, factor, system)
+            self.assertGreater(_amount(scaled)[0], 0, (item, factor, system, scaled))
+
+    def test_rounding_error_is_relative(self):
+        for item, factor, system in self.cases():
+            scaled, _ = scale_ingredient(item, factor, system)
+            amount, unit = _amount(scaled)
+            expected = item['quantity'] * factor
+            if unit in UNIT_SIZES and item['unit'] in UNIT_SIZES:
+                amount *= UNIT_SIZES[unit][1]
+                expected *= UNIT_SIZES[item['unit']][1]
+            self.assertLessEqual(abs(amount - expected) / expected, 0.1, (item, factor, system, scaled))
+
+    def test_tiny_amounts_keep_their_size(self):
+        saffron = {'name': 'saffron', 'quantity': 0.1, 'unit': 'g'}
+        self.assertEqual(scale_ingredient(saffron, 1, 'metric')[0]['quantity'], 0.1)
+        self.assertEqual(scale_ingredient(saffron, 0.5)[0]['quantity'], 0.05)
+
+    def test_input_recipe_is_not_mutated(self):
+        recipe = {
+            'metadata': {'title': 'Soup', 'servings': 4},
+            'ingredients': [{'id': 'ing_001', 'name': 'stock', 'quantity': '1 1/2', 'unit': 'cups', 'tags': ['base']}],
+            'steps': [{'id': 'step_001', 'order': 1, 'instruction': 'Simmer'}],
+        }
+        before = copy.deepcopy(recipe)
+        scaled, _ = scale_recipe(recipe, servings=8, system='metric')
+        self.assertEqual(recipe, before)
+        self.assertEqual(scaled['metadata']['servings'], 8)
+
+    def test_hundred_ingredients_scale_in_well_under_a_millisecond(self):
+        rng = random.Random(7)
+        ingredients = [
+            {'id': f'ing_{i:03}', 'name': 'x', 'quantity': rng.choice(['1/2', '2', '1 1/2', 250, 0.5]), 'unit': rng.choice(UNITS)}
+            for i in range(100)
+        ]
+        recipe = {'metadata': {'servings': 4}, 'ingredients': ingredients, 'steps': []}
+        scale_recipe(recipe, factor=2, system='metric')
+        started = time.perf_counter()
+        for _ in range(50):
+            scale_recipe(recipe, factor=2, system='metric')
+        # generous bound so slow CI machines don't flake; typically ~0.15 ms
+        self.assertLess((time.perf_counter() - started) / 50, 0.005)
+
+
+class ScaleEndpointTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('cook')
+        recipe = Recipe.objects.create(owner=self.user, name='Pasta', slug='pasta')
+        self.version = RecipeVersion.objects.create(
+            recipe=recipe, owner=self.user, version_number=1, metadata={'title': 'Pasta'},
+            ingredients=[{'id': 'ing_001', 'name': 'garlic', 'quantity': 2, 'unit': 'cloves'}],
+            steps=[{'id': 'step_001', 'order': 1, 'instruction': 'Boil'}],
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f'/api/recipes/pasta/versions/{self.version.pk}/scale/'
+
+    def test_string_false_does_not_save(self):
+        response = self.client.post(self.url, {'factor': 2, 'save': 'false'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(RecipeVersion.objects.count(), 1)
+
+    def test_true_saves(self):
+        response = self.client.post(self.url, {'factor': 2, 'save': True}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(RecipeVersion.objects.count(), 2)
@@ -0,0 +1,110 @@
+import json
+import unittest
+
+from django.test import SimpleTestCase, override_settings
+
+from recipes import schema_validation
+
+try:
+    import jsonschema
+except ImportError:
+    jsonschema = None
+
+VALID = {
+    'metadata': {'title': 'Stew', 'language': 'en', 'servings': 4},
+    'ingredients': [{'id': 'ing_001', 'name': 'beef', 'quantity': 500, 'unit': 'g'}],
+    'steps': [{'id': 'step_001', 'order': 1, 'instruction': 'Brown the beef', 'temperature': {'value': 200, 'unit': 'C'}}],
+    'equipment': ['pot'],
+    'notes': [{'type': 'tip', 'content': 'Better the next day'}],
+    'nutrition': {'calories': 420, 'protein_g': 30.5},
+    'tags': ['winter'],
+}
+
+# (label, field, value, error path): each value breaks the published schema at that path
+INVALID = [
+    ('ingredients not an array', 'ingredients', {'id': 'ing_001'}, 'ingredients'),
+    ('ingredient without id', 'ingredients', [{'name': 'beef'}], 'ingredients[0].id'),
+    ('ingredient without name', 'ingredients', [{'id': 'ing_001'}], 'ingredients[0].name'),
+    ('ingredient name not a string', 'ingredients', [{'id': 'ing_001', 'name': 5}], 'ingredients[0].name'),
+    ('quantity a list', 'ingredients', [{'id': 'ing_001', 'name': 'beef', 'quantity': [1]}], 'ingredients[0].quantity'),
+    ('step without order', 'steps', [{'id': 'step_001', 'instruction': 'Mix'}], 'steps[0].order'),
+    ('step order a string', 'steps', [{'id': 'step_001', 'order': '1', 'instruction': 'Mix'}], 'steps[0].order'),
+    ('fractional duration', 'steps', [{'id': 's', 'order': 1, 'instruction': 'Mix', 'duration_minutes': 1.5}],
+     'steps[0].duration_minutes'),
+    ('timer a string', 'steps', [{'id': 's', 'order': 1, 'instruction': 'Mix', 'timer': 'yes'}], 'steps[0].timer'),
+    ('temperature unit not in enum', 'steps', [{'id': 's', 'order': 1, 'instruction': 'Bake',
+                                                'temperature': {'value': 180, 'unit': 'K'}}], 'steps[0].temperature.unit'),
+    ('language not in enum', 'metadata', {'title': 'Stew', 'language': 'klingon'}, 'metadata.language'),
+    ('metadata an array', 'metadata', ['Stew'], 'metadata'),
+    ('equipment item an object', 'equipment', [{'name': 'pot'}], 'equipment[0]'),
+    ('note type not in enum', 'notes', [{'type': 'rant', 'content': 'x'}], 'notes[0].type'),
+    ('calories a string', 'nutrition', {'calories': 'lots'}, 'nutrition.calories'),
+    ('boolean as a number', 'nutrition', {'protein_g': True}, 'nutrition.protein_g'),
+    ('tags a string', 'tags', 'winter', 'tags'),
+]
+
+
+def _published_schema():
+    """schemas/recipe.json with the app's deliberate relaxations (COMPAT_OVERRIDES) applied."""
+    with open(schema_validation.schema_path(), encoding='utf-8') as f:
+        return schema_validation._apply_compat(json.load(f))
+
+
+@override_settings(RECIPE_SCHEMA_VALIDATION='enforce')
+class SchemaValidationTests(SimpleTestCase):
+    def setUp(self):
+        schema_validation.reset()
+        self.addCleanup(schema_validation.reset)
+
+    def test_valid_recipe(self):
+        self.assertEqual(schema_validation.validate_recipe(VALID), [])
+        schema_validation.check(VALID, 'write')
+
+    def test_rejections(self):
+        for label, field, value, path in INVALID:
+            with self.subTest(label):
+                errors = schema_validation.validate_recipe({**VALID, field: value})
+                self.assertTrue(errors, f'{label} was accepted')
+                self.assertTrue(any(e.startswith(f'{path}:') for e in errors), errors)
+                with self.assertRaises(schema_validation.SchemaValidationError):
+                    schema_validation.check({**VALID, field: value}, 'write')
+
+    @unittest.skipIf(jsonschema is None, 'jsonschema is not installed')
+    def test_rejections_match_the_json_schema(self):
+        properties = _published_schema()['properties']
+        for field, value in VALID.items():
+            self.assertEqual(list(jsonschema.Draft7Validator(properties[field]).iter_errors(value)), [], field)
+        for label, field, value, _ in INVALID:
+            with self.subTest(label):
+                self.assertTrue(list(jsonschema.Draft7Validator(properties[field]).iter_errors(value)))
+
+    def test_extra_keys_follow_additional_properties(self):
+        # the published schema leaves objects open, so unknown keys are accepted there
+        recipe = {**VALID, 'ingredients': [{**VALID['ingredients'][0], 'brand': 'Acme'}]}
+        self.assertEqual(schema_validation.validate_recipe(recipe), [])
+        closed = {
+            'type': 'object', 'required': ['id'], 'additionalProperties': False,
+            'properties': {'id': {'type': 'string'}, 'size': {'type': 'integer', 'minimum': 1}},
+        }
+        validate = schema_validation.compile_schema(closed)
+        cases = [
+            ({'id': 'a', 'brand': 'Acme'}, ['item.brand: unexpected property']),
+            ({'size': 2}, ['item.id: required']),
+            ({'id': 'a', 'size': 0}, ['item.size: must be >= 1']),
+            ({'id': 'a', 'size': None}, []),  # optional properties may be null
+        ]
+        for value, expected in cases:
+            with self.subTest(value=value):
+                errors = []
+                validate(value, 'item', errors)
+                self.assertEqual(errors, expected)
+                if jsonschema is not None and value.get('size', 1) is not None:
+                    self.assertEqual(bool(expected), bool(list(jsonschema.Draft7Validator(closed).iter_errors(value))))
+
+    def test_optional_properties_accept_null(self):
+        recipe = {**VALID, 'nutrition': None, 'steps': [{**VALID['steps'][0], 'duration_minutes': None}]}
+        self.assertEqual(schema_validation.validate_recipe(recipe), [])
+
+    @override_settings(RECIPE_SCHEMA_VALIDATION='warn')
+    def test_warn_mode_does_not_raise(self):
+        schema_validation.check({**VALID, 'tags': 'winter'}, 'write')
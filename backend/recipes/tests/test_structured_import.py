@@ -0,0 +1,77 @@
+import json
+from pathlib import Path
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from recipes import services
+from recipes.structured_import import extract_structured_recipe, missing_fields
+
+FIXTURES = Path(__file__).parent / 'fixtures' / 'structured_import'
+
+
+def fixture(name):
+    return (FIXTURES / name).read_text(encoding='utf-8')
+
+
+class StructuredImportTests(SimpleTestCase):
+    def test_json_ld_graph(self):
+        data = extract_structured_recipe(fixture('jsonld_graph.html'), 'https://kitchen.example.com/noodles')
+        self.assertEqual(missing_fields(data), [])
+        metadata = data['metadata']
+        self.assertEqual(metadata['title'], 'Weeknight Garlic Noodles')
+        self.assertEqual(metadata['description'], 'Buttery garlic noodles in ¼ of an hour.')
+        self.assertEqual(metadata['language'], 'en')
+        self.assertEqual(metadata['source']['author'], 'Dana Cook')
+        self.assertEqual((metadata['course'], metadata['servings'], metadata['total_time_minutes']), ('main', 4, 15))
+        self.assertEqual(metadata['dietary_tags'], ['vegetarian'])
+        self.assertEqual(data['ingredients'][1], {'id': 'ing_002', 'name': 'butter', 'quantity': 4, 'unit': 'tablespoons'})
+        self.assertEqual(data['ingredients'][2]['preparation'], 'minced')
+        self.assertEqual(data['ingredients'][4]['quantity'], 0.5)
+        self.assertEqual([s['order'] for s in data['steps']], [1, 2, 3])
+        self.assertEqual(data['nutrition'], {'calories': 520, 'protein_g': 12.5})
+        self.assertEqual(data['main_picture'], 'https://kitchen.example.com/img/noodles-1x1.jpg')
+
+    def test_microdata(self):
+        data = extract_structured_recipe(fixture('microdata.html'))
+        self.assertEqual(missing_fields(data), [])
+        self.assertEqual(data['metadata']['title'], 'Classic Pancakes')
+        self.assertEqual(data['metadata']['description'], 'Fluffy weekend pancakes.')
+        self.assertEqual(data['metadata']['servings'], 8)
+        self.assertEqual([i['name'] for i in data['ingredients']], ['flour', 'eggs', 'milk'])
+        self.assertEqual(data['ingredients'][2]['quantity'], 1.75)
+        self.assertEqual(len(data['steps']), 3)
+        self.assertEqual(data['main_picture'], 'https://pancakes.example.org/stack.jpg')
+
+    def test_page_without_recipe_markup(self):
+        self.assertIsNone(extract_structured_recipe(fixture('no_structured_data.html')))
+
+    def test_incomplete_recipe_reports_missing_fields(self):
+        data = extract_structured_recipe(fixture('jsonld_incomplete.html'))
+        self.assertEqual(missing_fields(data), ['steps'])
+
+
+class PrepareWebpageImportTests(SimpleTestCase):
+    def prepare(self, name):
+        with mock.patch.object(services, '_fetch_html', return_value=(fixture(name), None)), \
+                mock.patch.object(services, '_fetch_and_preprocess_url', return_value=('# page markdown', None)) as convert:
+            return services.prepare_webpage_import('https://example.com/recipe'), convert
+
+    def test_complete_recipe_skips_the_model(self):
+        (kind, payload), convert = self.prepare('jsonld_graph.html')
+        self.assertEqual(kind, 'result')
+        self.assertEqual(payload['metadata']['source']['url'], 'https://example.com/recipe')
+        convert.assert_not_called()
+
+    def test_fallback_to_page_content(self):
+        for name in ('no_structured_data.html', 'jsonld_incomplete.html'):
+            (kind, payload), convert = self.prepare(name)
+            self.assertEqual((kind, payload), ('content', '# page markdown'))
+            convert.assert_called_once()
+
+    def test_non_english_recipe_is_sent_for_translation(self):
+        html = fixture('jsonld_graph.html').replace('"inLanguage": "en-US"', '"inLanguage": "ko-KR"')
+        with mock.patch.object(services, '_fetch_html', return_value=(html, None)):
+            kind, payload = services.prepare_webpage_import('https://example.com/recipe')
+        self.assertEqual(kind, 'content')
+        self.assertEqual(json.loads(payload)['metadata']['language'], 'ko')
@@ -0,0 +1,37 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+
+from recipes import sync
+from recipes.models import ChangeLogEntry, Recipe
+
+
+class RecordTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('cook')
+
+    def test_entries_are_inserted_at_commit(self):
+        with transaction.atomic():
+            Recipe.objects.create(owner=self.user, name='Soup')
+            self.assertFalse(ChangeLogEntry.objects.exists())
+        self.assertEqual(ChangeLogEntry.objects.filter(owner=self.user).count(), 1)
+
+    def test_rolled_back_writes_are_not_logged(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Recipe.objects.create(owner=self.user, name='Soup')
+            raise RuntimeError
+        self.assertFalse(ChangeLogEntry.objects.exists())
+
+    def test_deleting_the_owner_logs_nothing(self):
+        Recipe.objects.create(owner=self.user, name='Soup')
+        self.user.delete()
+        self.assertFalse(ChangeLogEntry.objects.exists())
+
+
+class RebuildTests(TestCase):
+    def test_rebuild_is_idempotent(self):
+        user = User.objects.create_user('cook')
+        Recipe.objects.create(owner=user, name='Soup')  # entry deferred to a commit that never comes
+        self.assertEqual(sync.rebuild()[ChangeLogEntry.RECIPE], 1)
+        self.assertEqual(sync.rebuild()[ChangeLogEntry.RECIPE], 0)
+        self.assertEqual(ChangeLogEntry.objects.count(), 1)
@@ -0,0 +1,43 @@
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.test import SimpleTestCase, override_settings
+from rest_framework.exceptions import Throttled
+
+from recipes import throttling
+
+
+@override_settings(AI_RATE_LIMIT_ENABLED=True, AI_MAX_IN_FLIGHT=2, AI_IN_FLIGHT_TTL=60)
+class InFlightTests(SimpleTestCase):
+    def setUp(self):
+        caches['default'].clear()
+
+    def test_leases_up_to_the_limit(self):
+        first, second = throttling._acquire(2), throttling._acquire(2)
+        self.assertIsNotNone(first)
+        self.assertIsNotNone(second)
+        self.assertIsNone(throttling._acquire(2))
+        throttling._release(first)
+        self.assertIsNotNone(throttling._acquire(2))
+
+    def test_expired_lease_releases_only_itself(self):
+        stale = throttling._acquire(2)
+        caches['default'].delete(stale[0])  # the lease ran past its TTL
+        fresh = throttling._acquire(2)
+        self.assertEqual(fresh[0], stale[0])
+        throttling._release(stale)
+        self.assertEqual(caches['default'].get(fresh[0]), fresh[1])
+        # releasing twice never frees more slots than exist
+        throttling._release(fresh)
+        throttling._release(fresh)
+        leases = [throttling._acquire(2) for _ in range(3)]
+        self.assertIsNone(leases[2])
+
+    def test_view_releases_its_slot(self):
+        view = throttling.limit_in_flight(lambda request: HttpResponse('ok'))
+        for _ in range(5):
+            self.assertEqual(view(None).status_code, 200)
+        blocker = [throttling._acquire(2), throttling._acquire(2)]
+        with self.assertRaises(Throttled):
+            view(None)
+        for lease in blocker:
+            throttling._release(lease)
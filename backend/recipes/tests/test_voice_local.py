@@ -0,0 +1,107 @@
+from django.test import SimpleTestCase
+
+from recipes.voice_local import try_local_voice_command
+
+RECIPE = {
+    'metadata': {'title': 'Cake', 'servings': 4},
+    'ingredients': [
+        {'id': 'ing_001', 'name': 'butter', 'quantity': 100, 'unit': 'g'},
+        {'id': 'ing_002', 'name': 'milk', 'quantity': 1, 'unit': 'cups'},
+        {'id': 'ing_003', 'name': 'eggs', 'quantity': 2, 'unit': ''},
+    ],
+    'steps': [{'id': 'step_001', 'order': 1, 'instruction': 'Bake', 'duration_minutes': 30}],
+}
+
+
+class IngredientSetTests(SimpleTestCase):
+    def ingredient(self, result, index):
+        return result['updated_recipe']['ingredients'][index]
+
+    def test_known_unit(self):
+        result = try_local_voice_command('change the milk to 2 cups', RECIPE)
+        self.assertEqual(self.ingredient(result, 1)['quantity'], 2)
+        self.assertEqual(self.ingredient(result, 1)['unit'], 'cups')
+
+    def test_article_with_known_unit(self):
+        result = try_local_voice_command('change the milk to a cup', RECIPE)
+        self.assertEqual(self.ingredient(result, 1)['quantity'], 1)
+
+    def test_half_a_unit(self):
+        result = try_local_voice_command('change the milk to half a cup', RECIPE)
+        self.assertEqual(self.ingredient(result, 1)['quantity'], 0.5)
+        self.assertEqual(self.ingredient(result, 1)['unit'], 'cup')
+
+    def test_number_without_unit(self):
+        result = try_local_voice_command('change the eggs to 3', RECIPE)
+        self.assertEqual(self.ingredient(result, 2)['quantity'], 3)
+
+    def test_substitutions_go_to_the_model(self):
+        for command in (
+            'change the butter to an olive oil',
+            'change the milk to a dairy-free milk',
+            'change the milk to 2 percent',
+            'change the eggs to a',
+        ):
+            with self.subTest(command=command):
+                self.assertIsNone(try_local_voice_command(command, RECIPE))
+
+
+class PhrasingTableTests(SimpleTestCase):
+    # (command, ingredient index, quantity, unit)
+    ACCEPTED = [
+        ('change the milk to 2 cups', 1, 2, 'cups'),
+        ('set milk to 1/2 cup', 1, 0.5, 'cup'),
+        ('please make the butter to 150 g', 0, 150, 'g'),
+        ('change the milk to 2 cups of milk', 1, 2, 'cups'),
+        ('change the milk to 2 cups of the milk', 1, 2, 'cups'),
+        ('use the milk = 3 cups', 1, 3, 'cups'),
+        ('change the eggs to three', 2, 3, ''),
+        ('double the butter', 0, 200, 'g'),
+        ('halve the milk', 1, 0.5, 'cups'),
+    ]
+    REFUSED = [
+        'change the milk to 2 cups of oat milk',
+        'change the milk to 2 cups of cream',
+        'change the butter to 100 g of margarine',
+        'change the milk to 2 of almond milk',
+        'change the milk to 2 percent',
+        'change the flour to 2 cups',
+        'change the milk to some',
+        'add 2 cups of oat milk',
+        'make the butter 150 g',
+    ]
+
+    def test_accepted(self):
+        for command, index, quantity, unit in self.ACCEPTED:
+            with self.subTest(command=command):
+                result = try_local_voice_command(command, RECIPE)
+                ingredient = result['updated_recipe']['ingredients'][index]
+                self.assertEqual((ingredient['quantity'], ingredient['unit']), (quantity, unit))
+
+    def test_refused(self):
+        for command in self.REFUSED:
+            with self.subTest(command=command):
+                self.assertIsNone(try_local_voice_command(command, RECIPE))
+
+
+class StepDurationTests(SimpleTestCase):
+    def test_whole_minutes(self):
+        result = try_local_voice_command('change step 1 to 120 seconds', RECIPE)
+        self.assertEqual(result['updated_recipe']['steps'][0]['duration_minutes'], 2)
+        self.assertIsInstance(result['updated_recipe']['steps'][0]['duration_minutes'], int)
+
+    def test_fractional_minutes_go_to_the_model(self):
+        self.assertIsNone(try_local_voice_command('change step 1 to 90 seconds', RECIPE))
+
+
+class LocalResultValidationTests(SimpleTestCase):
+    def test_invalid_local_result_falls_back_to_the_model(self):
+        from unittest import mock
+
+        from recipes import services
+
+        recipe = {**RECIPE, 'steps': [{'id': 'step_001', 'order': 1, 'instruction': 'Bake', 'duration_minutes': 'long'}]}
+        with mock.patch.object(services, '_get_client', return_value=None):
+            result, error = services.process_voice_command('change the eggs to 3', recipe)
+        self.assertIsNone(result)
+        self.assertIn('ANTHROPIC_API_KEY', error)
@@ -0,0 +1,106 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from recipes import services
+from recipes.voice_patch import PatchError, apply_recipe_patch
+
+RECIPE = {
+    'metadata': {'title': 'Cake', 'servings': 4},
+    'ingredients': [
+        {'id': 'ing_001', 'name': 'butter', 'quantity': 100, 'unit': 'g'},
+        {'id': 'ing_002', 'name': 'milk', 'quantity': 1, 'unit': 'cups'},
+    ],
+    'steps': [
+        {'id': 'step_001', 'order': 1, 'instruction': 'Mix'},
+        {'id': 'step_002', 'order': 2, 'instruction': 'Bake'},
+    ],
+    'equipment': ['oven'],
+    'notes': [],
+    'tags': ['dessert'],
+}
+
+
+class ApplyRecipePatchTests(SimpleTestCase):
+    def test_update(self):
+        patch = {'ingredients': [{'op': 'update', 'id': 'ing_002', 'fields': {'quantity': 2, 'id': 'ing_999'}}]}
+        updated = apply_recipe_patch(RECIPE, patch)
+        self.assertEqual(updated['ingredients'][1], {'id': 'ing_002', 'name': 'milk', 'quantity': 2, 'unit': 'cups'})
+        self.assertEqual(RECIPE['ingredients'][1]['quantity'], 1)  # input untouched
+
+    def test_add_assigns_a_fresh_id(self):
+        patch = {'ingredients': [
+            {'op': 'add', 'after': 'ing_001', 'item': {'id': 'ing_001', 'name': 'sugar'}},
+            {'op': 'add', 'item': {'name': 'salt'}},
+        ]}
+        updated = apply_recipe_patch(RECIPE, patch)
+        self.assertEqual(
+            [(i['id'], i['name']) for i in updated['ingredients']],
+            [('ing_004', 'salt'), ('ing_001', 'butter'), ('ing_003', 'sugar'), ('ing_002', 'milk')],
+        )
+
+    def test_remove(self):
+        updated = apply_recipe_patch(RECIPE, {'ingredients': [{'op': 'remove', 'id': 'ing_001'}]})
+        self.assertEqual([i['id'] for i in updated['ingredients']], ['ing_002'])
+
+    def test_move_renumbers_steps(self):
+        updated = apply_recipe_patch(RECIPE, {'steps': [{'op': 'move', 'id': 'step_002', 'after': None}]})
+        self.assertEqual([(s['id'], s['order']) for s in updated['steps']], [('step_002', 1), ('step_001', 2)])
+
+    def test_metadata_merges_and_lists_replace(self):
+        patch = {'metadata': {'servings': 8}, 'tags': ['vegan'], 'nutrition': None}
+        updated = apply_recipe_patch(RECIPE, patch)
+        self.assertEqual(updated['metadata'], {'title': 'Cake', 'servings': 8})
+        self.assertEqual(updated['tags'], ['vegan'])
+        self.assertIsNone(updated['nutrition'])
+
+    def test_invalid_patches_raise(self):
+        for patch in (
+            ['not', 'an', 'object'],
+            {'ingredients': {'op': 'remove'}},
+            {'ingredients': ['remove']},
+            {'ingredients': [{'op': 'remove', 'id': 'ing_404'}]},
+            {'ingredients': [{'op': 'update', 'id': 'ing_001', 'fields': 'x'}]},
+            {'ingredients': [{'op': 'add', 'after': 'ing_404', 'item': {'name': 'salt'}}]},
+            {'ingredients': [{'op': 'move', 'id': 'ing_001'}]},
+            {'steps': [{'op': 'rename', 'id': 'step_001'}]},
+            {'metadata': ['servings']},
+            {'tags': 'vegan'},
+            {'nutrition': 'lots'},
+        ):
+            with self.subTest(patch=patch), self.assertRaises(PatchError):
+                apply_recipe_patch(RECIPE, patch)
+
+
+@override_settings(VOICE_LOCAL_COMMANDS=False)
+class PatchModeFallbackTests(SimpleTestCase):
+    full_reply = {'action': 'modify_recipe', 'intent': 'ADD', 'updated_recipe': RECIPE, 'version_bump': 'minor'}
+
+    def run_command(self, *replies):
+        with mock.patch.object(services, '_get_client', return_value=object()), \
+                mock.patch.object(services, '_routed_json_message', side_effect=replies) as call, \
+                mock.patch.object(services, '_check_updated_recipe'):
+            result, error = services.process_voice_command('add salt', RECIPE, mode='patch')
+        return result, error, [c.args[1] for c in call.call_args_list]
+
+    def test_valid_patch_is_applied(self):
+        reply = {'action': 'modify_recipe', 'intent': 'ADD', 'patch': {'tags': ['salty']}}
+        result, error, tasks = self.run_command(reply)
+        self.assertIsNone(error)
+        self.assertEqual(tasks, ['voice_command.patch'])
+        self.assertEqual(result['updated_recipe']['tags'], ['salty'])
+        self.assertEqual(result['version_bump'], 'minor')
+
+    def test_invalid_patch_falls_back_to_full_mode(self):
+        reply = {'action': 'modify_recipe', 'patch': {'ingredients': [{'op': 'remove', 'id': 'ing_404'}]}}
+        result, error, tasks = self.run_command(reply, self.full_reply)
+        self.assertIsNone(error)
+        self.assertEqual(tasks, ['voice_command.patch', 'voice_command.full'])
+        self.assertEqual(result, self.full_reply)
+
+    def test_non_object_reply_falls_back_to_full_mode(self):
+        for reply in (['patch'], 'patch', None):
+            with self.subTest(reply=reply):
+                result, error, tasks = self.run_command(reply, self.full_reply)
+                self.assertIsNone(error)
+                self.assertEqual(tasks, ['voice_command.patch', 'voice_command.full'])
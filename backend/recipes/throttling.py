@@ -0,0 +1,175 @@
+"""
+Rate limits for the AI endpoints, kept in Django's cache so all processes sharing the cache
+backend share the limits.
+
+- AITokenBucketThrottle: one token bucket per (scope, user or client IP). Each scope in
+  settings.AI_RATE_LIMITS has a burst size and a refill rate per minute.
+- limit_in_flight: a global cap on concurrent AI requests (AI_MAX_IN_FLIGHT) across scopes.
+
+Both answer 429 with Retry-After through DRF's Throttled exception. Bucket updates are
+read-modify-write on the cache (not atomic across processes), so limits are approximate under
+heavy contention. The in-flight cap is a set of AI_MAX_IN_FLIGHT slots; each request leases one
+with cache.add() and its own expiry (AI_IN_FLIGHT_TTL), so a lease leaked by a killed process
+frees only its slot and the count can never go negative. cache.add() is atomic on the
+memcached, redis, database and local-memory backends; FileBasedCache checks then writes, so
+with CACHE_BACKEND=file two processes can occasionally share a slot (the cap is best-effort).
+"""
+
+import functools
+import math
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import Throttled
+from rest_framework.throttling import BaseThrottle
+
+from . import metrics
+
+KEY_PREFIX = 'forklog:ratelimit'
+INFLIGHT_PREFIX = f'{KEY_PREFIX}:inflight'
+
+
+def _cache():
+    return caches['default']
+
+
+def _enabled():
+    return getattr(settings, 'AI_RATE_LIMIT_ENABLED', True)
+
+
+class AITokenBucketThrottle(BaseThrottle):
+    """Token bucket per user (or client IP for anonymous requests); subclasses set scope."""
+
+    scope = None
+
+    def __init__(self):
+        self._wait = None
+
+    def get_rate(self):
+        """(burst capacity, tokens per second) for this scope, or None when unlimited."""
+        limit = getattr(settings, 'AI_RATE_LIMITS', {}).get(self.scope)
+        if not limit:
+            return None
+        burst, per_minute = limit
+        return float(burst), per_minute / 60.0
+
+    def get_cache_key(self, request):
+        user = getattr(request, 'user', None)
+        ident = f'user:{user.pk}' if user is not None and user.is_authenticated else f'ip:{self.get_ident(request)}'
+        return f'{KEY_PREFIX}:{self.scope}:{ident}'
+
+    def allow_request(self, request, view):
+        rate = self.get_rate() if _enabled() else None
+        if rate is None:
+            return True
+        capacity, refill = rate
+        key = self.get_cache_key(request)
+        now = time.time()
+        tokens, last = _cache().get(key) or (capacity, now)
+        tokens = min(capacity, tokens + (now - last) * refill)
+        if tokens >= 1:
+            # keep the entry until the bucket would be full again anyway
+            timeout = math.ceil((capacity - tokens + 1) / refill) + 1 if refill else None
+            _cache().set(key, (tokens - 1, now), timeout)
+            return True
+        self._wait = (1 - tokens) / refill if refill else None
+        metrics.incr(f'ratelimit.{self.scope}.rejected')
+        return False
+
+    def wait(self):
+        return self._wait
+
+
+class AIGuideThrottle(AITokenBucketThrottle):
+    scope = 'ai_guide'
+
+
+class AIImportThrottle(AITokenBucketThrottle):
+    scope = 'ai_import'
+
+
+class AIImportBatchThrottle(AITokenBucketThrottle):
+    scope = 'ai_import_batch'
+
+
+class AIVoiceCommandThrottle(AITokenBucketThrottle):
+    scope = 'ai_voice_command'
+
+
+def _slot_key(slot):
+    return f'{INFLIGHT_PREFIX}:{slot}'
+
+
+def _acquire(limit):
+    """Lease a free in-flight slot; returns (key, token) or None when all limit slots are taken."""
+    cache = _cache()
+    keys = [_slot_key(slot) for slot in range(limit)]
+    taken = cache.get_many(keys)
+    token = uuid.uuid4().hex
+    ttl = getattr(settings, 'AI_IN_FLIGHT_TTL', 300)
+    for key in keys:
+        # add() fails if another request leased the slot since get_many
+        if key not in taken and cache.add(key, token, ttl):
+            return key, token
+    return None
+
+
+def _release(lease):
+    key, token = lease
+    cache = _cache()
+    # the lease may have expired and the slot gone to another request; leave that one alone
+    if cache.get(key) == token:
+        cache.delete(key)
+
+
+class _ReleaseOnClose:
+    """Wraps streaming content; Django calls close() when the response is finished or aborted."""
+
+    def __init__(self, content, lease):
+        self._content = iter(content)
+        self._lease = lease
+        self._released = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._content)
+
+    def close(self):
+        if not self._released:
+            self._released = True
+            _release(self._lease)
+
+
+def limit_in_flight(view_func):
+    """
+    Reject with 429 while AI_MAX_IN_FLIGHT AI requests are already running. Apply below
+    @api_view so DRF turns Throttled into the response. Streaming responses hold their slot
+    until the stream ends.
+    """
+
+    @functools.wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        limit = getattr(settings, 'AI_MAX_IN_FLIGHT', 16)
+        if not _enabled() or not limit:
+            return view_func(request, *args, **kwargs)
+        lease = _acquire(limit)
+        if lease is None:
+            metrics.incr('ratelimit.in_flight.rejected')
+            raise Throttled(wait=getattr(settings, 'AI_IN_FLIGHT_RETRY_AFTER', 5))
+        streaming = False
+        try:
+            response = view_func(request, *args, **kwargs)
+            if isinstance(response, StreamingHttpResponse):
+                response.streaming_content = _ReleaseOnClose(response.streaming_content, lease)
+                streaming = True
+            return response
+        finally:
+            if not streaming:
+                _release(lease)
+
+    return wrapper
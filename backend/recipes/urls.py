@@ -11,13 +11,23 @@ urlpatterns = [
     path('recipes/<slug:slug>/', views.RecipeDetail.as_view()),
     path('recipes/<slug:slug>/versions/', views.RecipeVersionList.as_view()),
     path('recipes/<slug:slug>/versions/<int:pk>/', views.RecipeVersionDetail.as_view()),
+    path('recipes/<slug:slug>/versions/<int:pk>/scale/', views.scale_recipe_version),
+    path('recipes/<slug:slug>/versions/<int:pk>/nutrition/', views.recipe_version_nutrition),
     path('recipes/<slug:slug>/meals/', views.MealListCreate.as_view()),
     path('recipes/<slug:slug>/meals/<int:pk>/', views.MealDetail.as_view()),
+    path('versions/<int:pk>/fork/', views.fork_recipe_version),
     path('meals/', views.MyMealList.as_view()),
     path('meals/<int:pk>/', views.MyMealDetail.as_view()),
+    path('sync/', views.delta_sync),
+    path('discover/', views.discover_feed),
+    path('discover/<int:pk>/', views.discover_detail),
+    path('images/<str:name>', views.image_thumbnail),
     path('ai/guide/', views.ai_guide),
     path('ai/import/', views.ai_import),
+    path('ai/import/batch/', views.ai_import_batch),
+    path('ai/import/stream/', views.ai_import_stream),
     path('ai/voice-command/', views.ai_voice_command),
+    path('metrics/', views.metrics_snapshot),
     path('auth/me/', views.current_user),
     path('auth/register/', views.register),
     path('auth/login/', obtain_auth_token),
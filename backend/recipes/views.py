@@ -2,13 +2,31 @@
 API views for recipes, versions, and meals.
 """
 
-from django.db import models
+import hashlib
+import json
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Value
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import require_safe
 from rest_framework import status, generics
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 
-from .models import Recipe, RecipeVersion, Meal
+from .conditional import (
+    ConditionalGetMixin,
+    recipe_detail_validators,
+    recipe_list_validators,
+    recipe_version_list_validators,
+    recipe_version_validators,
+)
+from . import batch_import, blobs, discovery, images, metrics, nutrition, prompts, response_cache, signals, sync, throttling
+from .fast_render import FastVersionRetrieveMixin, version_instance_to_dict
+from .models import Meal, PublicRecipe, Recipe, RecipeVersion
 from .serializers import (
     RecipeSerializer,
     RecipeCreateSerializer,
@@ -17,6 +35,7 @@ from .serializers import (
     RecipeVersionListSerializer,
     MealSerializer,
     MealCreateSerializer,
+    validate_recipe_content,
 )
 from .services import (
     ai_guide_message,
@@ -24,8 +43,11 @@ from .services import (
     ai_import_recipe_from_webpage,
     process_voice_command,
     recipe_version_to_recipe_json,
+    stream_import_recipe_from_webpage,
     bump_version,
+    determine_version_bump,
 )
+from .scaling import ScalingError, scale_recipe
 
 
 def _recipes_for_user(request):
@@ -38,12 +60,19 @@ def _recipes_for_user(request):
 # ---------- Recipe CRUD ----------
 
 
-class RecipeListCreate(generics.ListCreateAPIView):
+class RecipeListCreate(ConditionalGetMixin, response_cache.CachedResponseMixin, generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated]
+    cache_endpoint = 'recipe_list'
 
     def get_queryset(self):
         return _recipes_for_user(self.request)
 
+    def get_validators(self):
+        return recipe_list_validators(self.request.user)
+
+    def get_response_cache_key(self):
+        return response_cache.list_key(self.request.user.pk)
+
     def get_serializer_class(self):
         if self.request.method == 'GET':
             return RecipeListSerializer
@@ -60,6 +89,7 @@ class RecipeListCreate(generics.ListCreateAPIView):
             meta = meta if isinstance(meta, dict) else {}
             name = data.get('title') or meta.get('title') or 'Untitled Recipe'
             name = (name or 'Untitled Recipe').strip() or 'Untitled Recipe'
+        validate_recipe_content(data)
         recipe_data = {'name': name}
         slug_val = data.get('slug')
         if slug_val is not None and slug_val != '':
@@ -110,20 +140,27 @@ class RecipeListCreate(generics.ListCreateAPIView):
             )
 
 
-class RecipeDetail(generics.RetrieveUpdateDestroyAPIView):
+class RecipeDetail(ConditionalGetMixin, response_cache.CachedResponseMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = RecipeSerializer
     permission_classes = [IsAuthenticated]
+    cache_endpoint = 'recipe_detail'
     lookup_field = 'slug'
     lookup_url_kwarg = 'slug'
 
     def get_queryset(self):
         return _recipes_for_user(self.request)
 
+    def get_validators(self):
+        return recipe_detail_validators(self.request.user, self.kwargs['slug'])
+
+    def get_response_cache_key(self):
+        return response_cache.detail_key(self.request.user.pk, self.kwargs['slug'])
+
 
 # ---------- Recipe versions ----------
 
 
-class RecipeVersionList(generics.ListCreateAPIView):
+class RecipeVersionList(ConditionalGetMixin, generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
@@ -132,6 +169,9 @@ class RecipeVersionList(generics.ListCreateAPIView):
             recipe__owner=self.request.user,
         ).order_by('-version_number')
 
+    def get_validators(self):
+        return recipe_version_list_validators(self.request.user, self.kwargs['slug'])
+
     def get_serializer_class(self):
         return RecipeVersionListSerializer if self.request.method == 'GET' else RecipeVersionSerializer
 
@@ -143,9 +183,15 @@ class RecipeVersionList(generics.ListCreateAPIView):
         serializer.save(recipe=recipe, version_number=next_num, owner=self.request.user)
 
 
-class RecipeVersionDetail(generics.RetrieveUpdateDestroyAPIView):
+class RecipeVersionDetail(
+    ConditionalGetMixin,
+    response_cache.CachedResponseMixin,
+    FastVersionRetrieveMixin,
+    generics.RetrieveUpdateDestroyAPIView,
+):
     serializer_class = RecipeVersionSerializer
     permission_classes = [IsAuthenticated]
+    cache_endpoint = 'recipe_version_detail'
 
     def get_queryset(self):
         return RecipeVersion.objects.filter(
@@ -153,6 +199,218 @@ class RecipeVersionDetail(generics.RetrieveUpdateDestroyAPIView):
             recipe__owner=self.request.user,
         )
 
+    def get_validators(self):
+        return recipe_version_validators(self.request.user, self.kwargs['slug'], self.kwargs['pk'])
+
+    def get_response_cache_key(self):
+        return response_cache.version_key(self.request.user.pk, self.kwargs['slug'], self.kwargs['pk'])
+
+
+def _flag(value):
+    """Boolean body/query flag: JSON true or a form-style 'true'/'1'/'yes'/'on'."""
+    if isinstance(value, str):
+        return value.strip().lower() in ('true', '1', 'yes', 'on')
+    return value is True or value == 1
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def scale_recipe_version(request, slug, pk):
+    """
+    Scale a version and/or convert its units, without calling the AI.
+
+    Body: { "factor": 2 | "1/2" } or { "servings": 6 }, optional "system": "metric"|"imperial",
+    optional "save": true and "commit_message".
+    Without save, returns { "recipe": scaled schema-shaped recipe, "scale": report } and nothing is stored.
+    With save, creates the next version (parent = this version) and returns it (201).
+    """
+    version = RecipeVersion.objects.filter(
+        pk=pk, recipe__slug=slug, recipe__owner=request.user,
+    ).select_related('recipe').first()
+    if version is None:
+        return Response({'error': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+    try:
+        scaled, report = scale_recipe(
+            recipe_version_to_recipe_json(version),
+            factor=request.data.get('factor'),
+            servings=request.data.get('servings'),
+            system=request.data.get('system') or None,
+        )
+    except ScalingError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    if not _flag(request.data.get('save')):
+        return Response({'recipe': scaled, 'scale': report})
+
+    recipe = version.recipe
+    next_num = (recipe.versions.aggregate(mx=models.Max('version_number')).get('mx') or 0) + 1
+    parts = []
+    if report['factor'] != 1:
+        parts.append(f'Scale recipe by {report["factor"]}x')
+    if report['system']:
+        parts.append(f'Convert units to {report["system"]}')
+    message = request.data.get('commit_message') or '; '.join(parts)
+    bump = determine_version_bump('scale_recipe' if report['factor'] != 1 else '', 'MODIFY')
+    new_version = RecipeVersion.objects.create(
+        recipe=recipe,
+        owner=request.user,
+        version_number=next_num,
+        version_semver=bump_version(version.version_semver or '1.0.0', bump),
+        parent_version=version,
+        is_public=version.is_public,
+        title=version.title,
+        main_picture=version.main_picture,
+        metadata=scaled['metadata'],
+        ingredients=scaled['ingredients'],
+        steps=scaled['steps'],
+        equipment=scaled['equipment'],
+        notes_array=scaled['notes'],
+        nutrition=scaled['nutrition'],
+        tags=scaled['tags'],
+        commit_message=message,
+        message=message,
+    )
+    return Response(RecipeVersionSerializer(new_version).data, status=status.HTTP_201_CREATED)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def recipe_version_nutrition(request, slug, pk):
+    """
+    Per-serving nutrition computed locally from the version's ingredients (bundled food table);
+    null when metadata.servings is unknown. Returns { "nutrition": {...} | null, "stored": version.nutrition, "report": {servings, coverage, matched, unmatched} }.
+    """
+    version = RecipeVersion.objects.filter(
+        pk=pk, recipe__slug=slug, recipe__owner=request.user,
+    ).only('ingredients', 'metadata', 'nutrition').first()
+    if version is None:
+        return Response({'error': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+    computed, report = nutrition.estimate(version.ingredients, version.metadata)
+    return Response({'nutrition': computed, 'stored': version.nutrition, 'report': report})
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def fork_recipe_version(request, pk):
+    """
+    Copy a public version (or one of your own) into a new recipe owned by you.
+    Body: optional "name" (default: the source title). Returns the new recipe (201).
+    Content columns are copied as stored (blobs.py refs), so the fork shares ingredients/steps
+    with its source until one of them changes; nutrition is copied, not recomputed.
+    """
+    blob_names = [f.attname for f in dict(blobs.blob_fields())[RecipeVersion]]
+    source = RecipeVersion.objects.filter(
+        models.Q(is_public=True) | models.Q(recipe__owner=request.user), pk=pk,
+    ).select_related('recipe__owner').defer(*blob_names).first()
+    if source is None:
+        return Response({'error': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+    name = request.data.get('name') if isinstance(request.data, dict) else None
+    if not isinstance(name, str) or not name.strip():
+        name = source.title or source.recipe.name
+    origin = source.recipe.owner.username if source.recipe.owner_id else ''
+    message = f'Forked from {origin + "/" if origin else ""}{source.recipe.slug} v{source.version_semver or source.version_number}'
+    with transaction.atomic():
+        columns = blobs.raw_columns(RecipeVersion, source.pk)
+        blobs.touch(columns.values())
+        recipe = Recipe.objects.create(owner=request.user, name=name.strip()[:255], forked_from=source)
+        fork = RecipeVersion(
+            recipe=recipe,
+            owner=request.user,
+            version_number=1,
+            version_semver='1.0.0',
+            is_public=False,
+            title=source.title,
+            main_picture=source.main_picture,
+            metadata=source.metadata,
+            tags=source.tags,
+            notes=source.notes,
+            author=source.author,
+            commit_message=message,
+            message=message,
+            **{attname: Value(text) if text is not None else None for attname, text in columns.items()},
+        )
+        # bulk_create skips pre_save, which would recompute nutrition the source already settled
+        RecipeVersion.objects.bulk_create([fork])
+        for attname in columns:
+            del fork.__dict__[attname]  # deferred: loaded from the new row if a hook reads it
+        signals.after_versions_written([fork])
+    return Response(RecipeSerializer(recipe).data, status=status.HTTP_201_CREATED)
+
+
+# ---------- Discovery (public recipes) ----------
+
+DISCOVERY_FEED_PARAMS = ('tag', 'cuisine', 'course', 'max_time', 'q', 'cursor', 'limit')
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def discover_feed(request):
+    """
+    Public recipes, newest first, from the discovery index (latest public version per recipe).
+    Query: tag (repeatable, all must match), cuisine, course, max_time (total minutes), q (title),
+    cursor (next_cursor of the previous page), limit (<= 50).
+    The response is the same for every user, so it is cached server-side and marked public.
+    """
+    params = [(k, v) for k in DISCOVERY_FEED_PARAMS for v in request.query_params.getlist(k)]
+    key = discovery.page_cache_key(params) if response_cache.is_enabled('discovery_feed') else None
+    body = response_cache.lookup('discovery_feed', key) if key else None
+    if body is None:
+        qp = request.query_params
+        try:
+            page = discovery.feed(
+                tags=qp.getlist('tag'), cuisine=qp.get('cuisine'), course=qp.get('course'),
+                max_time=qp.get('max_time'), q=qp.get('q'), cursor=qp.get('cursor'), limit=qp.get('limit'),
+            )
+        except discovery.FeedQueryError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        body = JSONRenderer().render(page)
+        if key:
+            response_cache.store(key, body)
+    etag = '"%s"' % hashlib.sha1(body).hexdigest()
+    response = get_conditional_response(request, etag=etag) or HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=discovery.max_age())
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def discover_detail(request, pk):
+    """Full latest public version of a discovery entry (same shape as a version detail)."""
+    entry = PublicRecipe.objects.select_related('version').filter(pk=pk).first()
+    if entry is None or not entry.version.is_public:
+        return Response({'error': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+    response = Response({**version_instance_to_dict(entry.version), 'discovery': discovery.entry_to_dict(entry)})
+    patch_cache_control(response, public=True, max_age=discovery.max_age())
+    return response
+
+
+# ---------- Image thumbnails ----------
+
+THUMBNAIL_CONTENT_TYPES = {'webp': 'image/webp', 'jpg': 'image/jpeg'}
+
+
+@require_safe
+def image_thumbnail(request, name):
+    """
+    Serve a generated thumbnail (images.py). Names contain the image's content hash, so a
+    response never changes: cached for a year as immutable, with the name as ETag.
+    Plain Django view: no auth or throttling work per image.
+    """
+    match = images.THUMBNAIL_NAME_RE.match(name)
+    if match is None:
+        raise Http404
+    etag = f'"{name}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        try:
+            handle = open(images.thumbnail_path(name), 'rb')
+        except FileNotFoundError:
+            raise Http404
+        response = FileResponse(handle, content_type=THUMBNAIL_CONTENT_TYPES[match['ext']])
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=365 * 24 * 3600, immutable=True)
+    return response
+
 
 # ---------- Meals ----------
 
@@ -244,11 +502,36 @@ class MyMealDetail(generics.RetrieveUpdateDestroyAPIView):
         )
 
 
+# ---------- Delta sync ----------
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def delta_sync(request):
+    """
+    The user's recipes, versions and meals created, updated or deleted since `cursor` (omit it for
+    everything), from the change log: {recipes, versions, meals, deleted: {recipes, versions, meals},
+    cursor, has_more}. Repeat with the returned cursor while has_more; limit <= 1000 log entries.
+    410 means the cursor is too old: drop local data and sync without one.
+    """
+    try:
+        page = sync.page(request.user, cursor=request.query_params.get('cursor'), limit=request.query_params.get('limit'))
+    except sync.SyncQueryError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except sync.CursorExpired as e:
+        return Response({'error': str(e), 'reset': True}, status=status.HTTP_410_GONE)
+    response = Response(page)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
 # ---------- AI endpoints ----------
 
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([throttling.AIGuideThrottle])
+@throttling.limit_in_flight
 def ai_guide(request):
     """
     Send user message and optional context; return Claude's cooking guidance.
@@ -278,6 +561,8 @@ def ai_guide(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([throttling.AIImportThrottle])
+@throttling.limit_in_flight
 def ai_import(request):
     """
     Import a recipe using Claude.
@@ -313,6 +598,85 @@ def ai_import(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([throttling.AIImportThrottle])
+@throttling.limit_in_flight
+def ai_import_stream(request):
+    """
+    Webpage import as Server-Sent Events, so the client can render the recipe while the model writes it.
+
+    Body: same as webpage import ({ "url", "content" optional, "language" }).
+    Events: status ({stage}), metadata, ingredient (one per ingredient), step (one per step),
+    section ({key, value} for equipment, notes, nutrition, tags, name), then result (the same
+    object ai/import/ returns) or error ({error}).
+    """
+    url = (request.data.get('url') or '').strip()
+    if not url:
+        return Response({'error': 'url is required'}, status=status.HTTP_400_BAD_REQUEST)
+    content = request.data.get('content') or ''
+    language = (request.data.get('language') or 'en').strip() or 'en'
+
+    def stream():
+        for event, data in stream_import_recipe_from_webpage(url, content, language):
+            yield f'event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n'
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@throttle_classes([throttling.AIImportBatchThrottle])
+@throttling.limit_in_flight
+def ai_import_batch(request):
+    """
+    Import many webpages in one request.
+
+    Body: { "urls": ["https://...", ...], "language": "en"|"ko"|..., "create": false }
+    Streams NDJSON, one line per unique URL as it finishes:
+    { "url", "status": "ok"|"error", "source": "cache"|"structured"|"ai", "result" | "error", "elapsed_ms" }
+    then a summary line { "done": true, "total", "ok", "errors", "created": [...] }. With "create": true,
+    each successful result becomes a recipe with an initial version (bulk insert after the last URL);
+    "created" lists { "url", "slug", "recipe_id", "version_id" }.
+    """
+    urls = request.data.get('urls')
+    if not isinstance(urls, list) or not urls:
+        return Response({'error': 'urls must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+    max_urls = getattr(settings, 'BATCH_IMPORT_MAX_URLS', 50)
+    if len(urls) > max_urls:
+        return Response(
+            {'error': f'At most {max_urls} URLs per batch.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    language = (request.data.get('language') or 'en').strip() or 'en'
+    create = bool(request.data.get('create'))
+    user = request.user
+
+    def stream():
+        ok = []
+        errors = 0
+        for item in batch_import.iter_batch_import(urls, language):
+            if item['status'] == 'ok':
+                ok.append(item)
+            else:
+                errors += 1
+            yield json.dumps(item, ensure_ascii=False) + '\n'
+        summary = {'done': True, 'total': len(ok) + errors, 'ok': len(ok), 'errors': errors}
+        if create:
+            summary['created'] = batch_import.create_recipes(user, ok)
+        yield json.dumps(summary) + '\n'
+
+    response = StreamingHttpResponse(stream(), content_type='application/x-ndjson')
+    response['Cache-Control'] = 'no-store'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@throttle_classes([throttling.AIVoiceCommandThrottle])
+@throttling.limit_in_flight
 def ai_voice_command(request):
     """
     Process a voice command to modify a recipe (transcription already done, e.g. via Whisper).
@@ -323,6 +687,8 @@ def ai_voice_command(request):
     - "recipe_version_id": id of RecipeVersion to load (recipe slug required for permission/lookup)
     - "recipe_slug": required when using recipe_version_id
     - "conversation_history": optional list of { "role": "user"|"assistant", "content": "..." }
+    - "mode": optional "full" | "patch" (default settings.VOICE_COMMAND_MODE); patch asks the model
+      for an id-addressed change set instead of the whole recipe (fewer output tokens)
 
     Returns:
     - action, intent, updated_recipe (when not request_clarification), commit_message,
@@ -364,8 +730,14 @@ def ai_voice_command(request):
         )
 
     conversation_history = request.data.get('conversation_history')
+    mode = request.data.get('mode')
+    if mode not in (None, 'full', 'patch'):
+        return Response(
+            {'error': 'mode must be "full" or "patch".'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
     result, err = process_voice_command(
-        transcription, current_recipe, conversation_history=conversation_history
+        transcription, current_recipe, conversation_history=conversation_history, mode=mode
     )
     if err:
         return Response({'error': err}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
@@ -376,6 +748,19 @@ def ai_voice_command(request):
     return Response(result)
 
 
+# ---------- Metrics ----------
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def metrics_snapshot(request):
+    """
+    Staff-only snapshot of this worker's cache and AI counters (see recipes/metrics.py), plus the
+    size of the cached static prompt segments (see recipes/prompts.py).
+    """
+    return Response({**metrics.snapshot(), 'prompts': prompts.segment_report()})
+
+
 # ---------- Auth / current user ----------
 
 
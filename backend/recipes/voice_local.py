@@ -0,0 +1,310 @@
+"""
+Deterministic handling of simple voice commands without calling Claude.
+
+Covers the common, unambiguous cases:
+- scale the whole recipe ("double the recipe", "halve it", "scale to 6 servings"), via scaling.py
+- scale or set one ingredient ("double the garlic", "change the sugar to 2 cups")
+- set a step's duration ("change step 3 to 10 minutes")
+
+try_local_voice_command returns the same response shape as process_voice_command, or None
+when the command is not recognized or is ambiguous (the caller then falls back to the model).
+"""
+
+import copy
+import re
+from fractions import Fraction
+
+from .scaling import ScalingError, scale_recipe
+from .structured_import import UNIT_ALIASES
+
+NUMBER_WORDS = {
+    'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6, 'seven': 7, 'eight': 8,
+    'nine': 9, 'ten': 10, 'eleven': 11, 'twelve': 12, 'a': 1, 'an': 1, 'half': 0.5, 'a half': 0.5,
+}
+# Articles only count as 1 when a known unit follows ('a cup'; not 'a dairy-free milk')
+ARTICLES = {'a', 'an'}
+
+MULTIPLIER_WORDS = {
+    'double': 2, 'triple': 3, 'quadruple': 4, 'halve': 0.5, 'half': 0.5,
+}
+
+_NUM = r'(\d+\s+\d+/\d+|\d+/\d+|\d+(?:\.\d+)?|' + '|'.join(sorted(NUMBER_WORDS, key=len, reverse=True)) + r')'
+_STEP_NUM = r'(\d+|one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve)'
+_WHOLE_RECIPE = r'(?:the\s+)?(?:whole\s+|entire\s+)?(?:recipe|it|everything|all(?:\s+ingredients)?)'
+
+_SCALE_WORD_RE = re.compile(rf'^(double|triple|quadruple|halve|half)\s+{_WHOLE_RECIPE}$')
+_SCALE_BY_RE = re.compile(rf'^(?:scale|multiply)\s+(?:{_WHOLE_RECIPE}\s+)?by\s+{_NUM}\s*(?:x|times)?$')
+_SCALE_SERVINGS_RE = re.compile(
+    rf'^(?:scale|make|adjust|change)\s+(?:{_WHOLE_RECIPE}\s+)?(?:to|for)\s+{_NUM}\s+(?:servings?|people|portions?|persons?)$'
+)
+_INGREDIENT_MULT_RE = re.compile(r'^(double|triple|quadruple|halve|half)\s+(?:the\s+)?(.+?)$')
+_INGREDIENT_SET_RE = re.compile(
+    rf'^(?:change|set|make|update|use)\s+(?:the\s+)?(.+?)\s+(?:to|=)\s+{_NUM}\s*([^\d\s].*)?$'
+)
+_STEP_DURATION_RE = re.compile(
+    rf'^(?:change|set|make|update)\s+step\s+(?:number\s+)?{_STEP_NUM}'
+    rf'(?:\'s)?(?:\s+(?:duration|time|timer|cook(?:ing)?\s+time))?\s+(?:to\s+)?{_NUM}\s+'
+    r'(minutes?|mins?|hours?|hrs?|seconds?|secs?)$'
+)
+
+
+def _normalize_text(text):
+    text = (text or '').strip().lower()
+    text = re.sub(r'^(?:please|can you|could you|let\'s|lets)\s+', '', text)
+    text = re.sub(r'[.!?]+$', '', text)
+    text = re.sub(r'\s+please$', '', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def parse_number(value):
+    """Number from int/float or a simple string ('2', '1.5', '1/2', '1 1/2', 'two'); None otherwise."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, str):
+        return None
+    s = value.strip().lower()
+    if s in NUMBER_WORDS:
+        return float(NUMBER_WORDS[s])
+    try:
+        if re.fullmatch(r'\d+\s+\d+/\d+', s):
+            whole, frac = s.split(None, 1)
+            return float(int(whole) + Fraction(frac))
+        if re.fullmatch(r'\d+/\d+', s):
+            return float(Fraction(s))
+        if re.fullmatch(r'\d+(?:\.\d+)?', s):
+            return float(s)
+    except (ValueError, ZeroDivisionError):
+        return None
+    return None
+
+
+def format_quantity(value):
+    """Whole numbers as int, otherwise rounded to 2 decimals."""
+    rounded = round(value, 2)
+    if abs(rounded - round(rounded)) < 1e-9:
+        return int(round(rounded))
+    return rounded
+
+
+def _find_ingredient(ingredients, phrase):
+    """Index of the single ingredient matching phrase; None if none or several match."""
+    phrase = phrase.strip().lower()
+    if not phrase:
+        return None
+    names = [
+        ((ing.get('name') or '') if isinstance(ing, dict) else '').strip().lower()
+        for ing in ingredients
+    ]
+    exact = [i for i, n in enumerate(names) if n == phrase]
+    if len(exact) == 1:
+        return exact[0]
+    if exact:
+        return None
+    pattern = re.compile(rf'\b{re.escape(phrase)}\b')
+    partial = [i for i, n in enumerate(names) if n and pattern.search(n)]
+    if len(partial) == 1:
+        return partial[0]
+    return None
+
+
+def _find_step(steps, number):
+    """Index of step `number` (1-based, by 'order' when present, else by position)."""
+    for i, step in enumerate(steps):
+        if isinstance(step, dict) and step.get('order') == number:
+            return i
+    if 1 <= number <= len(steps) and isinstance(steps[number - 1], dict):
+        return number - 1
+    return None
+
+
+def _result(action, intent, updated_recipe, commit_message, confirmation, target=None, changes=None, warnings=None):
+    from .services import determine_version_bump
+
+    result = {
+        'action': action,
+        'intent': intent,
+        'updated_recipe': updated_recipe,
+        'commit_message': commit_message,
+        'confirmation': confirmation,
+        'questions': [],
+        'version_bump': determine_version_bump(action, intent),
+        'handled_locally': True,
+    }
+    if target:
+        result['target'] = target
+    if changes:
+        result['changes'] = changes
+    if warnings:
+        result['warnings'] = warnings
+    return result
+
+
+def _scale_recipe(recipe, factor, new_servings=None):
+    try:
+        updated, report = scale_recipe(recipe, factor=factor)
+    except ScalingError:
+        return None
+    warnings = list(report['warnings'])
+    metadata = updated.setdefault('metadata', {})
+    original_servings = report['servings']['from']
+    if new_servings is not None:
+        metadata['servings'] = format_quantity(new_servings)
+    if factor > 1:
+        warnings.append('Cooking times and pan sizes may need adjusting for the larger batch.')
+    elif factor < 1:
+        warnings.append('Smaller batches may cook faster; check for doneness early.')
+    factor_text = format_quantity(factor)
+    return _result(
+        'scale_recipe', 'SCALE', updated,
+        commit_message=f'Scale recipe by {factor_text}x',
+        confirmation=f'Scaled the recipe by {factor_text} times.',
+        changes={
+            'scale_factor': factor_text,
+            'original_servings': original_servings,
+            'new_servings': metadata.get('servings'),
+        },
+        warnings=warnings,
+    )
+
+
+def _scale_ingredient(recipe, index, factor):
+    updated = copy.deepcopy(recipe)
+    ing = updated['ingredients'][index]
+    number = parse_number(ing.get('quantity'))
+    if number is None:
+        return None
+    old = ing.get('quantity')
+    ing['quantity'] = format_quantity(number * factor)
+    name = ing.get('name', '')
+    unit = f' {ing["unit"]}' if ing.get('unit') else ''
+    return _result(
+        'modify_ingredient', 'MODIFY', updated,
+        commit_message=f'Change {name} from {old}{unit} to {ing["quantity"]}{unit}',
+        confirmation=f'Changed {name} to {ing["quantity"]}{unit}.',
+        target={'ingredient_id': ing.get('id'), 'ingredient_name': name},
+        changes={'quantity': ing['quantity']},
+    )
+
+
+def _set_ingredient(recipe, index, quantity, unit):
+    updated = copy.deepcopy(recipe)
+    ing = updated['ingredients'][index]
+    old = ing.get('quantity')
+    old_unit = ing.get('unit') or ''
+    ing['quantity'] = format_quantity(quantity)
+    changes = {'quantity': ing['quantity']}
+    if unit:
+        ing['unit'] = unit
+        changes['unit'] = unit
+    name = ing.get('name', '')
+    new_unit = f' {ing["unit"]}' if ing.get('unit') else ''
+    old_text = f'{old} {old_unit}'.strip() if old not in (None, '') else 'unspecified'
+    return _result(
+        'modify_ingredient', 'MODIFY', updated,
+        commit_message=f'Change {name} from {old_text} to {ing["quantity"]}{new_unit}',
+        confirmation=f'Changed {name} to {ing["quantity"]}{new_unit}.',
+        target={'ingredient_id': ing.get('id'), 'ingredient_name': name},
+        changes=changes,
+    )
+
+
+def _set_step_duration(recipe, index, minutes):
+    updated = copy.deepcopy(recipe)
+    step = updated['steps'][index]
+    step['duration_minutes'] = format_quantity(minutes)
+    number = step.get('order') or index + 1
+    return _result(
+        'modify_step', 'MODIFY_STEP', updated,
+        commit_message=f'Set step {number} duration to {step["duration_minutes"]} minutes',
+        confirmation=f'Step {number} now takes {step["duration_minutes"]} minutes.',
+        target={'step_id': step.get('id'), 'step_number': number},
+        changes={'duration_minutes': step['duration_minutes']},
+    )
+
+
+def _to_minutes(value, unit):
+    if unit.startswith('h'):
+        return value * 60
+    if unit.startswith('s'):
+        return value / 60
+    return value
+
+
+def _spoken_unit(number, text, name):
+    """
+    Unit after the number in 'change X to <number> <unit>': '' for none, the unit when it is a
+    known one (scaling units), None for anything else ('2 percent', 'an olive oil'). A trailing
+    'of <ingredient>' must name the ingredient being changed ('2 cups of oat milk' for the milk
+    is a substitution, left to the model).
+    """
+    unit, _, of = re.sub(r'^of\s+', ' of ', (text or '').strip()).partition(' of ')
+    unit = unit.strip()
+    of = re.sub(r'^(?:the|some)\s+', '', of.strip())
+    if of and not re.search(rf'\b{re.escape(of)}\b', (name or '').strip().lower()):
+        return None
+    if number in ('half', 'a half'):
+        unit = re.sub(r'^an?\s+', '', unit)  # 'half a cup'
+    if not unit:
+        return None if number in ARTICLES else ''
+    return unit if unit in UNIT_ALIASES or unit.lower() in UNIT_ALIASES else None
+
+
+def try_local_voice_command(transcription, recipe):
+    """
+    Apply a simple voice command directly to a schema-shaped recipe dict.
+    Returns a process_voice_command-style result, or None to fall back to the model.
+    """
+    if not isinstance(recipe, dict):
+        return None
+    text = _normalize_text(transcription)
+    if not text:
+        return None
+    ingredients = recipe.get('ingredients') or []
+    steps = recipe.get('steps') or []
+
+    m = _SCALE_WORD_RE.match(text)
+    if m:
+        return _scale_recipe(recipe, MULTIPLIER_WORDS[m.group(1)])
+    m = _SCALE_BY_RE.match(text)
+    if m:
+        factor = parse_number(m.group(1))
+        return _scale_recipe(recipe, factor) if factor else None
+    m = _SCALE_SERVINGS_RE.match(text)
+    if m:
+        target = parse_number(m.group(1))
+        current = parse_number((recipe.get('metadata') or {}).get('servings'))
+        if not target or not current:
+            return None
+        return _scale_recipe(recipe, target / current, new_servings=target)
+
+    m = _STEP_DURATION_RE.match(text)
+    if m:
+        number = parse_number(m.group(1))
+        value = parse_number(m.group(2))
+        index = _find_step(steps, int(number)) if number else None
+        if index is None or value is None:
+            return None
+        minutes = _to_minutes(value, m.group(3))
+        if minutes <= 0 or abs(minutes - round(minutes)) > 1e-9:
+            return None  # duration_minutes is an integer; '90 seconds' is left to the model
+        return _set_step_duration(recipe, index, round(minutes))
+
+    m = _INGREDIENT_MULT_RE.match(text)
+    if m:
+        index = _find_ingredient(ingredients, m.group(2))
+        if index is None:
+            return None
+        return _scale_ingredient(recipe, index, MULTIPLIER_WORDS[m.group(1)])
+    m = _INGREDIENT_SET_RE.match(text)
+    if m:
+        index = _find_ingredient(ingredients, m.group(1))
+        quantity = parse_number(m.group(2))
+        if index is None or quantity is None:
+            return None
+        unit = _spoken_unit(m.group(2), m.group(3), ingredients[index].get('name'))
+        if unit is None:
+            return None
+        return _set_ingredient(recipe, index, quantity, unit)
+    return None
@@ -0,0 +1,101 @@
+"""
+Validate and apply ID-addressed recipe patches returned by the voice command patch mode
+(see voice_prompts.VOICE_COMMAND_PATCH_SYSTEM_PROMPT).
+"""
+
+import copy
+import re
+
+
+class PatchError(ValueError):
+    """Patch is malformed or references ids that do not exist."""
+
+
+_LIST_PREFIX = {'ingredients': 'ing', 'steps': 'step'}
+_REPLACE_LIST_KEYS = ('equipment', 'notes', 'tags')
+
+
+def _next_id(items, prefix):
+    highest = 0
+    for item in items:
+        m = re.fullmatch(rf'{prefix}_(\d+)', str(item.get('id', '')) if isinstance(item, dict) else '')
+        if m:
+            highest = max(highest, int(m.group(1)))
+    return f'{prefix}_{highest + 1:03d}'
+
+
+def _index_of(items, item_id, key):
+    for i, item in enumerate(items):
+        if isinstance(item, dict) and item.get('id') == item_id:
+            return i
+    raise PatchError(f'{key}: unknown id {item_id!r}')
+
+
+def _insert_position(items, after, key):
+    if after in (None, ''):
+        return 0
+    return _index_of(items, after, key) + 1
+
+
+def _apply_list_ops(items, ops, key):
+    if not isinstance(ops, list):
+        raise PatchError(f'{key}: ops must be a list')
+    prefix = _LIST_PREFIX[key]
+    for op in ops:
+        if not isinstance(op, dict):
+            raise PatchError(f'{key}: op must be an object')
+        kind = op.get('op')
+        if kind == 'update':
+            fields = op.get('fields')
+            if not isinstance(fields, dict):
+                raise PatchError(f'{key}: update needs "fields" object')
+            i = _index_of(items, op.get('id'), key)
+            items[i].update({k: v for k, v in fields.items() if k != 'id'})
+        elif kind == 'add':
+            item = op.get('item')
+            if not isinstance(item, dict):
+                raise PatchError(f'{key}: add needs "item" object')
+            item = dict(item)
+            existing = {it.get('id') for it in items if isinstance(it, dict)}
+            if not item.get('id') or item['id'] in existing:
+                item['id'] = _next_id(items, prefix)
+            items.insert(_insert_position(items, op.get('after'), key), item)
+        elif kind == 'remove':
+            del items[_index_of(items, op.get('id'), key)]
+        elif kind == 'move' and key == 'steps':
+            item = items.pop(_index_of(items, op.get('id'), key))
+            items.insert(_insert_position(items, op.get('after'), key), item)
+        else:
+            raise PatchError(f'{key}: unsupported op {kind!r}')
+    return items
+
+
+def apply_recipe_patch(recipe, patch):
+    """
+    Return a new recipe dict with patch applied; recipe is not modified.
+    Raises PatchError when the patch is invalid, so callers can fall back to full mode.
+    """
+    if not isinstance(patch, dict):
+        raise PatchError('patch must be an object')
+    updated = copy.deepcopy(recipe)
+    for key in ('ingredients', 'steps'):
+        if key in patch:
+            updated[key] = _apply_list_ops(list(updated.get(key) or []), patch[key], key)
+    if 'steps' in patch:
+        for n, step in enumerate(updated['steps'], start=1):
+            if isinstance(step, dict):
+                step['order'] = n
+    if 'metadata' in patch:
+        if not isinstance(patch['metadata'], dict):
+            raise PatchError('metadata must be an object')
+        updated['metadata'] = {**(updated.get('metadata') or {}), **patch['metadata']}
+    for key in _REPLACE_LIST_KEYS:
+        if key in patch:
+            if not isinstance(patch[key], list):
+                raise PatchError(f'{key} must be an array')
+            updated[key] = patch[key]
+    if 'nutrition' in patch:
+        if patch['nutrition'] is not None and not isinstance(patch['nutrition'], dict):
+            raise PatchError('nutrition must be an object or null')
+        updated['nutrition'] = patch['nutrition']
+    return updated
@@ -40,10 +40,27 @@ Return a JSON object with:
 Return ONLY valid JSON. No markdown or explanation."""
 
 
+# Patch mode: same task, but the model returns an ID-addressed change set instead of the full recipe.
+VOICE_COMMAND_PATCH_SYSTEM_PROMPT = VOICE_COMMAND_SYSTEM_PROMPT.split('**Output Format:**')[0] + """**Output Format:**
+Return a JSON object with:
+- "action", "intent", "commit_message", "confirmation", "questions", "version_bump", and optional "target", "warnings": same meaning as in full mode
+- "patch": the change set (omit when action is "request_clarification"). Do NOT return the full recipe. Keys, all optional:
+  - "ingredients": list of ops, applied in order:
+    {"op": "update", "id": "ing_003", "fields": {only the changed fields}}
+    {"op": "add", "after": "ing_002" or null for first, "item": {full new ingredient, "id" may be omitted}}
+    {"op": "remove", "id": "ing_004"}
+  - "steps": same ops keyed by "step_XXX", plus {"op": "move", "id": "step_005", "after": "step_002" or null}. Step "order" is renumbered by the server.
+  - "metadata": object of changed metadata fields only
+  - "equipment", "notes", "tags": full replacement arrays (only when they change)
+  - "nutrition": full replacement object (only when it changes)
+- Scaling: emit one "update" op per ingredient whose quantity changes, plus "metadata": {"servings": ...}.
+Use existing ids exactly as given. Return ONLY valid JSON. No markdown or explanation."""
+
+
 def get_voice_command_user_prompt(transcribed_text: str, recipe_json: dict, schema_json: str = None) -> str:
     """Build user prompt for processing a single voice command."""
     import json
-    recipe_str = json.dumps(recipe_json, indent=2, ensure_ascii=False)
+    recipe_str = json.dumps(recipe_json, ensure_ascii=False, separators=(',', ':'))
     prompt = f"""VOICE COMMAND: {transcribed_text}
 
 CURRENT RECIPE:
@@ -56,3 +73,15 @@ Process this command. Identify whether it is an ingredient change, step change,
 Recipe must conform to this schema:
 {schema_json[:8000]}"""
     return prompt
+
+
+def get_voice_command_patch_user_prompt(transcribed_text: str, recipe_json: dict) -> str:
+    """Build user prompt for a voice command answered with a patch (see VOICE_COMMAND_PATCH_SYSTEM_PROMPT)."""
+    import json
+    recipe_str = json.dumps(recipe_json, ensure_ascii=False, separators=(',', ':'))
+    return f"""VOICE COMMAND: {transcribed_text}
+
+CURRENT RECIPE:
+{recipe_str}
+
+Process this command. Identify whether it is an ingredient change, step change, scaling, metadata update, or ambiguous (need clarification). Return the response object with a "patch" containing only the changes, addressed by ingredient/step id. Return ONLY a single JSON object."""